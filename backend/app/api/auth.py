@@ -1,22 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from app.database.session import get_db
+from app.database.session import get_db, get_async_db
 from app.models import base
 from app.core import security
 from app.schemas.auth import BusinessRegister
+from app.services import stats_service
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
 from jose import jwt, JWTError # Asegúrate de tener 'python-jose' instalado
 
-# Función para obtener el usuario actual desde el Token
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar el acceso",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _email_from_token(token: str) -> str:
+    credentials_exception = _credentials_exception()
     try:
         # Decodificamos el token usando la clave secreta de tu archivo security
         payload = jwt.decode(
@@ -29,10 +35,26 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    user = db.query(base.User).filter(base.User.email == email).first()
+    return email
+
+
+# Función para obtener el usuario actual desde el Token. Hay dos versiones para que la
+# autenticación use la MISMA sesión que la ruta (FastAPI reutiliza get_db / get_async_db
+# dentro de una petición): mezclarlas ocupa dos conexiones del pool por petición.
+#   - rutas `def` con Session      -> get_current_user
+#   - rutas `async def` con AsyncSession -> get_current_user_async
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    user = db.query(base.User).filter(base.User.email == _email_from_token(token)).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return user
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    email = _email_from_token(token)
+    user = (await db.execute(select(base.User).where(base.User.email == email))).scalar_one_or_none()
+    if user is None:
+        raise _credentials_exception()
     return user
 
 def get_super_user(current_user = Depends(get_current_user)):
@@ -70,6 +92,9 @@ def register_business(data: BusinessRegister, db: Session = Depends(get_db)):
         phone=data.phone or None
     )
     db.add(new_user)
+    stats_service.record(db, "total_tenants", 1)
+    stats_service.record(db, "active_users", 1)
+    stats_service.record(db, "total_revenue", new_wallet.balance)
     db.commit()
     return {"message": "Negocio creado con éxito"}
 
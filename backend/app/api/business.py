@@ -1,27 +1,32 @@
-import os
-import uuid
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Request, Response, Query
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from jose import jwt
-from supabase import create_client, Client
 from app.schemas.BusinessHourSchema import BusinessHoursList, BusinessProfileUpdate
 from app.schemas.BusinessConfig import DeliveryConfigUpdate
-from app.database.session import get_db
+from app.database.session import get_db, get_async_db
 from app.models import base
 from app.api.auth import oauth2_scheme
 from app.core.security import SECRET_KEY, ALGORITHM
+from app.services.tenant_cache import tenant_cache
+from app.services.catalog_cache import catalog_cache, etag_matches
+from app.services.pagination import paginate, encode_cursor, decode_cursor, MAX_PAGE_SIZE
+from app.services.search_service import catalog_search
+from app.services.slot_service import slot_cache, DEFAULT_INTERVAL_MINUTES
+from app.services.storage_service import StorageError
+from app.services.image_service import store_images, ImageError
+from app.services.upload_service import check_uploads
+from app.services.storage_gc import deferred_deletes
+from app.core.config import PRODUCT_IMAGE_WIDTHS, LOGO_IMAGE_WIDTHS
+from app.core.config import SLOT_RANGE_MAX_DAYS
 
 router = APIRouter()
 
-# --- CONFIGURACIÓN SUPABASE ---
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 # --- SEGURIDAD ---
 def get_current_tenant_id(token: str = Depends(oauth2_scheme)):
     try:
@@ -33,40 +38,81 @@ def get_current_tenant_id(token: str = Depends(oauth2_scheme)):
     except Exception:
         raise HTTPException(status_code=401, detail="No se pudo validar el token")
 
+# Orden estable para paginar productos por cursor: (updated_at, id) descendente
+ITEM_PAGE_KEYS = [(base.Item.updated_at, "desc"), (base.Item.id, "desc")]
+
+def _item_page_key(item):
+    return (item.updated_at, item.id)
+
+def _search_page(db: Session, tenant_id: str, term: str, skip: int, cursor: Optional[str], limit: int):
+    """Página de resultados de búsqueda, ordenados por relevancia: (items, total, next_cursor)."""
+    ranked_ids = catalog_search.search_item_ids(db, tenant_id, term)
+    offset = decode_cursor(cursor, 1)[0] if cursor else skip
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    page_ids = ranked_ids[offset:offset + limit]
+
+    items_by_id = {}
+    if page_ids:
+        rows = db.query(base.Item).options(selectinload(base.Item.variants), selectinload(base.Item.extras))\
+            .filter(base.Item.tenant_id == tenant_id, base.Item.id.in_(page_ids)).all()
+        items_by_id = {item.id: item for item in rows}
+
+    items = [items_by_id[item_id] for item_id in page_ids if item_id in items_by_id]
+    next_cursor = encode_cursor(offset + limit) if offset + limit < len(ranked_ids) else None
+    return items, len(ranked_ids), next_cursor
+
 # --- ENDPOINTS PÚBLICOS ---
 
+def _cached_json_response(cached, request: Request) -> Response:
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
 @router.get("/public/{slug}")
 def get_public_business_data(
     slug: str, 
+    request: Request,
     skip: int = 0, 
-    limit: int = 5, 
+    limit: int = Query(5, ge=1, le=MAX_PAGE_SIZE), 
     search: Optional[str] = None, 
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
-    tenant = db.query(base.Tenant).filter(base.Tenant.slug == slug).first()
+    tenant = tenant_cache.get_by_slug(db, slug)
     
-    if not tenant or not getattr(tenant, 'is_active', True):
+    if not tenant or not tenant.is_active:
         raise HTTPException(
             status_code=404, 
             detail="El negocio no existe o no está disponible"
         )
 
-    query = db.query(base.Item).filter(base.Item.tenant_id == tenant.id)
+    # La respuesta completa se cachea serializada; cualquier escritura del negocio sube su versión
+    cache_params = (skip, limit, search or "", cursor or "", include_total)
+    cached, version = catalog_cache.get(tenant.id, cache_params)
+    if cached is None:
+        payload = _build_public_payload(db, tenant, skip, limit, search, cursor, include_total)
+        body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+        cached = catalog_cache.put(tenant.id, version, cache_params, body)
 
+    return _cached_json_response(cached, request)
+
+def _build_public_payload(db: Session, tenant, skip: int, limit: int, search: Optional[str],
+                          cursor: Optional[str], include_total: bool):
     if search:
-        query = query.filter(
-            or_(
-                base.Item.name.ilike(f"%{search}%"),
-                base.Item.description.ilike(f"%{search}%")
-            )
+        items, total_items, next_cursor = _search_page(db, tenant.id, search, skip, cursor, limit)
+    else:
+        query = db.query(base.Item).filter(base.Item.tenant_id == tenant.id)
+        # El conteo completo es opcional: quien pagina por cursor no lo necesita
+        total_items = query.count() if include_total else None
+        # selectinload trae variantes y extras con un IN por página, sin subconsulta envolvente
+        items, next_cursor = paginate(
+            query.options(selectinload(base.Item.variants), selectinload(base.Item.extras)),
+            ITEM_PAGE_KEYS, cursor, limit, _item_page_key, skip=skip
         )
 
-    total_items = query.count()
-    items = query.options(
-        joinedload(base.Item.variants),
-        joinedload(base.Item.extras)
-    ).offset(skip).limit(limit).all()
-
     formatted_items = []
     for item in items:
         formatted_items.append({
@@ -79,12 +125,10 @@ def get_public_business_data(
             "stock": item.stock,
             "variants": [{"id": v.id, "name": v.name, "price": v.price, "stock": v.stock} for v in item.variants],
             "extras": [{"id": e.id, "name": e.name, "price": e.price, "stock": e.stock} for e in item.extras],
-            "additional_images": item.additional_images or [] # Aseguramos que sea lista
+            "additional_images": item.additional_images or [], # Aseguramos que sea lista
+            "image_variants": item.image_variants or {}
         })
 
-    posts = db.query(base.Post).filter(base.Post.tenant_id == tenant.id)\
-              .order_by(base.Post.created_at.desc()).limit(10).all()
-
     return {
         "business": {
             "id": tenant.id,
@@ -111,38 +155,50 @@ def get_public_business_data(
         },
         "items": formatted_items,
         "total_items": total_items,
-        "posts": posts
+        "next_cursor": next_cursor,
+        # Los posts no van aquí: sus likes cambian a cada rato y esta respuesta se cachea;
+        # la tienda los pide a /social/feed/{slug}
     }
 
-@router.get("/public/availability/{slug}")
-async def get_availability(slug: str, date: str, db: Session = Depends(get_db)):
-    tenant = db.query(base.Tenant).filter(base.Tenant.slug == slug).first()
-    if not tenant:
-        raise HTTPException(status_code=404, detail="Negocio no encontrado")
-
+def _parse_day(value: str):
     try:
-        # Forzamos a que la fecha de búsqueda empiece a las 00:00:00 de ese día
-        search_date = datetime.strptime(date, "%Y-%m-%d").replace(hour=0, minute=0, second=0)
+        return datetime.strptime(value, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido")
 
-    orders = db.query(base.Order).filter(
-        base.Order.tenant_id == tenant.id,
-        base.Order.status != "cancelled",
-        base.Order.appointment_datetime >= search_date,
-        base.Order.appointment_datetime < search_date + timedelta(days=1)
-    ).all()
+@router.get("/public/availability/{slug}")
+async def get_availability(slug: str, date: str, db: AsyncSession = Depends(get_async_db)):
+    tenant = await db.run_sync(tenant_cache.get_by_slug, slug)
+    if not tenant:
+        raise HTTPException(status_code=404, detail="Negocio no encontrado")
 
+    day = (await db.run_sync(slot_cache.get_range, tenant, _parse_day(date), 1))[0]
     # Importante: El modal espera "09:00", "10:00"... 
-    # strftime("%H:%M") nos da exactamente eso.
-    busy_times = [order.appointment_datetime.strftime("%H:%M") for order in orders if order.appointment_datetime]
-    
-    return {"busy_times": busy_times}
+    return {"busy_times": list(day.busy_times)}
+
+@router.get("/public/availability/{slug}/range")
+async def get_availability_range(
+    slug: str,
+    start: str,
+    days: int = Query(14, ge=1, le=SLOT_RANGE_MAX_DAYS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Slots de varios días en una sola llamada (ej: las próximas dos semanas del calendario)."""
+    tenant = await db.run_sync(tenant_cache.get_by_slug, slug)
+    if not tenant:
+        raise HTTPException(status_code=404, detail="Negocio no encontrado")
+
+    slots = await db.run_sync(slot_cache.get_range, tenant, _parse_day(start), days)
+    return {
+        "interval": tenant.appointment_interval or DEFAULT_INTERVAL_MINUTES,
+        "days": [day.to_dict() for day in slots]
+    }
+
 # --- GESTIÓN PRIVADA (DUEÑO) ---
 
 @router.get("/me")
 def get_business_info(db: Session = Depends(get_db), tenant_id: str = Depends(get_current_tenant_id)):
-    tenant = db.query(base.Tenant).filter(base.Tenant.id == tenant_id).first()
+    tenant = tenant_cache.get_by_id(db, tenant_id)
     wallet = db.query(base.Wallet).filter(base.Wallet.tenant_id == tenant_id).first()
     
     if not tenant:
@@ -171,39 +227,72 @@ def get_business_info(db: Session = Depends(get_db), tenant_id: str = Depends(ge
         ]
     }
 
+def _items_page(db: Session, tenant_id: str, q: Optional[str], skip: int, cursor: Optional[str],
+                limit: int, include_total: bool):
+    if q:
+        return _search_page(db, tenant_id, q, skip, cursor, limit)
+    query = db.query(base.Item).filter(base.Item.tenant_id == tenant_id)
+    total = query.count() if include_total else None
+    items_db, next_cursor = paginate(
+        query.options(selectinload(base.Item.variants), selectinload(base.Item.extras)),
+        ITEM_PAGE_KEYS, cursor, limit, _item_page_key, skip=skip
+    )
+    return items_db, total, next_cursor
+
 @router.get("/items")
 async def get_items(
     skip: int = 0, 
-    limit: int = 5, 
+    limit: int = Query(5, ge=1, le=MAX_PAGE_SIZE), 
     q: str = None, 
-    db: Session = Depends(get_db), 
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_async_db), 
     current_user = Depends(get_current_tenant_id)
 ):
-    query = db.query(base.Item).options(
-        joinedload(base.Item.variants),
-        joinedload(base.Item.extras)
-    ).filter(base.Item.tenant_id == current_user)
-    
-    if q:
-        search_filter = f"%{q}%"
-        query = query.filter(
-            or_(
-                base.Item.name.ilike(search_filter),
-                base.Item.description.ilike(search_filter)
-            )
-        )
-    
-    total = query.count()
-    
-    items_db = query.order_by(base.Item.updated_at.desc()).offset(skip).limit(limit).all()
+    items_db, total, next_cursor = await db.run_sync(
+        _items_page, current_user, q, skip, cursor, limit, include_total
+    )
     
     return {
         "total": total, 
         "items": items_db, # FastAPI se encarga de serializar la lista items_db
         "skip": skip, 
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor
     }
 
+async def store_images_or_error(files: List[UploadFile], prefix: str, widths):
+    # Tipo y tamaño se validan leyendo por bloques el archivo que ya dejó Starlette (413/415)
+    checked = await check_uploads(files)
+    try:
+        return await store_images([item.upload.file for item in checked], prefix, widths)
+    except ImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StorageError as e:
+        print(f"Error Storage: {e}")
+        raise HTTPException(status_code=502, detail="No se pudieron subir las imágenes, intenta de nuevo")
+
+async def _upload_product_images(tenant_id: str, image: Optional[UploadFile], additional_images: Optional[List[UploadFile]]):
+    """
+    Optimiza y sube la imagen principal y las adicionales en una sola tanda.
+    Devuelve (StoredImage principal o None, [StoredImage adicionales]).
+    """
+    files = [image] if image else []
+    for img in additional_images or []:
+        if img.filename: # Verificar que el archivo no esté vacío
+            files.append(img)
+
+    stored = await store_images_or_error(files, f"{tenant_id}/items", PRODUCT_IMAGE_WIDTHS)
+    if image:
+        return stored[0], stored[1:]
+    return None, stored
+
+def _image_variants_for(urls: List[Optional[str]], previous: Optional[dict], new_images) -> dict:
+    """Variantes de las URLs que el item sigue usando (las viejas que se quitaron se descartan)."""
+    merged = dict(previous or {})
+    merged.update({stored.url: stored.variants for stored in new_images})
+    return {url: merged[url] for url in urls if url and url in merged}
+
 @router.post("/items")
 async def create_product(
     name: str = Form(...),
@@ -215,36 +304,22 @@ async def create_product(
     additional_images: List[UploadFile] = File(None),
     variants: Optional[str] = Form(None), # Nuevo: Recibe JSON string
     extras: Optional[str] = Form(None),   # Nuevo: Recibe JSON string
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     tenant_id: str = Depends(get_current_tenant_id)
 ):
-    image_url = None
-    if image:
-        file_content = await image.read()
-        file_path = f"{tenant_id}/{uuid.uuid4().hex[:8]}.{image.filename.split('.')[-1]}"
-        supabase.storage.from_("images").upload(path=file_path, file=file_content, file_options={"content-type": image.content_type})
-        image_url = supabase.storage.from_("images").get_public_url(file_path)
-
-    additional_urls = []
-    if additional_images:
-        for img in additional_images:
-            if img.filename: # Verificar que el archivo no esté vacío
-                content = await img.read()
-                path = f"{tenant_id}/extras/{uuid.uuid4().hex[:8]}_{img.filename}"
-                supabase.storage.from_("images").upload(
-                    path=path, 
-                    file=content, 
-                    file_options={"content-type": img.content_type}
-                )
-                url = supabase.storage.from_("images").get_public_url(path)
-                additional_urls.append(url)    
+    # Imagen principal y adicionales se optimizan y suben juntas, en paralelo
+    main_image, extra_images = await _upload_product_images(tenant_id, image, additional_images)
+    image_url = main_image.url if main_image else None
+    additional_urls = [stored.url for stored in extra_images]
+    new_images = ([main_image] if main_image else []) + extra_images
 
     new_item = base.Item(
         name=name, price=price, is_service=is_service, tenant_id=tenant_id,
-        image_url=image_url, stock=stock, description=description, created_at=datetime.utcnow(), additional_images=additional_urls
+        image_url=image_url, stock=stock, description=description, created_at=datetime.utcnow(), additional_images=additional_urls,
+        image_variants=_image_variants_for([image_url] + additional_urls, None, new_images)
     )
     db.add(new_item)
-    db.flush() # Para obtener el ID antes de insertar variantes/extras
+    await db.flush() # Para obtener el ID antes de insertar variantes/extras
 
     if variants:
         v_list = json.loads(variants)
@@ -259,8 +334,10 @@ async def create_product(
         new_item.description = description
     else:
         new_item.description = ""
-    db.commit()
-    db.refresh(new_item)
+    await db.commit()
+    catalog_cache.bump(tenant_id)
+    await db.refresh(new_item)
+    catalog_search.index_item(new_item)
     return new_item
 
 @router.put("/items/{item_id}")
@@ -276,38 +353,28 @@ async def update_product(
     existing_additional_images: Optional[str] = Form("[]"), 
     variants: Optional[str] = Form(None),
     extras: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     tenant_id: str = Depends(get_current_tenant_id)
 ):
-    item = db.query(base.Item).filter(base.Item.id == item_id, base.Item.tenant_id == tenant_id).first()
+    item = (await db.execute(
+        select(base.Item).where(base.Item.id == item_id, base.Item.tenant_id == tenant_id)
+    )).scalar_one_or_none()
     if not item:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     
-    # 1. Procesar Imagen Principal
-    if image:
-        file_content = await image.read()
-        file_path = f"{tenant_id}/{uuid.uuid4().hex[:8]}.{image.filename.split('.')[-1]}"
-        supabase.storage.from_("images").upload(path=file_path, file=file_content, file_options={"content-type": image.content_type, "upsert": "true"})
-        item.image_url = supabase.storage.from_("images").get_public_url(file_path)
+    previous_urls = {item.image_url, *(item.additional_images or [])}
+
+    # 1 y 2. Optimizar y subir imagen principal y adicionales nuevas (en paralelo)
+    main_image, extra_images = await _upload_product_images(tenant_id, image, additional_images)
+    if main_image:
+        item.image_url = main_image.url
 
-    # 2. PROCESAR IMÁGENES ADICIONALES
     kept_urls = json.loads(existing_additional_images) if existing_additional_images else []
-    
-    new_urls = []
-    if additional_images:
-        for img in additional_images:
-            if img.filename: 
-                content = await img.read()
-                path = f"{tenant_id}/extras/{uuid.uuid4().hex[:8]}_{img.filename}"
-                supabase.storage.from_("images").upload(
-                    path=path, 
-                    file=content, 
-                    file_options={"content-type": img.content_type}
-                )
-                url = supabase.storage.from_("images").get_public_url(path)
-                new_urls.append(url)
-    
-    item.additional_images = kept_urls + new_urls
+    item.additional_images = kept_urls + [stored.url for stored in extra_images]
+    item.image_variants = _image_variants_for(
+        [item.image_url] + item.additional_images, item.image_variants,
+        ([main_image] if main_image else []) + extra_images
+    )
 
     # 3. Actualizar campos básicos
     item.name, item.price, item.is_service, item.stock = name, price, is_service, stock
@@ -316,20 +383,24 @@ async def update_product(
 
     # 4. Actualizar Variantes
     if variants is not None:
-        db.query(base.ItemVariant).filter(base.ItemVariant.item_id == item.id).delete()
+        await db.execute(delete(base.ItemVariant).where(base.ItemVariant.item_id == item.id))
         v_list = json.loads(variants)
         for v in v_list:
             db.add(base.ItemVariant(item_id=item.id, name=v['name'], price=float(v['price']), stock=int(v.get('stock', 0))))
 
     # 5. Actualizar Extras
     if extras is not None:
-        db.query(base.ItemExtra).filter(base.ItemExtra.item_id == item.id).delete()
+        await db.execute(delete(base.ItemExtra).where(base.ItemExtra.item_id == item.id))
         e_list = json.loads(extras)
         for e in e_list:
             db.add(base.ItemExtra(item_id=item.id, name=e['name'], price=float(e['price']), stock=int(e.get('stock', 0))))
 
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    catalog_cache.bump(tenant_id)
+    # Las imágenes reemplazadas o quitadas se borran después, en lote
+    deferred_deletes.add(previous_urls - {item.image_url, *item.additional_images})
+    await db.refresh(item)
+    catalog_search.index_item(item)
     return item
 
 @router.delete("/items/{item_id}")
@@ -338,14 +409,12 @@ def delete_product(item_id: str, db: Session = Depends(get_db), tenant_id: str =
     if not item:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     
-    if item.image_url:
-        try:
-            path = item.image_url.split("/public/images/")[1]
-            supabase.storage.from_("images").remove([path])
-        except: pass
-
+    image_urls = [item.image_url, *(item.additional_images or [])]
     db.delete(item)
     db.commit()
+    catalog_cache.bump(tenant_id)
+    deferred_deletes.add(image_urls)
+    catalog_search.remove_item(tenant_id, item_id)
     return {"detail": "Producto eliminado"}
 
 @router.patch("/config")
@@ -360,14 +429,17 @@ async def update_business_config(
     if not biz:
         raise HTTPException(status_code=404, detail="Negocio no encontrado")
 
+    previous_logo = biz.logo_url
     if file:
-        content = await file.read()
-        path = f"logos/{biz.id}/{uuid.uuid4()}.{file.filename.split('.')[-1]}"
-        supabase.storage.from_("images").upload(path=path, file=content, file_options={"content-type": file.content_type, "x-upsert": "true"})
-        biz.logo_url = supabase.storage.from_("images").get_public_url(path)
+        stored = await store_images_or_error([file], f"logos/{biz.id}", LOGO_IMAGE_WIDTHS)
+        biz.logo_url = stored[0].url
 
     biz.primary_color, biz.secundary_color = primary_color, secundary_color
     db.commit()
+    if previous_logo != biz.logo_url:
+        deferred_deletes.add([previous_logo])
+    tenant_cache.invalidate(tenant_id=biz.id)
+    catalog_cache.bump(biz.id)
     return {"status": "success", "logo_url": biz.logo_url, "primary_color": biz.primary_color}
 
 @router.post("/hours")
@@ -392,6 +464,9 @@ def update_business_hours(
         db.add(new_hour)
 
     db.commit()
+    tenant_cache.invalidate(tenant_id=tenant_id)
+    catalog_cache.bump(tenant_id)
+    slot_cache.invalidate(tenant_id)
     return {"status": "success"}
 
 # 2. Endpoint para Nombre, Slug y Teléfono
@@ -413,6 +488,9 @@ def update_profile(
         tenant.appointment_interval = payload.appointment_interval
 
     db.commit()
+    tenant_cache.invalidate(tenant_id=tenant_id)
+    catalog_cache.bump(tenant_id)
+    slot_cache.invalidate(tenant_id)
     return {"status": "success"}
 
 @router.patch("/update-delivery")    
@@ -428,4 +506,6 @@ def update_delivery_config(
     tenant.delivery_price = payload.delivery_price
 
     db.commit()
+    tenant_cache.invalidate(tenant_id=tenant_id)
+    catalog_cache.bump(tenant_id)
     return {"status": "success"}
\ No newline at end of file
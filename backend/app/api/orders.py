@@ -1,14 +1,27 @@
 import uuid
 from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
-from sqlalchemy.orm import Session, joinedload
+from typing import List, NamedTuple, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from pydantic import BaseModel, ConfigDict
 
-from app.database.session import get_db
+from app.database.session import get_async_db
 from app.models import base
-from app.api.auth import get_current_user 
+from app.api.auth import get_current_user_async
 from app.core.websocket_manager import manager
+from app.services.tenant_cache import tenant_cache, TenantSnapshot
+from app.services.catalog_cache import catalog_cache
+from app.services.slot_service import slot_cache, slot_taken
+from app.services.order_service import load_cart_catalog, split_extras
+from app.services.stock_service import StockReservation, StockUnavailable
+from app.services import event_log, wallet_service
+from app.services.pagination import (
+    MAX_PAGE_SIZE, decode_cursor, encode_cursor, keyset_filter, order_by_keys,
+)
 router = APIRouter()
 
 # --- ESQUEMAS (Pydantic) ---
@@ -37,26 +50,47 @@ OrderCreateSchema.model_rebuild()
 
 
 
-@router.post("/public/place-order/{slug}")
-async def place_order(slug: str, order_data: OrderCreateSchema, db: Session = Depends(get_db)):
+class PlacedOrder(NamedTuple):
+    tenant: TenantSnapshot
+    order_id: str
+    total_items_price: float
+    applied_delivery_cost: float
+    final_total_amount: float
+    new_balance: float
+    deactivate_tenant: bool
+    resumen_items: List[str]
+    event: dict
+    sold_out: bool  # algún producto/variante/extra quedó sin stock
+
+
+def _order_snapshot(order: base.Order, items: List[base.OrderItem]) -> dict:
+    """La orden con la misma forma que /my-orders: el panel la suma a su lista sin volver a pedirla."""
+    columns = lambda row: {column.key: getattr(row, column.key) for column in row.__table__.columns}
+    return jsonable_encoder({**columns(order), "order_items": [columns(item) for item in items]})
+
+
+def _create_order(db: Session, slug: str, order_data: OrderCreateSchema) -> PlacedOrder:
+    """Pasos 1 a 8 del pedido (todo lo que toca la base), en una sola transacción."""
     # 1. Validar existencia del negocio (Tenant)
-    tenant = db.query(base.Tenant).filter(base.Tenant.slug == slug).first()
+    tenant = tenant_cache.get_by_slug(db, slug)
     if not tenant: 
         raise HTTPException(status_code=404, detail="Negocio no encontrado")
 
-    # 2. Verificar Wallet y Saldo
-    wallet = db.query(base.Wallet).filter(base.Wallet.tenant_id == tenant.id).first()
-    if not wallet or wallet.balance <= 0:
-        raise HTTPException(status_code=403, detail="El negocio no tiene créditos disponibles para recibir pedidos.")
+    # 2. El saldo se descuenta de forma atómica al final (paso 7), justo antes del commit
 
     total_items_price = 0
     resumen_items = []
     order_id = str(uuid.uuid4())
     db_items = [] 
 
-    # 3. Procesar cada ítem del pedido
-    for item_input in order_data.items:
-        product = db.query(base.Item).filter(base.Item.id == item_input.product_id).first()
+    # 3. Cargar de golpe productos, variantes y extras del carrito (solo de este negocio)
+    catalog = load_cart_catalog(db, tenant.id, order_data.items)
+    # Los descuentos de stock se acumulan aquí y se aplican juntos al final (paso 6)
+    reservation = StockReservation()
+
+    # Procesar cada ítem del pedido en memoria
+    for line_number, item_input in enumerate(order_data.items):
+        product = catalog.item(item_input.product_id)
         if not product:
             raise HTTPException(status_code=400, detail=f"Producto {item_input.product_id} no existe")
 
@@ -65,45 +99,30 @@ async def place_order(slug: str, order_data: OrderCreateSchema, db: Session = De
         
         # --- LÓGICA DE VARIANTES ---
         if item_input.variant_name:
-            variant = db.query(base.ItemVariant).filter(
-                base.ItemVariant.item_id == product.id,
-                base.ItemVariant.name == item_input.variant_name
-            ).first()
+            variant = catalog.variant(product.id, item_input.variant_name)
             
             if not variant:
                 raise HTTPException(status_code=400, detail=f"Variante '{item_input.variant_name}' no disponible")
             
             if not product.is_service:
-                if variant.stock < item_input.quantity:
-                    raise HTTPException(status_code=400, detail=f"Stock insuficiente: {product.name} ({variant.name})")
-                variant.stock -= item_input.quantity
-                if product.stock < item_input.quantity:
-                    raise HTTPException(status_code=400, detail=f"Stock insuficiente: {product.name}")
-                product.stock -= item_input.quantity
+                reservation.add(base.ItemVariant, variant.id, item_input.quantity, line_number, f"{product.name} ({variant.name})")
+                reservation.add(base.Item, product.id, item_input.quantity, line_number, product.name)
 
             current_unit_price = variant.price
             variant_name = variant.name
         
         else:
             if not product.is_service:
-                if product.stock < item_input.quantity:
-                    raise HTTPException(status_code=400, detail=f"Stock insuficiente: {product.name}")
-                product.stock -= item_input.quantity
+                reservation.add(base.Item, product.id, item_input.quantity, line_number, product.name)
 
         # --- LÓGICA DE EXTRAS ---
         extras_price_sum = 0
         if item_input.extras_names:
-            names_list = [n.strip() for n in item_input.extras_names.split(",")]
-            extras_db = db.query(base.ItemExtra).filter(
-                base.ItemExtra.item_id == product.id,
-                base.ItemExtra.name.in_(names_list)
-            ).all()
+            extras_db = catalog.extras_for(product.id, split_extras(item_input.extras_names))
             
             for extra in extras_db:
                 if not product.is_service:
-                    if extra.stock < item_input.quantity:
-                        raise HTTPException(status_code=400, detail=f"Stock insuficiente extra: {extra.name}")
-                    extra.stock -= item_input.quantity
+                    reservation.add(base.ItemExtra, extra.id, item_input.quantity, line_number, f"extra {extra.name}")
                 extras_price_sum += extra.price
 
         # 4. Cálculo de totales por línea
@@ -140,7 +159,11 @@ async def place_order(slug: str, order_data: OrderCreateSchema, db: Session = De
 
     final_total_amount = total_items_price + applied_delivery_cost
 
-    # 6. Crear la Orden Principal
+    # 6. Descontar stock con UPDATEs condicionales (sin bloqueos); si falta algo, rollback
+    #    total y StockUnavailable sube hasta place_order
+    reservation.apply(db)
+
+    # Crear la Orden Principal
     new_order = base.Order(
         id=order_id,
         tenant_id=tenant.id,
@@ -154,55 +177,94 @@ async def place_order(slug: str, order_data: OrderCreateSchema, db: Session = De
         status="pending"
     )
     
-    # 7. Gestión de Wallet
-    previous_bal = wallet.balance
-    wallet.balance -= 1
-    
-    history = base.WalletTransaction(
-        tenant_id=tenant.id,
-        amount=-1,
-        previous_balance=int(previous_bal),
-        new_balance=int(wallet.balance),
+    # 7. Gestión de Wallet: UPDATE ... RETURNING + movimiento en la misma transacción
+    new_balance = wallet_service.debit(
+        db, tenant.id, 1,
         reason=f"Pedido: {order_id[:6]} | Cliente: {order_data.customer_name}"
     )
+    if new_balance is None:
+        db.rollback()
+        raise HTTPException(status_code=403, detail="El negocio no tiene créditos disponibles para recibir pedidos.")
     
-    if wallet.balance <= 0:
-        tenant.is_active = False
+    deactivate_tenant = new_balance <= 0
+    if deactivate_tenant:
+        db.query(base.Tenant).filter(base.Tenant.id == tenant.id).update({"is_active": False})
 
-    # 8. Guardar en Base de Datos
+    # 8. Guardar en Base de Datos (con el evento NEW_ORDER numerado, ver app/services/event_log.py)
     try:
         db.add(new_order)
-        db.add(history)
         db.add_all(db_items)
+        # Flush antes de armar el evento: la orden completa (ids y defaults) viaja en él
+        db.flush()
+        event = event_log.record(db, tenant.id, {
+            "event": "NEW_ORDER",
+            "order_id": order_id[:8].upper(),
+            "customer": order_data.customer_name,
+            "total": final_total_amount,
+            "delivery_type": order_data.delivery_type,
+            "items_count": len(order_data.items),
+            "wallet_balance": int(new_balance),
+            "appointment": order_data.appointment_datetime.isoformat() if order_data.appointment_datetime else None,
+            "order": _order_snapshot(new_order, db_items),
+        })
+        # El UPDATE de event_seq bloquea la fila del negocio hasta el commit: desde aquí las
+        # reservas del negocio van de a una y esta consulta ve las ya confirmadas, aunque la
+        # caché de slots de este proceso todavía no se haya enterado
+        if order_data.appointment_datetime and slot_taken(db, tenant, order_data.appointment_datetime, order_id):
+            db.rollback()
+            slot_cache.invalidate(tenant.id, order_data.appointment_datetime.date())
+            raise HTTPException(status_code=409, detail="Ese horario acaba de ser reservado. Elige otro.")
         db.commit()
         db.refresh(new_order)
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         print(f"Error Database: {e}")
         raise HTTPException(status_code=500, detail="Error al procesar el pedido")
 
+    return PlacedOrder(
+        tenant, order_id, total_items_price, applied_delivery_cost, final_total_amount,
+        new_balance, deactivate_tenant, resumen_items, event, bool(reservation.sold_out)
+    )
+
+
+@router.post("/public/place-order/{slug}")
+async def place_order(slug: str, order_data: OrderCreateSchema, db: AsyncSession = Depends(get_async_db)):
+    # Las consultas corren sobre el driver async: el event loop queda libre mientras tanto
+    try:
+        placed = await db.run_sync(_create_order, slug, order_data)
+    except StockUnavailable as e:
+        return JSONResponse(status_code=400, content={
+            "detail": str(e),
+            "failed_lines": [
+                {"line": f.line, "product_id": order_data.items[f.line].product_id, "label": f.label}
+                for f in e.failures
+            ]
+        })
+    tenant, order_id = placed.tenant, placed.order_id
+    final_total_amount, resumen_items = placed.final_total_amount, placed.resumen_items
+
+    # El catálogo cacheado solo se regenera si algo se agotó: los números de stock pueden ir
+    # atrasados hasta CATALOG_CACHE_TTL_SECONDS (el pedido igual se valida con UPDATEs
+    # condicionales), pero nunca se ofrece como disponible algo agotado por un pedido
+    if placed.sold_out:
+        catalog_cache.bump(tenant.id)
+    if placed.deactivate_tenant:
+        tenant_cache.invalidate(tenant_id=tenant.id)
+    if order_data.appointment_datetime:
+        slot_cache.invalidate(tenant.id, order_data.appointment_datetime.date())
+
     # 9. Notificación WebSocket
     try:
-        await manager.broadcast_to_tenant(
-            tenant_id=tenant.id,
-            message={
-                "event": "NEW_ORDER",
-                "order_id": order_id[:8].upper(),
-                "customer": order_data.customer_name,
-                "total": final_total_amount,
-                "delivery_type": order_data.delivery_type,
-                "items_count": len(order_data.items),
-                "wallet_balance": int(wallet.balance),
-                "appointment": order_data.appointment_datetime.isoformat() if order_data.appointment_datetime else None
-            }
-        )
+        await manager.broadcast_to_tenant(tenant_id=tenant.id, message=placed.event)
     except Exception: pass
 
     # 10. Preparar Resumen Final para WhatsApp
     entrega_str = "A domicilio" if order_data.delivery_type == "delivery" else "Recoger en local"
-    if applied_delivery_cost > 0:
-        resumen_items.append(f"\nSubtotal: ${total_items_price}")
-        resumen_items.append(f"Envío: ${applied_delivery_cost}")
+    if placed.applied_delivery_cost > 0:
+        resumen_items.append(f"\nSubtotal: ${placed.total_items_price}")
+        resumen_items.append(f"Envío: ${placed.applied_delivery_cost}")
     
     resumen_items.append(f"\nTOTAL: ${final_total_amount}")
     resumen_items.append(f"Tipo de entrega: {entrega_str}")
@@ -216,53 +278,109 @@ async def place_order(slug: str, order_data: OrderCreateSchema, db: Session = De
         "appointment_datetime": order_data.appointment_datetime.isoformat() if order_data.appointment_datetime else None
     }
 
-@router.get("/my-orders")
-async def get_my_orders(
-    status: Optional[str] = Query(None),
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
-):
-    # Usamos joinedload para traer los productos asociados a cada orden de golpe
+# Prioridad de estados: pendientes primero, luego completadas y al final canceladas.
+# Cada estado es una "cubeta" que se pagina por (created_at, id) sobre el índice
+# (tenant_id, status, created_at, id); ordenar por un CASE obligaría a ordenar todo el historial.
+STATUS_BUCKETS = ["pending", "completed", "cancelled", None]  # None: cualquier otro estado
+ORDER_PAGE_KEYS = [(base.Order.created_at, "desc"), (base.Order.id, "desc")]
+
+def _bucket_filter(bucket: Optional[str]):
+    if bucket is None:
+        known = [b for b in STATUS_BUCKETS if b is not None]
+        return or_(base.Order.status.is_(None), base.Order.status.notin_(known))
+    return base.Order.status == bucket
+
+def _orders_page(db: Session, tenant_id: str, status: Optional[str], cursor: Optional[str], limit: int,
+                 date_from: Optional[datetime], date_to: Optional[datetime],
+                 appointment_from: Optional[datetime] = None, appointment_to: Optional[datetime] = None):
+    # El cursor es (cubeta, created_at, id) de la última orden enviada; los productos de
+    # cada orden llegan con un solo IN por consulta (selectinload)
     query = db.query(base.Order)\
-        .options(joinedload(base.Order.order_items))\
-        .filter(base.Order.tenant_id == current_user.tenant_id)
-    
-    if status and status != "all":
-        query = query.filter(base.Order.status == status)
+        .options(selectinload(base.Order.order_items))\
+        .filter(base.Order.tenant_id == tenant_id)
+    if date_from:
+        query = query.filter(base.Order.created_at >= date_from)
+    if date_to:
+        query = query.filter(base.Order.created_at < date_to)
+    if appointment_from:
+        query = query.filter(base.Order.appointment_datetime >= appointment_from)
+    if appointment_to:
+        query = query.filter(base.Order.appointment_datetime < appointment_to)
 
-    orders = query.all()
+    buckets = [status] if status and status != "all" else STATUS_BUCKETS
+    start, after = 0, None
+    if cursor:
+        start, *after = decode_cursor(cursor, 3)
+        if not isinstance(start, int) or not 0 <= start < len(buckets):
+            raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
 
-    # Prioridad de estados
-    status_priority = {'pending': 0, 'completed': 1, 'cancelled': 2}
+    page = []  # (cubeta, orden)
+    for index in range(start, len(buckets)):
+        bucket_query = query.filter(_bucket_filter(buckets[index]))
+        if after is not None and index == start:
+            bucket_query = bucket_query.filter(keyset_filter(ORDER_PAGE_KEYS, after))
+        # Una fila extra para saber si hay página siguiente
+        rows = bucket_query.order_by(*order_by_keys(ORDER_PAGE_KEYS)).limit(limit - len(page) + 1).all()
+        page.extend((index, row) for row in rows)
+        if len(page) > limit:
+            last_index, last = page[limit - 1]
+            return [row for _, row in page[:limit]], encode_cursor(last_index, last.created_at, last.id)
+    return [row for _, row in page], None
 
-    sorted_orders = sorted(
-        orders, 
-        key=lambda x: (
-            status_priority.get(x.status, 99),
-            -(x.created_at.timestamp() if x.created_at else 0)
-        )
+@router.get("/my-orders")
+async def get_my_orders(
+    response: Response,
+    status: Optional[str] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    appointment_from: Optional[datetime] = None,
+    appointment_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(get_current_user_async)
+):
+    orders, next_cursor = await db.run_sync(
+        _orders_page, current_user.tenant_id, status, cursor, limit, date_from, date_to,
+        appointment_from, appointment_to
     )
-    
-    return sorted_orders
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orders
 
 @router.patch("/{order_id}/status")
 async def update_order_status(
     order_id: str, 
     status: str = Body(..., embed=True),
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(get_current_user_async)
 ):
     """
     Permite al barbero completar o cancelar una cita
     """
-    order = db.query(base.Order).filter(
+    order = (await db.execute(select(base.Order).where(
         base.Order.id == order_id, 
         base.Order.tenant_id == current_user.tenant_id
-    ).first()
+    ))).scalar_one_or_none()
     
     if not order:
         raise HTTPException(status_code=404, detail="Cita no encontrada")
     
     order.status = status
-    db.commit()
+    event = await db.run_sync(event_log.record, order.tenant_id, {
+        "event": "ORDER_STATUS",
+        "id": order.id,
+        "order_id": order.id[:8].upper(),
+        "status": status,
+        # Los demás workers invalidan su caché de slots con esto (ver slot_service)
+        "appointment": order.appointment_datetime.isoformat() if order.appointment_datetime else None,
+    })
+    await db.commit()
+    if order.appointment_datetime:
+        # Cancelar libera el slot (y reactivar lo vuelve a ocupar)
+        slot_cache.invalidate(order.tenant_id, order.appointment_datetime.date())
+    try:
+        await manager.broadcast_to_tenant(tenant_id=order.tenant_id, message=event)
+    except Exception: pass
     return {"message": f"Estado de la cita actualizado a {status}"}
\ No newline at end of file
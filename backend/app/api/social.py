@@ -1,12 +1,19 @@
 import uuid
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Request, Form, File, UploadFile
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Form, File, UploadFile, Query
 from sqlalchemy.orm import Session
 
 from app.database.session import get_db
 from app.models import base
-from app.api.business import get_current_tenant_id 
-from app.services.supabase import supabase 
+from app.api.business import get_current_tenant_id, store_images_or_error
+from app.services.storage_gc import deferred_deletes
+from app.core.config import POST_IMAGE_WIDTHS
+from app.services.tenant_cache import tenant_cache
+from app.services import wallet_service
+from app.services.feed_service import get_feed_page
+from app.services import like_service, stats_service
+from app.services.pagination import MAX_PAGE_SIZE
 
 router = APIRouter(tags=["Social"])
 
@@ -18,41 +25,36 @@ async def create_post(
     tenant_id: str = Depends(get_current_tenant_id)
 ):
     # 1. Verificar si el negocio tiene saldo en su Wallet para publicar
-    wallet = db.query(base.Wallet).filter(base.Wallet.tenant_id == tenant_id).first()
-    if not wallet or wallet.balance <= 0:
+    # (lectura rápida para no subir imágenes en vano; el cargo real es atómico en el paso 3)
+    balance = db.query(base.Wallet.balance).filter(base.Wallet.tenant_id == tenant_id).scalar()
+    if balance is None or balance <= 0:
         raise HTTPException(status_code=403, detail="Saldo insuficiente en tu billetera para publicar.")
 
-    image_url = None
-    if image:
-        try:
-            ext = image.filename.split(".")[-1]
-            file_path = f"posts/{tenant_id}/{uuid.uuid4()}.{ext}"
-            content_bytes = await image.read()
-            
-            supabase.storage.from_("images").upload(
-                path=file_path, 
-                file=content_bytes,
-                file_options={"content-type": image.content_type}
-            )
-            
-            res = supabase.storage.from_("images").get_public_url(file_path)
-            image_url = res if isinstance(res, str) else res.public_url
-        except Exception as e:
-            print(f"Error Supabase: {e}")
+    # image_url es obligatorio: sin imagen (o si no se pudo procesar/subir) el post no se crea
+    # y no se cobra. Mismos códigos que los productos: 413/415, imagen inválida 400, storage 502
+    if not image or not image.filename:
+        raise HTTPException(status_code=400, detail="La publicación necesita una imagen")
+    stored = (await store_images_or_error([image], f"posts/{tenant_id}", POST_IMAGE_WIDTHS))[0]
+    image_url, image_variants = stored.url, stored.variants
 
     # 2. Crear el Post
     new_post = base.Post(
         id=str(uuid.uuid4()),
         content=content,
         image_url=image_url,
+        image_variants=image_variants,
         tenant_id=tenant_id,
         created_at=datetime.utcnow()
     )
     
     # 3. Descontar 1 punto del Wallet por la publicación
-    wallet.balance -= 1
+    new_balance = wallet_service.debit(db, tenant_id, 1, reason=f"Publicación: {new_post.id[:6]}")
+    if new_balance is None:
+        db.rollback()
+        raise HTTPException(status_code=403, detail="Saldo insuficiente en tu billetera para publicar.")
     
     db.add(new_post)
+    stats_service.record(db, "active_posts", 1)
     db.commit()
     db.refresh(new_post)
     return new_post
@@ -62,65 +64,41 @@ def get_my_posts(db: Session = Depends(get_db), tenant_id: str = Depends(get_cur
     return db.query(base.Post).filter(base.Post.tenant_id == tenant_id).order_by(base.Post.created_at.desc()).all()
 
 @router.get("/feed/{slug}")
-def get_business_feed(slug: str, request: Request, db: Session = Depends(get_db)):
+def get_business_feed(
+    slug: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
     client_ip = request.client.host # Obtenemos la IP de quien consulta
     
-    tenant = db.query(base.Tenant).filter(base.Tenant.slug == slug).first()
+    tenant = tenant_cache.get_by_slug(db, slug)
     if not tenant:
         raise HTTPException(status_code=404, detail="Negocio no encontrado")
     
-    posts = db.query(base.Post).filter(base.Post.tenant_id == tenant.id).order_by(base.Post.created_at.desc()).all()
+    # Una sola consulta por página: likes_count es la columna desnormalizada más lo que el
+    # buffer de likes aún no volcó, e is_liked sale de un LEFT JOIN (ver feed_service)
+    posts, next_cursor = get_feed_page(db, tenant.id, client_ip, cursor, limit)
     
-    result = []
-    for p in posts:
-        # Contamos los likes totales
-        likes_count = db.query(base.Like).filter(base.Like.post_id == p.id).count()
-        
-        # VERIFICACIÓN CLAVE: ¿Esta IP ya le dio like a este post?
-        user_has_liked = db.query(base.Like).filter_by(
-            post_id=p.id, 
-            client_identifier=client_ip
-        ).first() is not None
-        
-        result.append({
-            "id": p.id,
-            "content": p.content,
-            "image_url": p.image_url,
-            "created_at": p.created_at,
-            "likes_count": likes_count,
-            "is_liked": user_has_liked  # Nuevo campo booleano
-        })
-    
-    return result
+    # El cuerpo sigue siendo una lista; la siguiente página viaja en el encabezado
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return posts
 
 @router.post("/posts/{post_id}/like")
 def toggle_like(post_id: str, request: Request, db: Session = Depends(get_db)):
     client_ip = request.client.host
     
     # 1. Verificar que el post existe
-    post = db.query(base.Post).filter(base.Post.id == post_id).first()
+    post = db.query(base.Post.id).filter(base.Post.id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post no encontrado")
 
-    # 2. Buscar si ya existe el like de esta IP
-    existing = db.query(base.Like).filter_by(post_id=post_id, client_identifier=client_ip).first()
-    
-    if existing:
-        db.delete(existing)
-        db.commit()
-        return {"action": "unliked"}
-    
-    # Dar Like
-    new_like = base.Like(
-        id=str(uuid.uuid4()), 
-        post_id=post_id, 
-        client_identifier=client_ip
-    )
-    # post.likes_count += 1
-    
-    db.add(new_like)
-    db.commit()
-    return {"action": "liked"}
+    # 2. DELETE o INSERT ... ON CONFLICT DO NOTHING; likes_count se actualiza en lote
+    action = like_service.toggle_like(db, post_id, client_ip)
+    return {"action": action}
 
 @router.delete("/posts/{post_id}")
 def delete_post(post_id: str, db: Session = Depends(get_db), tenant_id: str = Depends(get_current_tenant_id)):
@@ -128,6 +106,9 @@ def delete_post(post_id: str, db: Session = Depends(get_db), tenant_id: str = De
     if not post:
         raise HTTPException(status_code=404, detail="Post no encontrado o no tienes permiso para eliminarlo.")
     
+    image_url = post.image_url
     db.delete(post)
+    stats_service.record(db, "active_posts", -1)
     db.commit()
+    deferred_deletes.add([image_url])
     return {"detail": "Post eliminado correctamente."}  
\ No newline at end of file
@@ -1,9 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database.session import get_db
+from app.database.session import get_db, SessionLocal
+from app.database.engine import pool_metrics
 from app.api.auth import get_super_user # La dependencia que creamos
 from app.services.admin_service import AdminService
+from app.services.tenant_cache import tenant_cache
+from app.services.catalog_cache import catalog_cache
+from app.services.slot_service import slot_cache
+from app.services.storage_gc import storage_gc, deferred_deletes
+from app.services import wallet_service, stats_service
+from app.services.pagination import paginate, MAX_PAGE_SIZE
 from app.core import security
+from app.core.websocket_manager import manager
 from app.models import base
 
 router = APIRouter()
@@ -13,8 +28,20 @@ def get_stats(db: Session = Depends(get_db), admin = Depends(get_super_user)):
     return AdminService.get_global_stats(db)
 
 @router.get("/tenants")
-def get_tenants(db: Session = Depends(get_db), admin = Depends(get_super_user)):
-    return AdminService.get_all_tenants(db)
+def get_tenants(
+    response: Response,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    sort_by: str = Query("created_at", pattern="^(" + "|".join(AdminService.TENANT_SORT_FIELDS) + ")$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    q: Optional[str] = None,
+    db: Session = Depends(get_db),
+    admin = Depends(get_super_user)
+):
+    tenants, total = AdminService.get_all_tenants(db, page, page_size, sort_by, order, q)
+    # La lista sigue siendo el cuerpo; el total viaja en encabezado para armar la paginación
+    response.headers["X-Total-Count"] = str(total)
+    return tenants
 
 @router.post("/tenants/{tenant_id}/toggle-status")
 def toggle_tenant(tenant_id: str, db: Session = Depends(get_db), admin = Depends(get_super_user)):
@@ -25,8 +52,44 @@ def toggle_tenant(tenant_id: str, db: Session = Depends(get_db), admin = Depends
     
     tenant.is_active = not getattr(tenant, 'is_active', True)
     db.commit()
+    tenant_cache.invalidate(tenant_id=tenant.id)
+    catalog_cache.bump(tenant.id)
     return {"status": "updated"}
 
+@router.get("/cache-stats")
+def get_cache_stats(admin = Depends(get_super_user)):
+    # Contadores de aciertos/fallos para confirmar que la caché está funcionando
+    return {"tenants": tenant_cache.stats(), "catalog": catalog_cache.stats(), "slots": slot_cache.stats(),
+            "websockets": manager.stats()}
+
+@router.get("/db-pool")
+def get_db_pool_metrics(admin = Depends(get_super_user)):
+    # Métricas de los pools de ESTE proceso (sirven para ajustar DB_POOL_SIZE / DB_MAX_OVERFLOW)
+    return {"pid": os.getpid(), "pools": pool_metrics()}
+
+@router.get("/websockets")
+def get_websocket_counts(admin = Depends(get_super_user)):
+    # Conexiones de ESTE proceso (cada worker responde por las suyas)
+    counts = manager.tenant_counts()
+    return {
+        "pid": os.getpid(),
+        "connections": manager.connection_count,
+        "tenants": dict(sorted(counts.items(), key=lambda kv: kv[1], reverse=True)),
+    }
+
+@router.post("/storage/gc")
+def run_storage_gc(
+    dry_run: bool = True,
+    tenant_id: Optional[str] = None,
+    admin = Depends(get_super_user)
+):
+    # Por defecto solo reporta qué se borraría; dry_run=false borra de verdad
+    return storage_gc.run(SessionLocal, dry_run=dry_run, tenant_ids=[tenant_id] if tenant_id else None)
+
+@router.get("/storage/gc")
+def get_storage_gc_report(admin = Depends(get_super_user)):
+    return {"last_report": storage_gc.last_report, "pending_deletes": deferred_deletes.pending()}
+
 @router.get("/users")
 def get_admin_users(db: Session = Depends(get_db), admin = Depends(get_super_user)):
     return db.query(base.User).all()
@@ -44,6 +107,7 @@ def create_admin_user(user_data: dict, db: Session = Depends(get_db), admin = De
         is_superuser=user_data.get('is_superuser', False)
     )
     db.add(new_user)
+    stats_service.record(db, "active_users", 1)
     db.commit()
     db.refresh(new_user)
     return new_user
@@ -75,6 +139,7 @@ def delete_admin_user(user_id: str, db: Session = Depends(get_db), admin = Depen
         raise HTTPException(status_code=400, detail="No puedes eliminar tu propia cuenta")
 
     db.delete(user)
+    stats_service.record(db, "active_users", -1)
     db.commit()
     return {"status": "deleted"}    
 
@@ -88,54 +153,103 @@ def update_tenant_credits(
     amount = data.get("amount", 0)
     reason = data.get("reason", "Ajuste manual por administrador")
     
-    wallet = db.query(base.Wallet).filter(base.Wallet.tenant_id == tenant_id).first()
     tenant = db.query(base.Tenant).filter(base.Tenant.id == tenant_id).first()
     
-    if not wallet or not tenant:
+    # Abono/cargo atómico + registro del historial en la misma transacción
+    new_balance = wallet_service.credit(db, tenant_id, amount, reason) if tenant else None
+    if new_balance is None:
+        db.rollback()
         raise HTTPException(status_code=404, detail="No se encontró el negocio o wallet")
-
-    # Guardamos saldos para el historial
-    prev_bal = int(wallet.balance)
-    wallet.balance += amount
-    new_bal = int(wallet.balance)
-    
-    # Crear el registro del historial
-    transaction_log = base.WalletTransaction(
-        tenant_id=tenant_id,
-        amount=amount,
-        previous_balance=prev_bal,
-        new_balance=new_bal,
-        reason=reason
-    )
+    new_bal = int(new_balance)
 
     # Auto-reactivación
-    if wallet.balance > 0 and not tenant.is_active:
+    if new_balance > 0 and not tenant.is_active:
         tenant.is_active = True
         
-    db.add(transaction_log)
     db.commit()
+    tenant_cache.invalidate(tenant_id=tenant_id)
     return {"status": "ok", "new_balance": new_bal}    
 
+# Orden del historial: más recientes primero, id como desempate
+TRANSACTION_KEYS = [(base.WalletTransaction.created_at, "desc"), (base.WalletTransaction.id, "desc")]
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_FIELDS = ["id", "amount", "created_at", "tenant_name", "reason"]
+
+def _transaction_row(t) -> dict:
+    return {
+        "id": t.id,
+        "amount": t.amount,
+        "created_at": t.created_at,
+        "tenant_name": t.tenant_name,
+        "reason": t.reason
+    }
+
 @router.get("/transactions")
 def get_tenants_transactions(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    tenant_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sign: Optional[str] = Query(None, pattern="^(credit|debit)$"),
     db: Session = Depends(get_db), 
     admin = Depends(get_super_user)
 ):
-    transactions = (
-        db.query(base.WalletTransaction)
-        .join(base.Tenant)
-        .order_by(base.WalletTransaction.created_at.desc())
-        .all()
+    query = AdminService.transactions_query(db, tenant_id, date_from, date_to, sign)
+    transactions, next_cursor = paginate(
+        query, TRANSACTION_KEYS, cursor, limit, lambda t: (t.created_at, t.id)
     )
-    results = []
-    for t in transactions:
-        results.append({
-            "id": t.id,
-            "amount": t.amount,
-            "created_at": t.created_at,
-            "tenant_name": t.tenant.name,
-            "reason": t.reason
-        })
-        
-    return results  
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_transaction_row(t) for t in transactions]
+
+@router.get("/transactions/export")
+def export_tenants_transactions(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    tenant_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sign: Optional[str] = Query(None, pattern="^(credit|debit)$"),
+    admin = Depends(get_super_user)
+):
+    """
+    Exporta todo el historial filtrado sin cargarlo en memoria: cursor del lado del
+    servidor (yield_per) y una fila a la vez hacia el cliente.
+    """
+    def stream_rows():
+        # Sesión propia: la de la petición se cierra antes de terminar de enviar el cuerpo
+        db = SessionLocal()
+        try:
+            query = AdminService.transactions_query(db, tenant_id, date_from, date_to, sign)\
+                .order_by(base.WalletTransaction.created_at.desc(), base.WalletTransaction.id.desc())\
+                .yield_per(EXPORT_BATCH_SIZE)
+
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+                writer.writeheader()
+                for t in query:
+                    writer.writerow(_transaction_row(t))
+                    # Enviamos en bloques para no hacer una escritura de red por fila
+                    if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate(0)
+                yield buffer.getvalue()
+            else:
+                for t in query:
+                    yield json.dumps(_transaction_row(t), default=str) + "\n"
+        finally:
+            db.close()
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"transacciones.{export_format}"
+    return StreamingResponse(
+        stream_rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )  
    
\ No newline at end of file
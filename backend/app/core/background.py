@@ -0,0 +1,50 @@
+import asyncio
+from typing import Callable, Dict, List, NamedTuple
+
+# --- TAREAS PERIÓDICAS EN SEGUNDO PLANO ---
+# Trabajos que corren cada N segundos dentro del proceso (vaciar buffers, reconciliar, etc.).
+# Las funciones son síncronas (usan SQLAlchemy normal), así que se ejecutan en un hilo
+# para no bloquear el event loop. Se arrancan/detienen desde los eventos de main.py.
+
+
+class PeriodicTask(NamedTuple):
+    name: str
+    interval: float
+    func: Callable[[], object]
+    run_on_shutdown: bool
+
+
+_registry: List[PeriodicTask] = []
+_running: Dict[str, asyncio.Task] = {}
+
+
+def register_periodic(name: str, interval: float, func: Callable[[], object], run_on_shutdown: bool = False):
+    """`run_on_shutdown=True` ejecuta la función una última vez al apagar (ej: vaciar buffers)."""
+    _registry.append(PeriodicTask(name, interval, func, run_on_shutdown))
+
+
+async def _loop(task: PeriodicTask):
+    while True:
+        await asyncio.sleep(task.interval)
+        try:
+            await asyncio.to_thread(task.func)
+        except Exception as e:
+            print(f"⚠️ Error en tarea periódica '{task.name}': {e}")
+
+
+async def start_background_tasks():
+    for task in _registry:
+        if task.name not in _running:
+            _running[task.name] = asyncio.create_task(_loop(task))
+
+
+async def stop_background_tasks():
+    for name, running in list(_running.items()):
+        running.cancel()
+        del _running[name]
+    for task in _registry:
+        if task.run_on_shutdown:
+            try:
+                await asyncio.to_thread(task.func)
+            except Exception as e:
+                print(f"⚠️ Error cerrando tarea '{task.name}': {e}")
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import BACKPLANE_BACKEND, BACKPLANE_CHANNEL, BACKPLANE_DATABASE_URL
+
+# --- BACKPLANE DE NOTIFICACIONES ---
+# Con varios workers (o instancias) cada proceso tiene sus propios sockets en memoria. Un
+# broadcast no se entrega directo: se publica en un canal y TODOS los procesos (incluido el
+# que publica) lo reciben y lo reparten a sus conexiones locales.
+#   - "memory": un solo proceso; publicar es entregar (desarrollo y pruebas).
+#   - "postgres": LISTEN/NOTIFY sobre la misma base, sin infraestructura extra.
+
+# Recibe (tenant_id, mensaje ya serializado) y lo reparte a los sockets locales
+Handler = Callable[[str, str], None]
+
+
+class InMemoryBackplane:
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+        self.published = 0
+
+    async def start(self, handler: Handler):
+        self._handler = handler
+
+    async def stop(self):
+        self._handler = None
+
+    async def publish(self, tenant_id: str, payload: str):
+        self.published += 1
+        if self._handler is not None:
+            self._handler(tenant_id, payload)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "published": self.published}
+
+
+class PostgresBackplane:
+    """
+    Una conexión dedicada (asyncpg) queda en LISTEN y se reconecta sola si se cae. Para
+    publicar se usa el motor async de la app: NOTIFY funciona también a través del pooler
+    de Supabase en modo transacción, LISTEN no (por eso BACKPLANE_DATABASE_URL debe ser
+    una conexión directa o en modo sesión).
+    """
+
+    # NOTIFY admite hasta 8000 bytes; los mensajes más grandes viajan en partes
+    CHUNK_SIZE = 7000
+    # Partes de un mensaje que no se completaron en este tiempo se descartan
+    PARTIAL_TTL_SECONDS = 30
+    KEEPALIVE_SECONDS = 30
+
+    def __init__(self, dsn: str, channel: str = BACKPLANE_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._handler: Optional[Handler] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listening = False
+        # id de mensaje -> (momento de la primera parte, total, partes recibidas)
+        self._partials: Dict[str, Tuple[float, int, Dict[int, str]]] = {}
+        self.published = 0
+        self.received = 0
+        self.publish_errors = 0
+        self.reconnects = 0
+
+    async def start(self, handler: Handler):
+        self._handler = handler
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- Escucha ---
+
+    async def _listen_loop(self):
+        import asyncpg
+
+        backoff = 1
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                await conn.add_listener(self.channel, self._on_notify)
+                self._listening = True
+                backoff = 1
+                print(f"📡 Backplane escuchando el canal '{self.channel}'")
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), self.KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        # Una conexión TCP muerta no avisa: la probamos cada tanto
+                        await asyncio.wait_for(conn.execute("SELECT 1"), self.KEEPALIVE_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Backplane sin conexión ({e}); reintento en {backoff}s")
+            finally:
+                self._listening = False
+                if conn is not None and not conn.is_closed():
+                    try:
+                        await conn.close(timeout=5)
+                    except Exception:
+                        pass
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _on_notify(self, _conn, _pid, _channel, raw: str):
+        try:
+            header, chunk = raw.split("\n", 1)
+            msg_id, index, total, tenant_id = header.split(" ", 3)
+            index, total = int(index), int(total)
+        except ValueError:
+            print("⚠️ Backplane: notificación con formato inválido")
+            return
+
+        if total == 1:
+            payload = chunk
+        else:
+            now = time.monotonic()
+            for stale in [k for k, (t, _, _) in self._partials.items() if now - t > self.PARTIAL_TTL_SECONDS]:
+                del self._partials[stale]
+            _, _, parts = self._partials.setdefault(msg_id, (now, total, {}))
+            parts[index] = chunk
+            if len(parts) < total:
+                return
+            del self._partials[msg_id]
+            payload = "".join(parts[i] for i in range(total))
+
+        self.received += 1
+        if self._handler is not None:
+            self._handler(tenant_id, payload)
+
+    # --- Publicación ---
+
+    def _frames(self, tenant_id: str, payload: str) -> List[str]:
+        msg_id = uuid.uuid4().hex[:12]
+        # json.dumps escapa a ASCII: contar caracteres es contar bytes
+        chunks = [payload[i:i + self.CHUNK_SIZE] for i in range(0, len(payload), self.CHUNK_SIZE)] or [""]
+        return [f"{msg_id} {i} {len(chunks)} {tenant_id}\n{chunk}" for i, chunk in enumerate(chunks)]
+
+    async def publish(self, tenant_id: str, payload: str):
+        from sqlalchemy import text
+        from app.database.session import async_engine
+
+        try:
+            # Todas las partes en una transacción: Postgres las entrega juntas y en orden al commit
+            async with async_engine.begin() as conn:
+                for frame in self._frames(tenant_id, payload):
+                    await conn.execute(text("SELECT pg_notify(:channel, :frame)"),
+                                       {"channel": self.channel, "frame": frame})
+            self.published += 1
+        except Exception as e:
+            # Sin backplane al menos avisamos a las tablets conectadas a este proceso
+            self.publish_errors += 1
+            print(f"⚠️ Backplane: no se pudo publicar ({e}); se entrega solo localmente")
+            if self._handler is not None:
+                self._handler(tenant_id, payload)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "postgres",
+            "listening": self._listening,
+            "published": self.published,
+            "received": self.received,
+            "publish_errors": self.publish_errors,
+            "reconnects": self.reconnects,
+            "partial_messages": len(self._partials),
+        }
+
+
+def _listen_dsn() -> str:
+    # asyncpg quiere "postgresql://..." sin el driver de SQLAlchemy (+pg8000, +asyncpg...)
+    from sqlalchemy.engine import make_url
+
+    url = make_url(BACKPLANE_DATABASE_URL or os.getenv("DATABASE_URL")).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def _build_backplane():
+    if BACKPLANE_BACKEND == "memory":
+        return InMemoryBackplane()
+    if BACKPLANE_BACKEND == "postgres":
+        return PostgresBackplane(_listen_dsn())
+    raise RuntimeError(f"BACKPLANE_BACKEND desconocido: {BACKPLANE_BACKEND}")
+
+
+backplane = _build_backplane()
@@ -1 +1,131 @@
 # Archivo: config.py
+import os
+
+# --- CACHÉ DE NEGOCIOS (Tenants) ---
+# Tiempo máximo que una foto del negocio vive en memoria antes de volver a la DB
+TENANT_CACHE_TTL_SECONDS = float(os.getenv("TENANT_CACHE_TTL_SECONDS", "60"))
+# Número máximo de negocios guardados por proceso (LRU)
+TENANT_CACHE_MAX_ENTRIES = int(os.getenv("TENANT_CACHE_MAX_ENTRIES", "2048"))
+
+# --- CACHÉ DEL CATÁLOGO PÚBLICO ---
+# Respuestas serializadas de /business/public/{slug}; se invalidan por versión del negocio
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "4096"))
+
+# --- LIKES ---
+# Cada cuántos segundos se vuelcan a la DB los incrementos de likes_count acumulados en memoria
+LIKES_FLUSH_INTERVAL_SECONDS = float(os.getenv("LIKES_FLUSH_INTERVAL_SECONDS", "2"))
+
+# --- ESTADÍSTICAS DE LA PLATAFORMA ---
+# Volcado de los contadores incrementales y recálculo exacto para corregir desvíos
+STATS_FLUSH_INTERVAL_SECONDS = float(os.getenv("STATS_FLUSH_INTERVAL_SECONDS", "5"))
+STATS_RECONCILE_INTERVAL_SECONDS = float(os.getenv("STATS_RECONCILE_INTERVAL_SECONDS", "600"))
+
+# --- DISPONIBILIDAD DE CITAS ---
+# Slots calculados por negocio y día; se invalidan al crear una cita o cambiar su estado
+SLOT_CACHE_TTL_SECONDS = float(os.getenv("SLOT_CACHE_TTL_SECONDS", "300"))
+SLOT_CACHE_MAX_ENTRIES = int(os.getenv("SLOT_CACHE_MAX_ENTRIES", "8192"))
+# Máximo de días que se pueden pedir en una sola consulta de rango
+SLOT_RANGE_MAX_DAYS = int(os.getenv("SLOT_RANGE_MAX_DAYS", "31"))
+
+# --- ALMACENAMIENTO DE ARCHIVOS ---
+# "supabase" (producción) o "local" (disco, para desarrollo y pruebas sin el servicio real)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+STORAGE_BUCKET = os.getenv("STORAGE_BUCKET", "images")
+# Backend local: carpeta donde se guardan los archivos y URL pública bajo la que se sirven
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "./media")
+STORAGE_LOCAL_BASE_URL = os.getenv("STORAGE_LOCAL_BASE_URL", "/media")
+# Hilos compartidos por todo el proceso y subidas simultáneas por petición
+STORAGE_MAX_WORKERS = int(os.getenv("STORAGE_MAX_WORKERS", "8"))
+STORAGE_UPLOAD_CONCURRENCY = int(os.getenv("STORAGE_UPLOAD_CONCURRENCY", "4"))
+# Tiempo máximo por archivo antes de dar la subida por fallida
+STORAGE_UPLOAD_TIMEOUT_SECONDS = float(os.getenv("STORAGE_UPLOAD_TIMEOUT_SECONDS", "30"))
+
+# --- OPTIMIZACIÓN DE IMÁGENES ---
+# Anchos (px) que se generan de cada imagen; el navegador elige con srcset
+PRODUCT_IMAGE_WIDTHS = tuple(int(w) for w in os.getenv("PRODUCT_IMAGE_WIDTHS", "320,640,1280").split(","))
+POST_IMAGE_WIDTHS = tuple(int(w) for w in os.getenv("POST_IMAGE_WIDTHS", "480,960,1440").split(","))
+LOGO_IMAGE_WIDTHS = tuple(int(w) for w in os.getenv("LOGO_IMAGE_WIDTHS", "128,256,512").split(","))
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+IMAGE_AVIF_QUALITY = int(os.getenv("IMAGE_AVIF_QUALITY", "55"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "82"))
+# Imágenes más grandes que esto (ancho x alto) se rechazan antes de decodificarlas
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", "40000000"))
+# Procesos dedicados a decodificar/codificar (trabajo de CPU fuera de los workers web)
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))
+
+# --- LÍMITES DE SUBIDA ---
+# Los archivos se validan leyéndolos en bloques de este tamaño
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+# Cuerpo multipart completo (todas las imágenes de una petición)
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(30 * 1024 * 1024)))
+
+# --- LIMPIEZA DEL ALMACENAMIENTO ---
+# Archivos que ya no referencia ningún producto, post o logo. Solo se borran los que tienen
+# más de STORAGE_GC_GRACE_SECONDS (una subida recién hecha aún puede no estar guardada).
+STORAGE_GC_INTERVAL_SECONDS = float(os.getenv("STORAGE_GC_INTERVAL_SECONDS", str(6 * 3600)))
+STORAGE_GC_GRACE_SECONDS = float(os.getenv("STORAGE_GC_GRACE_SECONDS", str(24 * 3600)))
+# La tarea periódica solo reporta (dry-run) salvo que se active el borrado explícitamente
+STORAGE_GC_DELETE = os.getenv("STORAGE_GC_DELETE", "false").lower() == "true"
+STORAGE_LIST_PAGE_SIZE = int(os.getenv("STORAGE_LIST_PAGE_SIZE", "100"))
+STORAGE_DELETE_BATCH_SIZE = int(os.getenv("STORAGE_DELETE_BATCH_SIZE", "100"))
+# Borrados pedidos desde las rutas (imagen reemplazada, producto eliminado...) se vacían cada N segundos
+STORAGE_DELETE_FLUSH_INTERVAL_SECONDS = float(os.getenv("STORAGE_DELETE_FLUSH_INTERVAL_SECONDS", "30"))
+
+# --- WEBSOCKETS ---
+# Mensajes pendientes por conexión; si un cliente lento llena su cola se aplica la política
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+# "drop_oldest": descarta el mensaje más viejo; "disconnect": cierra la conexión del cliente lento
+WS_SLOW_CLIENT_POLICY = os.getenv("WS_SLOW_CLIENT_POLICY", "drop_oldest")
+# Con drop_oldest, a partir de cuántos descartes seguidos (sin envíos exitosos) se desconecta igual
+WS_MAX_DROPPED_MESSAGES = int(os.getenv("WS_MAX_DROPPED_MESSAGES", "100"))
+# Tiempo máximo de un envío antes de dar la conexión por muerta
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+# El servidor manda {"event": "PING"} cada N segundos; el cliente responde "pong". Una conexión
+# que no manda nada en WS_IDLE_TIMEOUT_SECONDS se da por muerta (móviles que perdieron la red)
+WS_PING_INTERVAL_SECONDS = float(os.getenv("WS_PING_INTERVAL_SECONDS", "25"))
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "75"))
+# Límites de conexiones por proceso. Por negocio se cuentan aparte los paneles del dueño
+# (con token) y las tiendas públicas, así los visitantes nunca dejan sin socket a las tablets
+WS_MAX_CONNECTIONS_PER_TENANT = int(os.getenv("WS_MAX_CONNECTIONS_PER_TENANT", "50"))
+WS_MAX_PUBLIC_CONNECTIONS_PER_TENANT = int(os.getenv("WS_MAX_PUBLIC_CONNECTIONS_PER_TENANT", "200"))
+WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "5000"))
+# Del total, cuántas quedan reservadas para paneles del dueño (las públicas no pueden usarlas)
+WS_OWNER_RESERVED_CONNECTIONS = int(os.getenv("WS_OWNER_RESERVED_CONNECTIONS", "500"))
+
+# --- BACKPLANE DE NOTIFICACIONES ---
+# "memory" (un solo proceso) o "postgres" (LISTEN/NOTIFY: necesario con varios workers/instancias)
+BACKPLANE_BACKEND = os.getenv("BACKPLANE_BACKEND", "memory")
+BACKPLANE_CHANNEL = os.getenv("BACKPLANE_CHANNEL", "tenant_events")
+# Conexión para LISTEN: directa o pooler en modo sesión (el modo transacción no soporta LISTEN).
+# Si no se define se usa DATABASE_URL
+BACKPLANE_DATABASE_URL = os.getenv("BACKPLANE_DATABASE_URL")
+
+# --- EVENTOS EN TIEMPO REAL ---
+# Últimos eventos por negocio que cada proceso guarda en memoria para reenviar al reconectar
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "200"))
+EVENT_BUFFER_MAX_TENANTS = int(os.getenv("EVENT_BUFFER_MAX_TENANTS", "2048"))
+# Si un cliente perdió más que esto se le pide recargar en vez de reenviarle todo
+EVENT_REPLAY_MAX = int(os.getenv("EVENT_REPLAY_MAX", "500"))
+# Los eventos guardados en la tabla tenant_events se borran pasado este tiempo
+EVENT_RETENTION_SECONDS = float(os.getenv("EVENT_RETENTION_SECONDS", str(7 * 24 * 3600)))
+EVENT_PRUNE_INTERVAL_SECONDS = float(os.getenv("EVENT_PRUNE_INTERVAL_SECONDS", "3600"))
+
+# --- POOL DE CONEXIONES A LA BASE ---
+# Aplica a cada proceso y a cada motor (síncrono y async): el máximo de conexiones por worker
+# es 2 x (DB_POOL_SIZE + DB_MAX_OVERFLOW); debe entrar en el límite del plan de Postgres
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Segundos que una petición espera una conexión libre antes de fallar
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+# Las conexiones más viejas que esto se reabren (antes de que el servidor las corte por inactivas)
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Tiempo máximo por sentencia (0 = sin límite)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "api")
+# El pooler de Supabase en modo transacción (puerto 6543) reparte cada transacción en una
+# conexión distinta: las sentencias preparadas que asyncpg cachea no existen en la siguiente
+# ("prepared statement ... does not exist"). Solo con conexión directa conviene "true".
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "false").lower() == "true"
@@ -0,0 +1,49 @@
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+from app.core.config import UPLOAD_MAX_REQUEST_BYTES
+
+# --- LÍMITE DE TAMAÑO DEL CUERPO ---
+# Los formularios multipart se rechazan antes de leerlos si Content-Length excede el
+# máximo; si el cliente no lo envía (transferencia por bloques), se cuentan los bytes a
+# medida que llegan y se corta con 413 en cuanto se pasa, sin esperar al final.
+
+
+class RequestSizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            return await self.app(scope, receive, send)
+
+        declared = self._header(scope, b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": "La petición supera el tamaño máximo permitido"})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI deja pasar las HTTPException del parseo del formulario tal cual
+                    raise HTTPException(status_code=413, detail="La petición supera el tamaño máximo permitido")
+            return message
+
+        return await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _header(scope, name: bytes):
+        for key, value in scope.get("headers", []):
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    def _is_multipart(self, scope) -> bool:
+        content_type = self._header(scope, b"content-type") or ""
+        return content_type.startswith("multipart/form-data")
@@ -1,36 +1,312 @@
+import asyncio
+import json
+import time
+import uuid
 from fastapi import WebSocket
-from typing import Dict, List, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.backplane import backplane
+from app.core.config import (
+    WS_IDLE_TIMEOUT_SECONDS, WS_MAX_CONNECTIONS, WS_MAX_CONNECTIONS_PER_TENANT, WS_MAX_DROPPED_MESSAGES,
+    WS_MAX_PUBLIC_CONNECTIONS_PER_TENANT, WS_OWNER_RESERVED_CONNECTIONS, WS_PING_INTERVAL_SECONDS,
+    WS_SEND_QUEUE_SIZE, WS_SEND_TIMEOUT_SECONDS, WS_SLOW_CLIENT_POLICY,
+)
+from app.services import event_log
+from app.services.event_log import Event, event_buffer
+
+# --- NOTIFICACIONES EN TIEMPO REAL ---
+# Cada conexión tiene su propia cola de salida (acotada) y una tarea que la vacía. Un
+# broadcast serializa el mensaje una sola vez y solo lo encola en cada conexión, así que
+# nunca espera a un socket: una tablet lenta o medio caída no retrasa la respuesta HTTP
+# ni a las demás tablets. Si un cliente no da abasto se aplica WS_SLOW_CLIENT_POLICY.
+# Con varios workers el mensaje pasa por el backplane (app/core/backplane.py) y cada
+# proceso lo entrega a sus propias conexiones en deliver_local.
+#
+# Latido: cada WS_PING_INTERVAL_SECONDS se encola un PING en las conexiones sin tráfico
+# pendiente; cualquier mensaje del cliente (el "pong") cuenta como actividad. Las que pasan
+# WS_IDLE_TIMEOUT_SECONDS sin dar señales se cierran.
+#
+# Reconexión: el cliente manda ?last_seq=N y recibe solo los eventos que se perdió (ver
+# app/services/event_log.py). Si son demasiados recibe RESYNC y recarga la lista completa.
+#
+# El id del negocio es público (la tienda abre /ws/{id} para ver los horarios en vivo), así
+# que los pedidos y la reposición son solo para el panel del dueño (token válido del negocio).
+# Una tienda pública recibe únicamente SLOT_TAKEN / SLOT_RELEASED con la hora de la cita.
+#
+# Límites: los paneles del dueño (token válido del negocio) y las tiendas públicas se cuentan
+# por separado, y las últimas WS_OWNER_RESERVED_CONNECTIONS del proceso son solo para dueños.
+# Se comprueban ANTES de aceptar: un socket rechazado termina en el handshake (HTTP 403).
+
+# Códigos de cierre: cliente que no consume a tiempo o límite de conexiones ("Try Again Later")
+CLOSE_SLOW_CONSUMER = 1013
+CLOSE_TOO_MANY_CONNECTIONS = 1013
+# Rango 4000-4999: reservado para la aplicación
+CLOSE_IDLE_TIMEOUT = 4000
+
+PING_PAYLOAD = json.dumps({"event": "PING"})
+PONG_PAYLOAD = json.dumps({"event": "PONG"})
+RESYNC_PAYLOAD = json.dumps({"event": "RESYNC"})
+
+
+def public_payload(payload: str) -> Optional[str]:
+    """Lo que ve una tienda pública de un evento: solo qué horario se ocupó o se liberó."""
+    try:
+        message = json.loads(payload)
+        event, appointment = message.get("event"), message.get("appointment")
+    except (ValueError, AttributeError):
+        return None
+    if not appointment or event not in ("NEW_ORDER", "ORDER_STATUS"):
+        return None
+    released = event == "ORDER_STATUS" and message.get("status") == "cancelled"
+    return json.dumps({"event": "SLOT_RELEASED" if released else "SLOT_TAKEN", "appointment": appointment})
+
+
+async def _load_missed(tenant_id: str, after_seq: int) -> Optional[List[Event]]:
+    # Import diferido: el manager no necesita la base salvo para reenviar eventos viejos
+    from app.database.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(event_log.load, tenant_id, after_seq)
+
+
+class ClientConnection:
+    def __init__(self, manager: "ConnectionManager", websocket: WebSocket, tenant_id: str, owner: bool = False):
+        self.id = uuid.uuid4().hex
+        self.manager = manager
+        self.websocket = websocket
+        self.tenant_id = tenant_id
+        self.owner = owner
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.dropped = 0           # descartes seguidos desde el último envío exitoso
+        self.closed = False
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, payload: str) -> bool:
+        """No bloquea nunca. Devuelve False si la conexión quedó fuera por lenta."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        self.manager.dropped_messages += 1
+        if WS_SLOW_CLIENT_POLICY == "disconnect" or self.dropped >= WS_MAX_DROPPED_MESSAGES:
+            self.close(CLOSE_SLOW_CONSUMER)
+            return False
+        # drop_oldest: el mensaje más nuevo es el más útil para el panel
+        self.queue.get_nowait()
+        self.queue.put_nowait(payload)
+        self.dropped += 1
+        return True
+
+    async def _write_loop(self):
+        try:
+            # wait_for puede tragarse la cancelación si el envío termina justo al cerrar
+            while not self.closed:
+                payload = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(payload), WS_SEND_TIMEOUT_SECONDS)
+                self.dropped = 0
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            print(f"🐢 Socket de {self.tenant_id} no recibe a tiempo, se desconecta")
+            self.close(CLOSE_SLOW_CONSUMER)
+        except Exception as e:
+            print(f"❌ Error enviando a un socket de {self.tenant_id}: {e}")
+            self.close()
+
+    def close(self, code: Optional[int] = None):
+        """Quita la conexión del manager y detiene su escritor (idempotente)."""
+        if self.closed:
+            return
+        self.closed = True
+        self.manager._remove(self)
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        if code is not None:
+            asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), WS_SEND_TIMEOUT_SECONDS)
+        except Exception:
+            pass
+
 
 class ConnectionManager:
     def __init__(self):
-        # Usamos Any o str porque los UUIDs se manejan mejor como strings en las llaves
-        self.active_connections: Dict[Any, List[WebSocket]] = {}
+        # tenant_id -> {id de conexión -> conexión}
+        self.active_connections: Dict[str, Dict[str, ClientConnection]] = {}
+        # Conexiones aceptadas o en handshake, en total y por (negocio, es_dueño)
+        self.connection_count = 0
+        self._slots: Dict[Tuple[str, bool], int] = {}
+        self.dropped_messages = 0
+        self.rejected_connections = 0
+        self.reaped_connections = 0
+        self._heartbeat: Optional[asyncio.Task] = None
 
-    async def connect(self, websocket: WebSocket, tenant_id: Any):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, tenant_id: Any, last_seq: Optional[int] = None,
+                      owner: bool = False) -> Optional[ClientConnection]:
+        """
+        Acepta la conexión; devuelve None si se superó algún límite (se cierra sin aceptarla).
+        Con `last_seq`, antes de los mensajes en vivo se envían los eventos posteriores a ese número.
+        `owner`: el socket trae un token válido del negocio (panel del dueño).
+        """
         # Forzamos a string para asegurar que la llave sea siempre igual
-        t_id = str(tenant_id)
-        if t_id not in self.active_connections:
-            self.active_connections[t_id] = []
-        self.active_connections[t_id].append(websocket)
-        print(f"✅ Socket conectado al canal: {t_id}")
-
-    def disconnect(self, websocket: WebSocket, tenant_id: Any):
-        t_id = str(tenant_id)
-        if t_id in self.active_connections:
-            if websocket in self.active_connections[t_id]:
-                self.active_connections[t_id].remove(websocket)
-            if not self.active_connections[t_id]:
-                del self.active_connections[t_id]
+        tenant_id = str(tenant_id)
+        if not owner:
+            # La reposición lleva pedidos: una tienda pública solo ve lo que pasa desde ahora
+            last_seq = None
+        # Se reserva el lugar sin awaits de por medio: dos handshakes simultáneos no pasan el límite
+        if not self._reserve(tenant_id, owner):
+            self.rejected_connections += 1
+            print(f"⛔ Socket rechazado para {tenant_id}: límite de conexiones")
+            await websocket.close(code=CLOSE_TOO_MANY_CONNECTIONS)
+            return None
 
-    async def broadcast_to_tenant(self, tenant_id: Any, message: dict):
-        t_id = str(tenant_id)
-        print(f"📡 Intentando broadcast a {len(self.active_connections.get(t_id, []))} clientes en {t_id}")
-        if t_id in self.active_connections:
-            for connection in self.active_connections[t_id]:
+        try:
+            await websocket.accept()
+            missed: Optional[List[Event]] = []
+            if last_seq is not None and event_buffer.since(tenant_id, last_seq) is None:
                 try:
-                    await connection.send_json(message)
+                    missed = await _load_missed(tenant_id, last_seq)
                 except Exception as e:
-                    print(f"❌ Error enviando a un socket: {e}")
+                    print(f"⚠️ No se pudieron cargar eventos de {tenant_id}: {e}")
+                    missed = None
+        except BaseException:
+            self._release(tenant_id, owner)
+            raise
+
+        # Desde aquí no hay awaits: lo que llegue en vivo queda en la cola después del reenvío
+        connection = ClientConnection(self, websocket, tenant_id, owner)
+        self.active_connections.setdefault(tenant_id, {})[connection.id] = connection
+        if last_seq is not None:
+            self._replay(connection, last_seq, missed)
+        connection.start()
+        print(f"✅ Socket conectado al canal: {tenant_id}")
+        return connection
+
+    def _replay(self, connection: ClientConnection, last_seq: int, missed: Optional[List[Event]]):
+        if missed is not None:
+            # Lo que se confirmó después de la consulta a la tabla ya está en el anillo
+            after = missed[-1].seq if missed else last_seq
+            missed = missed + event_buffer.since(connection.tenant_id, after, require_complete=False)
+        if missed is None or len(missed) >= connection.queue.maxsize:
+            connection.enqueue(RESYNC_PAYLOAD)
+            return
+        for event in missed:
+            connection.enqueue(event.payload)
+
+    def disconnect(self, connection: ClientConnection):
+        connection.close()
+
+    def _reserve(self, tenant_id: str, owner: bool) -> bool:
+        key = (tenant_id, owner)
+        tenant_limit = WS_MAX_CONNECTIONS_PER_TENANT if owner else WS_MAX_PUBLIC_CONNECTIONS_PER_TENANT
+        total_limit = WS_MAX_CONNECTIONS if owner else WS_MAX_CONNECTIONS - WS_OWNER_RESERVED_CONNECTIONS
+        if self.connection_count >= total_limit or self._slots.get(key, 0) >= tenant_limit:
+            return False
+        self.connection_count += 1
+        self._slots[key] = self._slots.get(key, 0) + 1
+        return True
+
+    def _release(self, tenant_id: str, owner: bool):
+        key = (tenant_id, owner)
+        self.connection_count -= 1
+        self._slots[key] -= 1
+        if not self._slots[key]:
+            del self._slots[key]
+
+    def _remove(self, connection: ClientConnection):
+        tenant_connections = self.active_connections.get(connection.tenant_id)
+        if tenant_connections is not None and tenant_connections.pop(connection.id, None) is not None:
+            self._release(connection.tenant_id, connection.owner)
+            if not tenant_connections:
+                del self.active_connections[connection.tenant_id]
+
+    def handle_message(self, connection: ClientConnection, text: str):
+        """Todo mensaje del cliente cuenta como señal de vida; a un "ping" se le responde."""
+        connection.last_seen = time.monotonic()
+        if text.strip().lower() == "ping":
+            connection.enqueue(PONG_PAYLOAD)
+
+    # --- Latido ---
+
+    def start_heartbeat(self):
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop_heartbeat(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(WS_PING_INTERVAL_SECONDS)
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"⚠️ Error en el latido de sockets: {e}")
+
+    def heartbeat(self):
+        now = time.monotonic()
+        for tenant_connections in list(self.active_connections.values()):
+            for connection in list(tenant_connections.values()):
+                if now - connection.last_seen > WS_IDLE_TIMEOUT_SECONDS:
+                    self.reaped_connections += 1
+                    connection.close(CLOSE_IDLE_TIMEOUT)
+                elif connection.queue.empty():
+                    # Si hay mensajes en cola el escritor ya está probando la conexión
+                    connection.enqueue(PING_PAYLOAD)
+
+    async def broadcast_to_tenant(self, tenant_id: Any, message: dict):
+        # Se serializa una sola vez; cada worker recibe el texto tal cual
+        payload = json.dumps(message, default=str)
+        await backplane.publish(str(tenant_id), payload)
+
+    def deliver_local(self, tenant_id: str, payload: str):
+        # Todos los procesos reciben cada evento: cada uno lo recuerda para reenviarlo al reconectar
+        event_buffer.remember(tenant_id, payload)
+        connections = self.active_connections.get(tenant_id)
+        if not connections:
+            return
+        public = None
+        for connection in list(connections.values()):
+            if connection.owner:
+                connection.enqueue(payload)
+                continue
+            if public is None:
+                # Se arma una sola vez por evento ("" = nada que mostrar a las tiendas)
+                public = public_payload(payload) or ""
+            if public:
+                connection.enqueue(public)
+
+    def tenant_counts(self) -> Dict[str, int]:
+        return {tenant_id: len(conns) for tenant_id, conns in self.active_connections.items()}
+
+    def stats(self) -> dict:
+        return {
+            "tenants": len(self.active_connections),
+            "connections": self.connection_count,
+            "owner_connections": sum(n for (_, owner), n in self._slots.items() if owner),
+            "rejected_connections": self.rejected_connections,
+            "reaped_connections": self.reaped_connections,
+            "queued_messages": sum(c.queue.qsize() for conns in self.active_connections.values() for c in conns.values()),
+            "dropped_messages": self.dropped_messages,
+            "backplane": backplane.stats(),
+            "event_buffer": event_buffer.stats(),
+        }
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -0,0 +1,189 @@
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import (
+    DB_APPLICATION_NAME, DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE_SECONDS, DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS, DB_STATEMENT_TIMEOUT_MS,
+)
+
+# --- FÁBRICA DE MOTORES ---
+# Los dos motores (síncrono y async) salen de aquí con la misma configuración del pool:
+#   - pre_ping + recycle: Render/Supabase cortan conexiones inactivas; sin esto la primera
+#     consulta después de un rato sin tráfico falla con "server closed the connection".
+#   - statement_timeout: una consulta colgada no puede retener una conexión del pool para
+#     siempre (con el pooler en modo transacción conviene fijarlo en el rol y poner 0 aquí).
+#   - application_name: permite ver en pg_stat_activity qué conexiones son de la API.
+#
+# Cada pool lleva métricas (espera al pedir conexión, en uso, overflow, timeouts) que se
+# consultan en /api/v1/admin/db-pool para dimensionar DB_POOL_SIZE / DB_MAX_OVERFLOW.
+
+# Límites (ms) de los tramos del histograma de espera
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.pool = None
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.peak_in_use = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float, timed_out: bool):
+        ms = seconds * 1000
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            self.wait_total_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            bucket = next((i for i, limit in enumerate(WAIT_BUCKETS_MS) if ms <= limit), len(WAIT_BUCKETS_MS))
+            self.wait_buckets[bucket] += 1
+
+    def on_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            if self.pool is not None:
+                self.peak_in_use = max(self.peak_in_use, self.pool.checkedout())
+
+    def on_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def on_invalidate(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            labels = [f"<={limit}ms" for limit in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+            data = {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "peak_in_use": self.peak_in_use,
+                "wait_avg_ms": round(self.wait_total_ms / waits, 3) if waits else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "wait_histogram": dict(zip(labels, self.wait_buckets)),
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # Negativo mientras el pool no llegó a su tamaño; positivo = conexiones extra abiertas
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+            })
+        return data
+
+
+_metrics: Dict[str, PoolMetrics] = {}
+
+
+class _WaitTiming:
+    """Mide cuánto se espera por una conexión (los eventos del pool no lo informan)."""
+    _metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self._metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self._metrics.observe_wait(time.perf_counter() - started, timed_out=False)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() reemplaza el pool: las métricas siguen con el nuevo
+        pool = super().recreate()
+        pool._metrics = self._metrics
+        self._metrics.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(_WaitTiming, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_WaitTiming, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(url, poolclass) -> dict:
+    if url.get_backend_name() == "sqlite":
+        # SQLite (desarrollo/pruebas) elige su propio pool
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def _instrument(name: str, pool) -> PoolMetrics:
+    metrics = _metrics[name] = PoolMetrics(name)
+    metrics.pool = pool
+    if isinstance(pool, _WaitTiming):
+        pool._metrics = metrics
+    event.listen(pool, "connect", lambda *_: metrics.on_connect())
+    event.listen(pool, "checkout", lambda *_: metrics.on_checkout())
+    event.listen(pool, "invalidate", lambda *_: metrics.on_invalidate())
+    return metrics
+
+
+def build_engine(url: str, name: str = "sync") -> Engine:
+    parsed = make_url(url)
+    engine = create_engine(parsed, **_pool_options(parsed, InstrumentedQueuePool))
+
+    if parsed.get_backend_name() == "postgresql":
+        @event.listens_for(engine, "connect")
+        def _session_settings(dbapi_connection, _record):
+            # Vale para cualquier driver (psycopg2, pg8000): SET explícito y commit
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET statement_timeout = {int(DB_STATEMENT_TIMEOUT_MS)}")
+            cursor.execute("SELECT set_config('application_name', %s, false)", (DB_APPLICATION_NAME,))
+            cursor.close()
+            dbapi_connection.commit()
+
+    _instrument(name, engine.pool)
+    return engine
+
+
+def build_async_engine(url, connect_args: dict, name: str = "async") -> AsyncEngine:
+    parsed = make_url(url)
+    connect_args = dict(connect_args)
+    if parsed.get_backend_name() == "postgresql":
+        # asyncpg los manda en el arranque de la conexión, sin consultas extra
+        connect_args["server_settings"] = {
+            "statement_timeout": str(int(DB_STATEMENT_TIMEOUT_MS)),
+            "application_name": DB_APPLICATION_NAME,
+        }
+    engine = create_async_engine(
+        parsed, connect_args=connect_args, **_pool_options(parsed, InstrumentedAsyncQueuePool)
+    )
+    _instrument(name, engine.sync_engine.pool)
+    return engine
+
+
+def pool_metrics() -> List[dict]:
+    return [{"engine": name, **metrics.snapshot()} for name, metrics in _metrics.items()]
@@ -0,0 +1,220 @@
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models.base import Base, TenantEvent
+
+# --- MIGRACIONES VERSIONADAS ---
+# Cada migración tiene un número de versión y se aplica una sola vez; las versiones
+# aplicadas quedan en la tabla schema_migrations. Cada una corre en su transacción y,
+# en PostgreSQL, bajo un advisory lock para que dos deploys a la vez no apliquen lo
+# mismo en paralelo.
+#
+# Se aplican como paso del deploy, antes de arrancar la API (no al importar main.py):
+#   python -m app.database.migrations
+#
+# Reglas para agregar una migración:
+#   - nunca modificar una ya publicada, siempre agregar una versión nueva al final;
+#   - usar sentencias idempotentes (IF NOT EXISTS) cuando sea posible;
+#   - si se agrega una columna a un modelo existente, create_all no la crea en bases
+#     existentes: hace falta su ALTER TABLE aquí;
+#   - los índices sobre tablas con datos van con _create_index en una migración
+#     transactional=False: CREATE INDEX CONCURRENTLY no bloquea las escrituras, pero
+#     no puede correr dentro de una transacción.
+
+MIGRATIONS_LOCK_ID = 742_001
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+    # False: corre en autocommit (sentencia por sentencia); debe ser idempotente
+    transactional: bool = True
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, name: str, transactional: bool = True):
+    def register(func: Callable[[Connection], None]):
+        MIGRATIONS.append(Migration(version, name, func, transactional))
+        return func
+    return register
+
+
+def _is_postgres(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+def _create_index(conn: Connection, name: str, definition: str, unique: bool = False):
+    """`CREATE INDEX name ON definition`, en PostgreSQL sin bloquear escrituras (CONCURRENTLY)."""
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if not _is_postgres(conn):
+        conn.execute(text(f"CREATE {kind} IF NOT EXISTS {name} ON {definition}"))
+        return
+    # Un CONCURRENTLY interrumpido deja el índice inválido y IF NOT EXISTS lo daría por hecho
+    invalid = conn.execute(text("""
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name AND NOT i.indisvalid
+    """), {"name": name}).first()
+    if invalid:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(text(f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+
+
+def _drop_index(conn: Connection, name: str):
+    concurrently = "CONCURRENTLY " if _is_postgres(conn) else ""
+    conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {name}"))
+
+
+@migration(1, "baseline: tablas de los modelos")
+def _baseline(conn: Connection):
+    # En una base nueva crea todo (incluidos los índices declarados en los modelos);
+    # en una existente solo agrega las tablas que falten
+    Base.metadata.create_all(bind=conn, checkfirst=True)
+
+
+@migration(2, "búsqueda por trigramas en items", transactional=False)
+def _catalog_search(conn: Connection):
+    if not _is_postgres(conn):
+        return
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    _create_index(conn, "ix_items_name_trgm", "items USING gin (name gin_trgm_ops)")
+    _create_index(conn, "ix_items_description_trgm", "items USING gin (description gin_trgm_ops)")
+
+
+@migration(3, "posts.likes_count y likes únicos por cliente", transactional=False)
+def _likes_counter(conn: Connection):
+    if not _is_postgres(conn):
+        return
+    # El contador se calcula una sola vez al crear la columna; después lo mantiene el buffer
+    conn.execute(text("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'posts' AND column_name = 'likes_count'
+            ) THEN
+                ALTER TABLE posts ADD COLUMN likes_count INTEGER NOT NULL DEFAULT 0;
+                UPDATE posts SET likes_count = c.total
+                FROM (SELECT post_id, count(*) AS total FROM likes GROUP BY post_id) c
+                WHERE c.post_id = posts.id;
+            END IF;
+        END $$
+    """))
+    # Antes de exigir unicidad, eliminamos likes duplicados del mismo cliente
+    conn.execute(text("""
+        DELETE FROM likes a USING likes b
+        WHERE a.post_id = b.post_id AND a.client_identifier = b.client_identifier AND a.id > b.id
+    """))
+    _create_index(conn, "uq_likes_post_client", "likes (post_id, client_identifier)", unique=True)
+
+
+@migration(4, "índices compuestos para las rutas calientes", transactional=False)
+def _hot_path_indexes(conn: Connection):
+    # Mismos nombres que los Index(...) de app/models/base.py: en bases nuevas ya existen
+    indexes = [
+        ("ix_orders_tenant_status_created", "orders (tenant_id, status, created_at)"),
+        ("ix_orders_tenant_appointment", "orders (tenant_id, appointment_datetime)"),
+        ("ix_item_variants_item_name", "item_variants (item_id, name)"),
+        ("ix_item_extras_item_name", "item_extras (item_id, name)"),
+        ("ix_posts_tenant_created", "posts (tenant_id, created_at, id)"),
+        ("ix_items_tenant_updated", "items (tenant_id, updated_at, id)"),
+        ("ix_business_hours_tenant_day", "business_hours (tenant_id, day_of_week)"),
+        ("ix_wallet_transactions_created", "wallet_transactions (created_at, id)"),
+        ("ix_wallet_transactions_tenant_created", "wallet_transactions (tenant_id, created_at)"),
+    ]
+    for name, definition in indexes:
+        _create_index(conn, name, definition)
+
+
+@migration(5, "variantes responsivas de imágenes")
+def _image_variants(conn: Connection):
+    for table in ("items", "posts"):
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if "image_variants" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN image_variants JSON"))
+
+
+@migration(6, "eventos numerados por negocio")
+def _tenant_events(conn: Connection):
+    columns = {c["name"] for c in inspect(conn).get_columns("tenants")}
+    if "event_seq" not in columns:
+        conn.execute(text("ALTER TABLE tenants ADD COLUMN event_seq INTEGER NOT NULL DEFAULT 0"))
+    TenantEvent.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(7, "índice del tablero de pedidos con id para el cursor", transactional=False)
+def _orders_board_index(conn: Connection):
+    _create_index(conn, "ix_orders_tenant_status_created_id", "orders (tenant_id, status, created_at, id)")
+    # Lo cubre el índice nuevo (mismo prefijo)
+    _drop_index(conn, "ix_orders_tenant_status_created")
+
+
+def _record(conn: Connection, m: Migration):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+        {"version": m.version, "name": m.name, "applied_at": datetime.utcnow()}
+    )
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Aplica las migraciones pendientes en orden y devuelve las versiones aplicadas."""
+    applied_now = []
+    with engine.connect() as conn:
+        postgres = _is_postgres(conn)
+        if postgres:
+            # Lock de sesión (no de transacción): abarca también las migraciones en autocommit
+            conn.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATIONS_LOCK_ID})
+            conn.commit()
+        try:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR NOT NULL,
+                    applied_at TIMESTAMP NOT NULL
+                )
+            """))
+            done = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+            conn.commit()
+
+            for m in sorted(MIGRATIONS, key=lambda m: m.version):
+                if m.version in done:
+                    continue
+                if m.transactional:
+                    m.upgrade(conn)
+                    _record(conn, m)
+                    conn.commit()
+                else:
+                    conn.execution_options(isolation_level="AUTOCOMMIT")
+                    try:
+                        m.upgrade(conn)
+                        _record(conn, m)
+                    finally:
+                        # En autocommit commit() no hace nada en la base: solo cierra la
+                        # transacción de SQLAlchemy para poder restaurar el aislamiento
+                        conn.commit()
+                        conn.execution_options(isolation_level=conn.default_isolation_level)
+                applied_now.append(m.version)
+                print(f"🗄️ Migración {m.version} aplicada: {m.name}")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATIONS_LOCK_ID})
+                conn.commit()
+    return applied_now
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    from app.database.session import engine
+
+    applied = run_migrations(engine)
+    print(f"🗄️ {len(applied)} migraciones aplicadas" if applied else "🗄️ Esquema al día")
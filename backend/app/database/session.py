@@ -1,18 +1,22 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from app.models.base import Base
+from app.database.engine import build_async_engine, build_engine
+from app.core.config import DB_PREPARED_STATEMENTS
 
 # 1. Definimos la URL con el driver pg8000 para evitar errores de tildes en Windows
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# 2. Creamos el motor de conexión
-engine = create_engine(DATABASE_URL)
+# 2. Creamos el motor de conexión (pool configurable y con métricas, ver app/database/engine.py)
+engine = build_engine(DATABASE_URL)
 
 # 3. Creamos la fábrica de sesiones (esto lo usarán tus rutas de la API)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# 4. Definimos la base para los modelos
-Base = declarative_base()
+# 4. La base de los modelos es la de app/models/base.py (se re-exporta aquí);
+#    el esquema lo crea y evoluciona app/database/migrations.py
 
 # 5. Función de ayuda para obtener la base de datos en cada petición
 def get_db():
@@ -20,4 +24,43 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# --- MOTOR ASÍNCRONO ---
+# Las rutas `async def` no deben usar la sesión síncrona: cada consulta bloquearía el
+# event loop (y con él todas las peticiones y WebSockets del worker). Usan get_async_db,
+# que habla con la base mediante un driver async (asyncpg / aiosqlite). El código de
+# servicios existente (síncrono) se reutiliza con `await db.run_sync(func, ...)`.
+
+def _async_url(url: str):
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        # asyncpg no entiende sslmode=...; se le pasa como argumento `ssl`
+        sslmode = parsed.query.get("sslmode")
+        parsed = parsed.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+        connect_args = {"ssl": sslmode} if sslmode else {}
+        if not DB_PREPARED_STATEMENTS:
+            # Ni la caché de asyncpg ni la del dialecto de SQLAlchemy (ver config)
+            parsed = parsed.update_query_dict({"prepared_statement_cache_size": "0"})
+            connect_args["statement_cache_size"] = 0
+        return parsed, connect_args
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite"), {}
+    return parsed, {}
+
+
+# Se puede fijar explícitamente; si no, se deriva de DATABASE_URL cambiando el driver
+_async_database_url, _async_connect_args = _async_url(os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL)
+
+async_engine = build_async_engine(_async_database_url, _async_connect_args)
+
+# expire_on_commit=False: tras el commit los objetos se siguen leyendo sin volver a la DB
+# (en modo async no hay carga perezosa implícita)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, ForeignKey, DateTime, Text, Boolean, Integer, ARRAY
+from sqlalchemy import Column, String, Float, ForeignKey, DateTime, Text, Boolean, Integer, ARRAY, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 from sqlalchemy.sql import func
@@ -22,6 +22,8 @@ class Tenant(Base):
     appointment_interval = Column(Integer, default=30)
     has_delivery = Column(Boolean, default=False)
     delivery_price = Column(Float, default=0.0)
+    # Último número de evento en tiempo real emitido (ver app/services/event_log.py)
+    event_seq = Column(Integer, default=0, server_default="0", nullable=False)
 
     # Relaciones
     users = relationship("User", back_populates="tenant", cascade="all, delete-orphan")
@@ -46,6 +48,8 @@ class User(Base):
 
 class Item(Base):
     __tablename__ = "items"
+    # Listado del catálogo/panel por cursor (updated_at, id)
+    __table_args__ = (Index("ix_items_tenant_updated", "tenant_id", "updated_at", "id"),)
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     tenant_id = Column(String, ForeignKey("tenants.id"), nullable=False)
     name = Column(String, nullable=False)
@@ -57,6 +61,8 @@ class Item(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     additional_images = Column(ARRAY(String), default=[])
+    # URL de respaldo (image_url / additional_images) -> variantes responsivas (app/services/image_service.py)
+    image_variants = Column(JSON, nullable=True)
     
     tenant = relationship("Tenant", back_populates="items")
     variants = relationship("ItemVariant", back_populates="item", cascade="all, delete-orphan")
@@ -64,6 +70,7 @@ class Item(Base):
 
 class ItemVariant(Base):
     __tablename__ = "item_variants"
+    __table_args__ = (Index("ix_item_variants_item_name", "item_id", "name"),)
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     item_id = Column(String, ForeignKey("items.id"), nullable=False)
     name = Column(String, nullable=False)
@@ -73,6 +80,7 @@ class ItemVariant(Base):
 
 class ItemExtra(Base):
     __tablename__ = "item_extras"
+    __table_args__ = (Index("ix_item_extras_item_name", "item_id", "name"),)
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     item_id = Column(String, ForeignKey("items.id"), nullable=False)
     name = Column(String, nullable=False)
@@ -84,6 +92,12 @@ class ItemExtra(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Tablero del dueño: cada estado se pagina por (created_at, id)
+        Index("ix_orders_tenant_status_created_id", "tenant_id", "status", "created_at", "id"),
+        # Disponibilidad de citas por día
+        Index("ix_orders_tenant_appointment", "tenant_id", "appointment_datetime"),
+    )
     id = Column(String, primary_key=True, index=True)
     tenant_id = Column(String, ForeignKey("tenants.id"), nullable=False)
     customer_name = Column(String, nullable=False)
@@ -120,17 +134,25 @@ class OrderItem(Base):
 
 class Post(Base):
     __tablename__ = "posts"
+    # Feed por cursor (created_at, id)
+    __table_args__ = (Index("ix_posts_tenant_created", "tenant_id", "created_at", "id"),)
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     tenant_id = Column(String, ForeignKey("tenants.id"), nullable=False)
     image_url = Column(String, nullable=False)
     content = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Contador desnormalizado: lo mantiene app/services/like_service.py (escritura diferida)
+    likes_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Variantes responsivas de image_url (app/services/image_service.py)
+    image_variants = Column(JSON, nullable=True)
     
     tenant = relationship("Tenant", back_populates="posts")
     likes = relationship("Like", back_populates="post", cascade="all, delete-orphan")
 
 class Like(Base):
     __tablename__ = "likes"
+    # Un like por cliente y post: permite que el toggle sea un INSERT ... ON CONFLICT DO NOTHING
+    __table_args__ = (UniqueConstraint("post_id", "client_identifier", name="uq_likes_post_client"),)
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     post_id = Column(String, ForeignKey("posts.id"), nullable=False)
     client_identifier = Column(String, nullable=False, index=True)
@@ -151,6 +173,11 @@ class Wallet(Base):
 
 class WalletTransaction(Base):
     __tablename__ = "wallet_transactions"
+    __table_args__ = (
+        # Historial del super admin por cursor, global y por negocio
+        Index("ix_wallet_transactions_created", "created_at", "id"),
+        Index("ix_wallet_transactions_tenant_created", "tenant_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(String, ForeignKey("tenants.id"))
@@ -163,8 +190,17 @@ class WalletTransaction(Base):
     # Relación para consultas fáciles
     tenant = relationship("Tenant", back_populates="wallet_transactions")  
 
+class PlatformCounter(Base):
+    """Totales de la plataforma mantenidos de forma incremental (ver app/services/stats_service.py)"""
+    __tablename__ = "platform_counters"
+
+    key = Column(String, primary_key=True)
+    value = Column(Float, default=0.0, nullable=False)
+    reconciled_at = Column(DateTime, nullable=True)
+
 class BusinessHour(Base):
     __tablename__ = "business_hours"
+    __table_args__ = (Index("ix_business_hours_tenant_day", "tenant_id", "day_of_week"),)
     
     id = Column(Integer, primary_key=True)
     tenant_id = Column(String, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
@@ -173,4 +209,15 @@ class BusinessHour(Base):
     open_time = Column(String, nullable=False) 
     close_time = Column(String, nullable=False)
     is_closed = Column(Boolean, default=False)
-    tenant = relationship("Tenant", back_populates="business_hours")
\ No newline at end of file
+    tenant = relationship("Tenant", back_populates="business_hours")
+
+class TenantEvent(Base):
+    """Eventos en tiempo real numerados por negocio, para reenviar lo perdido al reconectar"""
+    __tablename__ = "tenant_events"
+    __table_args__ = (UniqueConstraint("tenant_id", "seq", name="uq_tenant_events_seq"),)
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -1,43 +1,122 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_, asc, desc
 from app.models import base
+from app.services.stats_service import platform_stats
 
 class AdminService:
     @staticmethod
     def get_global_stats(db: Session):
-        # Contamos totales de toda la plataforma
-        total_tenants = db.query(base.Tenant).count()
-        total_revenue = db.query(func.sum(base.Wallet.balance)).scalar() or 0
-        active_posts = db.query(base.Post).count()
-        active_users = db.query(base.User).count()
-
+        # Totales de toda la plataforma, mantenidos de forma incremental (O(1))
+        stats = platform_stats.read(db)
         return {
-            "total_tenants": total_tenants,
-            "total_revenue": total_revenue,
-            "active_posts": active_posts,
-            "active_users": active_users
+            "total_tenants": int(stats["total_tenants"]),
+            "total_revenue": stats["total_revenue"],
+            "active_posts": int(stats["active_posts"]),
+            "active_users": int(stats["active_users"])
         }
 
+    # Columnas por las que el panel puede ordenar la lista de negocios
+    TENANT_SORT_FIELDS = ("created_at", "balance", "orders", "name")
+
+    @staticmethod
+    def get_all_tenants(
+        db: Session,
+        page: int = 1,
+        page_size: int = 50,
+        sort_by: str = "created_at",
+        order: str = "desc",
+        q: Optional[str] = None
+    ) -> Tuple[List[dict], int]:
+        """
+        Una sola consulta por página: billetera, dueño y número de pedidos llegan por
+        LEFT JOIN (los dos últimos como subconsultas agrupadas). Devuelve (filas, total).
+        """
+        order_counts = db.query(
+            base.Order.tenant_id.label("tenant_id"),
+            func.count(base.Order.id).label("total_orders")
+        ).group_by(base.Order.tenant_id).subquery()
+
+        owners = db.query(
+            base.User.tenant_id.label("tenant_id"),
+            func.min(base.User.email).label("email")
+        ).group_by(base.User.tenant_id).subquery()
+
+        total_orders = func.coalesce(order_counts.c.total_orders, 0)
+        balance = func.coalesce(base.Wallet.balance, 0)
+
+        query = db.query(
+            base.Tenant.id,
+            base.Tenant.name,
+            base.Tenant.slug,
+            base.Tenant.is_active,
+            base.Tenant.created_at,
+            owners.c.email,
+            balance.label("wallet_balance"),
+            total_orders.label("total_orders")
+        ).outerjoin(base.Wallet, base.Wallet.tenant_id == base.Tenant.id)\
+         .outerjoin(owners, owners.c.tenant_id == base.Tenant.id)\
+         .outerjoin(order_counts, order_counts.c.tenant_id == base.Tenant.id)
+
+        count_query = db.query(func.count(base.Tenant.id))
+        if q:
+            pattern = f"%{q}%"
+            name_filter = or_(base.Tenant.name.ilike(pattern), base.Tenant.slug.ilike(pattern))
+            query = query.filter(name_filter)
+            count_query = count_query.filter(name_filter)
+
+        sort_column = {
+            "created_at": base.Tenant.created_at,
+            "balance": balance,
+            "orders": total_orders,
+            "name": base.Tenant.name,
+        }[sort_by]
+        direction = asc if order == "asc" else desc
+        query = query.order_by(direction(sort_column), base.Tenant.id)
+
+        rows = query.offset((page - 1) * page_size).limit(page_size).all()
+
+        result = [
+            {
+                "id": r.id,
+                "name": r.name,
+                "slug": r.slug,
+                "email": r.email or "Sin dueño",
+                "wallet_balance": r.wallet_balance,
+                "total_orders": r.total_orders,
+                "is_active": r.is_active if r.is_active is not None else True,
+                "created_at": r.created_at
+            }
+            for r in rows
+        ]
+        return result, count_query.scalar()
+
     @staticmethod
-    def get_all_tenants(db: Session):
-        tenants = db.query(base.Tenant).all()
-        result = []
-        
-        for t in tenants:
-            wallet = db.query(base.Wallet).filter(base.Wallet.tenant_id == t.id).first()
-
-            owner = db.query(base.User).filter(base.User.tenant_id == t.id).first()
-        
-            total_orders = db.query(func.count(base.Order.id)).filter(base.Order.tenant_id == t.id).scalar()
-
-            result.append({
-                "id": t.id,
-                "name": t.name,
-                "slug": t.slug,
-                "email": owner.email if owner else "Sin dueño",
-                "wallet_balance": wallet.balance if wallet else 0,
-                "total_orders": total_orders or 0,  
-                "is_active": getattr(t, 'is_active', True)
-            })
-            
-        return result
\ No newline at end of file
+    def transactions_query(
+        db: Session,
+        tenant_id: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        sign: Optional[str] = None
+    ):
+        """Movimientos de billetera con el nombre del negocio, ya filtrados (sin orden ni límite)."""
+        query = db.query(
+            base.WalletTransaction.id,
+            base.WalletTransaction.amount,
+            base.WalletTransaction.created_at,
+            base.WalletTransaction.reason,
+            base.Tenant.name.label("tenant_name")
+        ).join(base.Tenant, base.Tenant.id == base.WalletTransaction.tenant_id)
+
+        if tenant_id:
+            query = query.filter(base.WalletTransaction.tenant_id == tenant_id)
+        if date_from:
+            query = query.filter(base.WalletTransaction.created_at >= date_from)
+        if date_to:
+            query = query.filter(base.WalletTransaction.created_at < date_to)
+        if sign == "credit":
+            query = query.filter(base.WalletTransaction.amount > 0)
+        elif sign == "debit":
+            query = query.filter(base.WalletTransaction.amount < 0)
+        return query
@@ -0,0 +1,91 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+
+from app.core.config import CATALOG_CACHE_MAX_ENTRIES, CATALOG_CACHE_TTL_SECONDS
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    # ETag fuerte: mismo contenido => mismos bytes => mismo hash
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class CatalogCache:
+    """
+    Caché de respuestas públicas ya serializadas, por negocio y por parámetros.
+    Cada negocio tiene un número de versión: cualquier escritura lo sube con
+    bump() y todas sus entradas anteriores dejan de ser alcanzables.
+    """
+
+    def __init__(self, max_entries: int = CATALOG_CACHE_MAX_ENTRIES, ttl_seconds: float = CATALOG_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, tenant_id: str) -> int:
+        with self._lock:
+            return self._versions.get(tenant_id, 0)
+
+    def get(self, tenant_id: str, params: Hashable) -> Tuple[Optional[CachedResponse], int]:
+        """Devuelve (respuesta o None, versión vigente) para guardar después con put()."""
+        with self._lock:
+            version = self._versions.get(tenant_id, 0)
+            key = (tenant_id, version, params)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None, version
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], version
+
+    def put(self, tenant_id: str, version: int, params: Hashable, body: bytes) -> CachedResponse:
+        cached = CachedResponse(body=body, etag=make_etag(body))
+        with self._lock:
+            # Si hubo una escritura mientras armábamos la respuesta, no la guardamos
+            if self._versions.get(tenant_id, 0) == version:
+                self._entries[(tenant_id, version, params)] = (time.monotonic() + self.ttl_seconds, cached)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return cached
+
+    def bump(self, tenant_id: str):
+        with self._lock:
+            self._versions[tenant_id] = self._versions.get(tenant_id, 0) + 1
+            for key in [k for k in self._entries if k[0] == tenant_id]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,133 @@
+import bisect
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    EVENT_BUFFER_MAX_TENANTS, EVENT_BUFFER_SIZE, EVENT_REPLAY_MAX, EVENT_RETENTION_SECONDS,
+)
+from app.models import base
+
+# --- EVENTOS NUMERADOS POR NEGOCIO ---
+# Cada evento en tiempo real (NEW_ORDER, ORDER_STATUS) lleva un número `seq` creciente por
+# negocio, asignado en la MISMA transacción que el cambio que lo origina:
+#   UPDATE tenants SET event_seq = event_seq + 1 ... RETURNING
+# El UPDATE bloquea la fila del negocio hasta el commit, así que los eventos se confirman
+# en el orden de su número (sin huecos visibles). El evento se guarda en tenant_events.
+#
+# Cada proceso recuerda los últimos EVENT_BUFFER_SIZE eventos de cada negocio (los recibe
+# del backplane, igual que los sockets). Al reconectar, el cliente manda el último `seq` que
+# vio y se le reenvía solo lo que falta: desde memoria si alcanza, si no desde la tabla.
+# Dos workers pueden publicar en distinto orden del que confirmaron, así que el anillo se
+# ordena por `seq`; mientras tenga un hueco, la reposición de ese tramo sale de la tabla.
+
+
+class Event(NamedTuple):
+    seq: int
+    payload: str  # JSON ya serializado, tal como se envió por el socket
+
+
+def record(db: Session, tenant_id: str, message: dict) -> dict:
+    """Numera el evento y lo guarda en la transacción actual (el commit lo hace quien llama)."""
+    seq = db.execute(
+        update(base.Tenant)
+        .where(base.Tenant.id == tenant_id)
+        .values(event_seq=base.Tenant.event_seq + 1)
+        .returning(base.Tenant.event_seq)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+    event = {"seq": seq, **message}
+    db.add(base.TenantEvent(tenant_id=tenant_id, seq=seq, payload=event))
+    return event
+
+
+def load(db: Session, tenant_id: str, after_seq: int, limit: int = EVENT_REPLAY_MAX) -> Optional[List[Event]]:
+    """Eventos posteriores a `after_seq` desde la tabla; None si son más que `limit`."""
+    rows = db.query(base.TenantEvent.seq, base.TenantEvent.payload)\
+        .filter(base.TenantEvent.tenant_id == tenant_id, base.TenantEvent.seq > after_seq)\
+        .order_by(base.TenantEvent.seq)\
+        .limit(limit + 1).all()
+    if len(rows) > limit:
+        return None
+    return [Event(seq, json.dumps(payload, default=str)) for seq, payload in rows]
+
+
+def prune(session_factory, retention_seconds: float = EVENT_RETENTION_SECONDS) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    db = session_factory()
+    try:
+        deleted = db.query(base.TenantEvent).filter(base.TenantEvent.created_at < cutoff)\
+            .delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+
+class EventBuffer:
+    """Últimos eventos de cada negocio en memoria (LRU por negocio, ordenados por seq)."""
+
+    def __init__(self, size: int = EVENT_BUFFER_SIZE, max_tenants: int = EVENT_BUFFER_MAX_TENANTS):
+        self.size = size
+        self.max_tenants = max_tenants
+        self._lock = threading.Lock()
+        self._buffers: "OrderedDict[str, List[Event]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def remember(self, tenant_id: str, payload: str):
+        try:
+            seq = json.loads(payload).get("seq")
+        except (ValueError, AttributeError):
+            return
+        if not isinstance(seq, int):
+            return
+        with self._lock:
+            buffer = self._buffers.get(tenant_id)
+            if buffer is None:
+                buffer = self._buffers[tenant_id] = []
+                if len(self._buffers) > self.max_tenants:
+                    self._buffers.popitem(last=False)
+            else:
+                self._buffers.move_to_end(tenant_id)
+            index = bisect.bisect_left(buffer, (seq,))
+            if index < len(buffer) and buffer[index].seq == seq:
+                return  # repetido
+            # Un evento que llega tarde ocupa su lugar; si sobran, se van los más viejos
+            buffer.insert(index, Event(seq, payload))
+            if len(buffer) > self.size:
+                del buffer[:len(buffer) - self.size]
+
+    def since(self, tenant_id: str, after_seq: int, require_complete: bool = True) -> Optional[List[Event]]:
+        """
+        Eventos en memoria posteriores a `after_seq`. Con `require_complete`, devuelve None si
+        el anillo no llega tan atrás o le falta algún evento del tramo (hay que ir a la tabla).
+        """
+        with self._lock:
+            buffer = self._buffers.get(tenant_id)
+            if not buffer:
+                return None if require_complete else []
+            events = [event for event in buffer if event.seq > after_seq]
+            contiguous = all(event.seq == after_seq + 1 + i for i, event in enumerate(events))
+            if require_complete and (buffer[0].seq > after_seq + 1 or not contiguous):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return events
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tenants": len(self._buffers),
+                "events": sum(len(b) for b in self._buffers.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+event_buffer = EventBuffer()
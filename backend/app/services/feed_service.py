@@ -0,0 +1,48 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from app.models import base
+from app.services.like_service import like_counter
+from app.services.pagination import paginate
+
+# Orden del feed: más nuevos primero, con el id como desempate estable
+FEED_KEYS = [(base.Post.created_at, "desc"), (base.Post.id, "desc")]
+
+
+def get_feed_page(
+    db: Session, tenant_id: str, client_identifier: str, cursor: Optional[str], limit: int
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Una página del feed con el conteo de likes y si `client_identifier` ya dio like,
+    en una sola consulta y sin agregaciones: el conteo sale de Post.likes_count
+    (más lo que el buffer aún no vuelca) y el like propio de un LEFT JOIN sobre
+    el índice único (post_id, client_identifier).
+    """
+    query = db.query(
+        base.Post.id,
+        base.Post.content,
+        base.Post.image_url,
+        base.Post.image_variants,
+        base.Post.created_at,
+        base.Post.likes_count,
+        base.Like.id.label("own_like_id"),
+    ).outerjoin(base.Like, and_(
+        base.Like.post_id == base.Post.id,
+        base.Like.client_identifier == client_identifier
+    )).filter(base.Post.tenant_id == tenant_id)
+    rows, next_cursor = paginate(query, FEED_KEYS, cursor, limit, lambda r: (r.created_at, r.id))
+
+    return [
+        {
+            "id": r.id,
+            "content": r.content,
+            "image_url": r.image_url,
+            "image_variants": r.image_variants,
+            "created_at": r.created_at,
+            "likes_count": max((r.likes_count or 0) + like_counter.pending(r.id), 0),
+            "is_liked": r.own_like_id is not None,
+        }
+        for r in rows
+    ], next_cursor
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import (
+    IMAGE_AVIF_QUALITY, IMAGE_JPEG_QUALITY, IMAGE_MAX_PIXELS, IMAGE_PROCESS_WORKERS, IMAGE_WEBP_QUALITY,
+)
+
+# --- OPTIMIZACIÓN DE IMÁGENES ---
+# Antes de guardar, cada imagen se decodifica, se endereza según su EXIF y se vuelve a
+# codificar sin metadatos en varios anchos: AVIF (si Pillow lo soporta), WebP y un respaldo
+# JPEG (PNG si tiene transparencia). Los nombres llevan el hash del contenido original, así
+# que la misma foto nunca se procesa a dos rutas distintas y se puede cachear para siempre.
+# El trabajo de CPU corre en un pool de procesos para no frenar a los workers web. El
+# original se lee del archivo que ya dejó Starlette (validado en app/services/upload_service.py)
+# justo antes de mandarlo al pool: en el worker web solo vive mientras se procesa, y su
+# tamaño está acotado por UPLOAD_MAX_REQUEST_BYTES.
+
+
+class ImageError(Exception):
+    """El archivo no es una imagen válida o excede los límites."""
+
+
+class EncodedImage(NamedTuple):
+    width: int
+    fmt: str            # "avif" | "webp" | "jpeg" | "png"
+    content_type: str
+    data: bytes
+
+
+class ProcessedImage(NamedTuple):
+    digest: str
+    width: int
+    height: int
+    fallback_fmt: str
+    encoded: Tuple[EncodedImage, ...]
+
+
+class StoredImage(NamedTuple):
+    url: str            # respaldo más grande: lo que va en image_url / additional_images
+    variants: dict      # anchos y URLs por formato, para armar <picture>/srcset
+
+
+# --- Trabajo de CPU (corre en los procesos del pool: solo funciones de módulo) ---
+
+def _target_widths(original: int, widths: Sequence[int]) -> List[int]:
+    # Nunca agrandamos: los anchos mayores al original se reemplazan por el original
+    targets = sorted({w for w in widths if w < original})
+    if original <= max(widths):
+        targets.append(original)
+    else:
+        targets.append(max(widths))
+    return sorted(set(targets))
+
+
+def process_image(data: bytes, widths: Sequence[int]) -> ProcessedImage:
+    from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            # Solo lee la cabecera: rechazamos bombas de descompresión antes de decodificar
+            if probe.width * probe.height > IMAGE_MAX_PIXELS:
+                raise ImageError(f"Imagen demasiado grande ({probe.width}x{probe.height})")
+            image = ImageOps.exif_transpose(probe)
+            image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageError(f"Imagen inválida: {e}")
+
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    fallback_fmt = "png" if has_alpha else "jpeg"
+    formats = (["avif"] if features.check("avif") else []) + ["webp", fallback_fmt]
+
+    encoded = []
+    for width in _target_widths(image.width, widths):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            # Guardamos sin exif/icc/xmp: los metadatos (GPS, cámara) no salen del servidor
+            if fmt == "avif":
+                resized.save(buffer, "AVIF", quality=IMAGE_AVIF_QUALITY)
+            elif fmt == "webp":
+                resized.save(buffer, "WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+            elif fmt == "jpeg":
+                resized.save(buffer, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+            else:
+                resized.save(buffer, "PNG", optimize=True)
+            encoded.append(EncodedImage(width, fmt, f"image/{fmt}", buffer.getvalue()))
+
+    return ProcessedImage(digest, image.width, image.height, fallback_fmt, tuple(encoded))
+
+
+# --- Pool de procesos ---
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # "spawn": hacer fork de un proceso con hilos (uvicorn, pools de DB) no es seguro
+        _pool = ProcessPoolExecutor(
+            max_workers=IMAGE_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def process_many(files: List[BinaryIO], widths: Sequence[int]) -> List[ProcessedImage]:
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+
+    async def process(f: BinaryIO) -> ProcessedImage:
+        data = await asyncio.to_thread(f.read)
+        return await loop.run_in_executor(pool, process_image, data, tuple(widths))
+
+    return await asyncio.gather(*(process(f) for f in files))
+
+
+# --- Procesar y subir ---
+
+def _object_path(prefix: str, processed: ProcessedImage, image: EncodedImage) -> str:
+    return f"{prefix}/{processed.digest}/{image.width}.{image.fmt}"
+
+
+async def store_images(files: List[BinaryIO], prefix: str, widths: Sequence[int]) -> List[StoredImage]:
+    """Optimiza y sube varias imágenes (archivos abiertos, al inicio); devuelve una StoredImage por entrada."""
+    # Import diferido: los procesos del pool importan este módulo y no necesitan el cliente de almacenamiento
+    from app.services.storage_service import UploadRequest, storage
+
+    if not files:
+        return []
+    processed_list = await process_many(files, widths)
+
+    # Las rutas dependen solo del contenido: subir dos veces lo mismo es idempotente (upsert)
+    requests = [
+        UploadRequest(_object_path(prefix, processed, image), image.data, image.content_type, upsert=True)
+        for processed in processed_list for image in processed.encoded
+    ]
+    urls = iter(await storage.upload_many(requests))
+
+    stored = []
+    for processed in processed_list:
+        formats: dict = {}
+        for image in processed.encoded:
+            formats.setdefault(image.fmt, {})[str(image.width)] = next(urls)
+        largest = max(image.width for image in processed.encoded)
+        fallback_url = formats[processed.fallback_fmt][str(largest)]
+        stored.append(StoredImage(fallback_url, {
+            "fallback": fallback_url,
+            # Tamaño de la variante más grande (sirve para reservar el espacio y evitar saltos)
+            "width": largest,
+            "height": max(1, round(processed.height * largest / processed.width)),
+            "formats": formats,
+        }))
+    return stored
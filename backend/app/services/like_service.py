@@ -0,0 +1,99 @@
+import threading
+import uuid
+from typing import Dict
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import base
+
+# --- LIKES CON CONTADOR DESNORMALIZADO ---
+# La fila Like es la fuente de verdad (única por post + cliente). El contador
+# Post.likes_count se actualiza con escritura diferida: cada toggle suma +1/-1 en memoria
+# y una tarea periódica vuelca todos los deltas en un solo lote. Así un post viral no
+# convierte su fila en un punto caliente con un UPDATE por clic.
+
+
+class LikeCounterBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, int] = {}
+
+    def add(self, post_id: str, delta: int):
+        with self._lock:
+            value = self._pending.get(post_id, 0) + delta
+            if value:
+                self._pending[post_id] = value
+            else:
+                self._pending.pop(post_id, None)
+
+    def pending(self, post_id: str) -> int:
+        """Delta aún no volcado; sirve para que el feed muestre el conteo al momento."""
+        with self._lock:
+            return self._pending.get(post_id, 0)
+
+    def flush(self, session_factory) -> int:
+        """Vuelca los deltas acumulados con un único UPDATE por lotes. Devuelve cuántos posts tocó."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        db = session_factory()
+        try:
+            db.connection().execute(
+                update(base.Post.__table__)
+                .where(base.Post.__table__.c.id == bindparam("post_id"))
+                .values(likes_count=base.Post.__table__.c.likes_count + bindparam("delta")),
+                [{"post_id": post_id, "delta": delta} for post_id, delta in batch.items()]
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # No perdemos los deltas: regresan al buffer para el siguiente intento
+            for post_id, delta in batch.items():
+                self.add(post_id, delta)
+            raise
+        finally:
+            db.close()
+        return len(batch)
+
+
+like_counter = LikeCounterBuffer()
+
+
+def _insert_ignoring_duplicates(db: Session, values: dict):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(base.Like).values(**values)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(base.Like).values(**values)
+    else:
+        raise RuntimeError(f"Motor no soportado para likes: {dialect}")
+    return db.execute(stmt.on_conflict_do_nothing(index_elements=["post_id", "client_identifier"]))
+
+
+def toggle_like(db: Session, post_id: str, client_identifier: str) -> str:
+    """
+    Quita el like si existe; si no, lo inserta. Ambas operaciones son idempotentes:
+    dos clics simultáneos nunca duplican filas ni descuadran el contador.
+    """
+    deleted = db.query(base.Like).filter(
+        base.Like.post_id == post_id,
+        base.Like.client_identifier == client_identifier
+    ).delete(synchronize_session=False)
+    if deleted:
+        db.commit()
+        like_counter.add(post_id, -deleted)
+        return "unliked"
+
+    result = _insert_ignoring_duplicates(db, {
+        "id": str(uuid.uuid4()),
+        "post_id": post_id,
+        "client_identifier": client_identifier,
+    })
+    db.commit()
+    if result.rowcount:
+        like_counter.add(post_id, 1)
+    return "liked"
@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import base
+
+
+def split_extras(extras_names: Optional[str]) -> List[str]:
+    if not extras_names:
+        return []
+    return [n.strip() for n in extras_names.split(",")]
+
+
+class CartCatalog(NamedTuple):
+    """Productos, variantes y extras que toca un carrito, indexados para resolverlo en memoria."""
+    items: Dict[str, base.Item]
+    variants: Dict[Tuple[str, str], base.ItemVariant]  # (item_id, nombre) -> variante
+    extras: Dict[Tuple[str, str], base.ItemExtra]      # (item_id, nombre) -> extra
+
+    def item(self, product_id: str) -> Optional[base.Item]:
+        return self.items.get(product_id)
+
+    def variant(self, item_id: str, name: str) -> Optional[base.ItemVariant]:
+        return self.variants.get((item_id, name))
+
+    def extras_for(self, item_id: str, names: Iterable[str]) -> List[base.ItemExtra]:
+        # Igual que antes: los extras que no existen simplemente se ignoran
+        found = []
+        for name in dict.fromkeys(names):
+            extra = self.extras.get((item_id, name))
+            if extra is not None:
+                found.append(extra)
+        return found
+
+
+def load_cart_catalog(db: Session, tenant_id: str, cart_lines) -> CartCatalog:
+    """
+    Carga todo lo que referencia el carrito en un número fijo de consultas (3),
+    siempre limitado al negocio: un producto de otro tenant simplemente no existe.
+    """
+    product_ids = {line.product_id for line in cart_lines}
+    if not product_ids:
+        return CartCatalog({}, {}, {})
+
+    items = db.query(base.Item).filter(
+        base.Item.tenant_id == tenant_id,
+        base.Item.id.in_(product_ids)
+    ).all()
+    items_by_id = {item.id: item for item in items}
+    if not items_by_id:
+        return CartCatalog({}, {}, {})
+
+    variant_names = {line.variant_name for line in cart_lines if line.variant_name}
+    variants = {}
+    if variant_names:
+        rows = db.query(base.ItemVariant).filter(
+            base.ItemVariant.item_id.in_(items_by_id.keys()),
+            base.ItemVariant.name.in_(variant_names)
+        ).all()
+        # Si hubiera nombres repetidos nos quedamos con el primero, como hacía .first()
+        for v in rows:
+            variants.setdefault((v.item_id, v.name), v)
+
+    extra_names = {name for line in cart_lines for name in split_extras(line.extras_names)}
+    extras = {}
+    if extra_names:
+        rows = db.query(base.ItemExtra).filter(
+            base.ItemExtra.item_id.in_(items_by_id.keys()),
+            base.ItemExtra.name.in_(extra_names)
+        ).all()
+        for e in rows:
+            extras.setdefault((e.item_id, e.name), e)
+
+    return CartCatalog(items_by_id, variants, extras)
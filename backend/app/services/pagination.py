@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+
+# --- PAGINACIÓN POR CURSOR (KEYSET) ---
+# El cursor es opaco para el cliente: base64 de los valores de la última fila vista.
+# Con un índice sobre las columnas de orden, cada página cuesta lo mismo sin importar
+# qué tan profundo se haya navegado (a diferencia de OFFSET).
+
+MAX_PAGE_SIZE = 100
+
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("tamaño de cursor inesperado")
+        return [_decode_value(v) for v in values]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+def keyset_filter(keys: Sequence[Tuple[Any, str]], values: Sequence[Any]):
+    """
+    Condición "viene después de `values`" para un ORDER BY compuesto.
+    `keys` es una lista de (columna, "asc" | "desc") en el mismo orden del ORDER BY.
+    Si todas las columnas van en la misma dirección se usa una comparación de filas,
+    `(a, b) < (x, y)`, que Postgres resuelve como un solo rango sobre el índice; el
+    OR/AND equivalente lo obliga a filtrar fila por fila.
+    """
+    directions = {direction for _, direction in keys}
+    if len(keys) > 1 and len(directions) == 1:
+        columns, bound = tuple_(*(column for column, _ in keys)), tuple_(*values)
+        return columns > bound if directions == {"asc"} else columns < bound
+    clauses = []
+    for i, (column, direction) in enumerate(keys):
+        equals = [keys[j][0] == values[j] for j in range(i)]
+        after = column > values[i] if direction == "asc" else column < values[i]
+        clauses.append(and_(*equals, after))
+    return or_(*clauses)
+
+
+def order_by_keys(keys: Sequence[Tuple[Any, str]]):
+    return [column.asc() if direction == "asc" else column.desc() for column, direction in keys]
+
+
+def paginate(query, keys: Sequence[Tuple[Any, str]], cursor: Optional[str], limit: int, key_fn, skip: int = 0):
+    """
+    Aplica orden + cursor + límite a `query` y devuelve (filas, next_cursor).
+    `key_fn(fila)` debe devolver los valores de las columnas de orden para esa fila.
+    Se pide una fila extra para saber si existe una página siguiente.
+    `skip` solo se respeta sin cursor, para clientes que todavía paginan por OFFSET.
+    """
+    if cursor:
+        query = query.filter(keyset_filter(keys, decode_cursor(cursor, len(keys))))
+    elif skip:
+        query = query.offset(skip)
+    rows = query.order_by(*order_by_keys(keys)).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*key_fn(rows[-1]))
+    return rows, next_cursor
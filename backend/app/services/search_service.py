@@ -0,0 +1,208 @@
+import re
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import base
+
+# --- BÚSQUEDA DEL CATÁLOGO ---
+# En PostgreSQL usamos índices GIN de trigramas (pg_trgm, ver app/database/migrations.py):
+# Postgres los mantiene solo en cada INSERT/UPDATE/DELETE y sirven tanto para ILIKE
+# como para el operador de similitud `<%`, que tolera errores de dedo.
+# En cualquier otro motor (SQLite en pruebas) usamos un índice invertido en memoria.
+
+MAX_SEARCH_RESULTS = 200
+# Similitud mínima (0..1) para que una palabra con errores cuente como coincidencia
+MIN_TOKEN_SIMILARITY = 0.3
+# Peso de la descripción frente al nombre al ordenar por relevancia
+DESCRIPTION_WEIGHT = 0.6
+
+_PG_SEARCH_SQL = text("""
+    SELECT id
+    FROM items
+    WHERE tenant_id = :tenant_id
+      AND (
+        name ILIKE :pattern
+        OR description ILIKE :pattern
+        OR :term <% name
+        OR :term <% description
+      )
+    ORDER BY GREATEST(
+        word_similarity(:term, name),
+        word_similarity(:term, coalesce(description, '')) * :description_weight
+    ) DESC, updated_at DESC, id DESC
+    LIMIT :limit
+""")
+
+
+def normalize(value: str) -> List[str]:
+    """Minúsculas, sin acentos, separado en palabras alfanuméricas."""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c)).lower()
+    return re.findall(r"[a-z0-9ñ]+", value)
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(query_token: str, query_grams: Set[str], doc_token: str, doc_grams: Set[str]) -> float:
+    if doc_token.startswith(query_token):
+        return 1.0
+    union = len(query_grams | doc_grams)
+    return len(query_grams & doc_grams) / union if union else 0.0
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class _Doc(NamedTuple):
+    updated_at: datetime
+    fields: Tuple[Tuple[float, Tuple[Tuple[str, frozenset], ...]], ...]  # (peso, palabras)
+
+
+class InvertedIndex:
+    """Índice invertido de trigramas por negocio, construido bajo demanda."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Dict[str, _Doc]] = {}
+        self._postings: Dict[str, Dict[str, Set[str]]] = {}
+        # Negocios cuyo índice se está cargando (la consulta corre fuera del lock): los
+        # cambios que llegan mientras tanto se guardan aquí (None = borrado) y se aplican
+        # encima de lo leído, que puede ser anterior a ellos
+        self._building: Dict[str, Dict[str, Optional[tuple]]] = {}
+
+    def ensure_tenant(self, db: Session, tenant_id: str):
+        with self._lock:
+            if tenant_id in self._docs:
+                return
+            self._building.setdefault(tenant_id, {})
+        rows = db.query(base.Item.id, base.Item.name, base.Item.description, base.Item.updated_at)\
+            .filter(base.Item.tenant_id == tenant_id).all()
+        with self._lock:
+            if tenant_id in self._docs:
+                return
+            self._docs[tenant_id] = {}
+            self._postings[tenant_id] = {}
+            for row in rows:
+                self._add(tenant_id, row.id, row.name, row.description, row.updated_at)
+            for item_id, change in self._building.pop(tenant_id, {}).items():
+                self._remove(tenant_id, item_id)
+                if change is not None:
+                    self._add(tenant_id, item_id, *change)
+
+    def upsert(self, tenant_id: str, item_id: str, name: str, description: str, updated_at: datetime):
+        with self._lock:
+            if tenant_id not in self._docs:
+                # Si el negocio aún no se indexó, se construirá completo en la primera búsqueda
+                if tenant_id in self._building:
+                    self._building[tenant_id][item_id] = (name, description, updated_at)
+                return
+            self._remove(tenant_id, item_id)
+            self._add(tenant_id, item_id, name, description, updated_at)
+
+    def remove(self, tenant_id: str, item_id: str):
+        with self._lock:
+            if tenant_id in self._docs:
+                self._remove(tenant_id, item_id)
+            elif tenant_id in self._building:
+                self._building[tenant_id][item_id] = None
+
+    def search(self, tenant_id: str, term: str, limit: int) -> List[str]:
+        query_tokens = [(t, trigrams(t)) for t in normalize(term)]
+        if not query_tokens:
+            return []
+        with self._lock:
+            docs = self._docs.get(tenant_id, {})
+            postings = self._postings.get(tenant_id, {})
+            candidates: Set[str] = set()
+            for _, grams in query_tokens:
+                for gram in grams:
+                    candidates |= postings.get(gram, set())
+
+            scored = []
+            for item_id in candidates:
+                doc = docs[item_id]
+                total = 0.0
+                # Cada palabra buscada debe coincidir (aunque sea con errores) en algún campo
+                for q_token, q_grams in query_tokens:
+                    best = 0.0
+                    for weight, tokens in doc.fields:
+                        for d_token, d_grams in tokens:
+                            similarity = _similarity(q_token, q_grams, d_token, d_grams)
+                            if similarity >= MIN_TOKEN_SIMILARITY:
+                                best = max(best, weight * similarity)
+                    if not best:
+                        break
+                    total += best
+                else:
+                    scored.append((total / len(query_tokens), doc.updated_at or datetime.min, item_id))
+
+        scored.sort(reverse=True)
+        return [item_id for _, _, item_id in scored[:limit]]
+
+    def _add(self, tenant_id: str, item_id: str, name: str, description: str, updated_at: datetime):
+        fields = []
+        for weight, value in ((1.0, name), (DESCRIPTION_WEIGHT, description)):
+            fields.append((weight, tuple((t, frozenset(trigrams(t))) for t in normalize(value))))
+        doc = _Doc(updated_at=updated_at, fields=tuple(fields))
+        self._docs[tenant_id][item_id] = doc
+        postings = self._postings[tenant_id]
+        for _, tokens in doc.fields:
+            for _, grams in tokens:
+                for gram in grams:
+                    postings.setdefault(gram, set()).add(item_id)
+
+    def _remove(self, tenant_id: str, item_id: str):
+        doc = self._docs[tenant_id].pop(item_id, None)
+        if doc is None:
+            return
+        postings = self._postings[tenant_id]
+        for _, tokens in doc.fields:
+            for _, grams in tokens:
+                for gram in grams:
+                    ids = postings.get(gram)
+                    if ids is not None:
+                        ids.discard(item_id)
+                        if not ids:
+                            del postings[gram]
+
+
+class CatalogSearch:
+    def __init__(self):
+        self.fallback = InvertedIndex()
+
+    def search_item_ids(self, db: Session, tenant_id: str, term: str, limit: int = MAX_SEARCH_RESULTS) -> List[str]:
+        """Ids de productos del negocio que coinciden con `term`, del más al menos relevante."""
+        term = (term or "").strip()
+        if not term:
+            return []
+        if db.get_bind().dialect.name == "postgresql":
+            rows = db.execute(_PG_SEARCH_SQL, {
+                "tenant_id": tenant_id,
+                "term": term,
+                "pattern": f"%{_escape_like(term)}%",
+                "description_weight": DESCRIPTION_WEIGHT,
+                "limit": limit,
+            })
+            return [row.id for row in rows]
+        self.fallback.ensure_tenant(db, tenant_id)
+        return self.fallback.search(tenant_id, term, limit)
+
+    # Ganchos de sincronización: Postgres mantiene sus índices solo,
+    # el índice en memoria necesita enterarse de cada cambio.
+    def index_item(self, item: base.Item):
+        self.fallback.upsert(item.tenant_id, item.id, item.name, item.description, item.updated_at)
+
+    def remove_item(self, tenant_id: str, item_id: str):
+        self.fallback.remove(tenant_id, item_id)
+
+
+catalog_search = CatalogSearch()
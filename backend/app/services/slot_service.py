@@ -0,0 +1,217 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import SLOT_CACHE_MAX_ENTRIES, SLOT_CACHE_TTL_SECONDS
+from app.models import base
+from app.services.tenant_cache import TenantSnapshot
+
+# --- MOTOR DE DISPONIBILIDAD DE CITAS ---
+# Para cada día se generan los slots a partir del horario (BusinessHour) y del intervalo
+# del negocio, y las citas tomadas se marcan en un bitmap (bit i = slot i ocupado).
+# Un rango de N días se resuelve con una sola consulta de citas para los días que no
+# estén en caché. Crear una cita o cambiar su estado invalida el día afectado: en el
+# proceso que la escribe y, vía los eventos NEW_ORDER / ORDER_STATUS del backplane, en
+# todos los demás (apply_event). Como esa invalidación llega un instante después, la
+# reserva vuelve a comprobar el slot dentro de su transacción (slot_taken).
+
+DEFAULT_INTERVAL_MINUTES = 30
+
+
+class DaySlots(NamedTuple):
+    day: date
+    starts: Tuple[int, ...]      # minutos desde las 00:00 de cada slot
+    booked: int                  # bitmap de slots ocupados
+    busy_times: Tuple[str, ...]  # "HH:MM" de cada cita (formato que espera el modal)
+
+    def to_dict(self) -> dict:
+        return {
+            "date": self.day.isoformat(),
+            "slots": [_format_minutes(m) for m in self.starts],
+            # Un carácter por slot: "1" libre, "0" ocupado
+            "bitmap": "".join("0" if self.booked >> i & 1 else "1" for i in range(len(self.starts))),
+            "free_count": len(self.starts) - bin(self.booked).count("1"),
+            "busy_times": list(self.busy_times),
+        }
+
+
+def _parse_minutes(value: str) -> int:
+    hours, minutes = value.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def _format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _day_of_week(day: date) -> int:
+    # Misma convención que el frontend (Date.getDay): 0 = domingo
+    return (day.weekday() + 1) % 7
+
+
+def day_starts(tenant: TenantSnapshot, day: date) -> Tuple[int, ...]:
+    """Inicios de slot del día según el horario del negocio (vacío si está cerrado)."""
+    hours = next((bh for bh in tenant.business_hours if bh.day_of_week == _day_of_week(day)), None)
+    if hours is None or hours.is_closed:
+        return ()
+    interval = tenant.appointment_interval or DEFAULT_INTERVAL_MINUTES
+    try:
+        open_min, close_min = _parse_minutes(hours.open_time), _parse_minutes(hours.close_time)
+    except (ValueError, AttributeError):
+        return ()
+    if close_min == 0:
+        close_min = 24 * 60  # "00:00" como cierre significa medianoche
+    return tuple(range(open_min, close_min, interval))
+
+
+def build_day(tenant: TenantSnapshot, day: date, appointments: List[datetime]) -> DaySlots:
+    starts = day_starts(tenant, day)
+    interval = tenant.appointment_interval or DEFAULT_INTERVAL_MINUTES
+    booked = 0
+    if starts:
+        first = starts[0]
+        for appointment in appointments:
+            index = (appointment.hour * 60 + appointment.minute - first) // interval
+            if 0 <= index < len(starts):
+                booked |= 1 << index
+    busy_times = tuple(sorted({a.strftime("%H:%M") for a in appointments}))
+    return DaySlots(day, starts, booked, busy_times)
+
+
+def slot_window(tenant: TenantSnapshot, appointment: datetime) -> Tuple[datetime, datetime]:
+    """Intervalo [inicio, fin) del slot que ocupa la cita, con el mismo criterio que build_day."""
+    starts = day_starts(tenant, appointment.date())
+    interval = tenant.appointment_interval or DEFAULT_INTERVAL_MINUTES
+    if starts:
+        index = (appointment.hour * 60 + appointment.minute - starts[0]) // interval
+        if 0 <= index < len(starts):
+            begin = datetime.combine(appointment.date(), datetime.min.time()) + timedelta(minutes=starts[index])
+            return begin, begin + timedelta(minutes=interval)
+    # Fuera del horario: solo choca con otra cita a la misma hora
+    return appointment, appointment + timedelta(minutes=1)
+
+
+def slot_taken(db: Session, tenant: TenantSnapshot, appointment: datetime, exclude_order_id: str) -> bool:
+    begin, end = slot_window(tenant, appointment)
+    return db.query(base.Order.id).filter(
+        base.Order.tenant_id == tenant.id,
+        base.Order.id != exclude_order_id,
+        base.Order.status != "cancelled",
+        base.Order.appointment_datetime >= begin,
+        base.Order.appointment_datetime < end
+    ).first() is not None
+
+
+def _load_appointments(db: Session, tenant_id: str, days: List[date]) -> Dict[date, List[datetime]]:
+    by_day: Dict[date, List[datetime]] = {d: [] for d in days}
+    start = datetime.combine(min(days), datetime.min.time())
+    end = datetime.combine(max(days) + timedelta(days=1), datetime.min.time())
+    rows = db.query(base.Order.appointment_datetime).filter(
+        base.Order.tenant_id == tenant_id,
+        base.Order.status != "cancelled",
+        base.Order.appointment_datetime >= start,
+        base.Order.appointment_datetime < end
+    ).all()
+    for (appointment,) in rows:
+        if appointment is not None and appointment.date() in by_day:
+            by_day[appointment.date()].append(appointment)
+    return by_day
+
+
+class SlotCache:
+    """
+    Caché LRU + TTL de DaySlots por (negocio, día). Las escrituras de citas llaman a
+    invalidate() después del commit; la generación por negocio evita guardar un cálculo
+    que empezó antes de la invalidación.
+    """
+
+    def __init__(self, max_entries: int = SLOT_CACHE_MAX_ENTRIES, ttl_seconds: float = SLOT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, date], Tuple[float, DaySlots]]" = OrderedDict()
+        self._days_by_tenant: Dict[str, set] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_range(self, db: Session, tenant: TenantSnapshot, start: date, days: int) -> List[DaySlots]:
+        wanted = [start + timedelta(days=i) for i in range(days)]
+        found: Dict[date, DaySlots] = {}
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generations.get(tenant.id, 0)
+            for day in wanted:
+                entry = self._entries.get((tenant.id, day))
+                if entry is not None and entry[0] >= now:
+                    self._entries.move_to_end((tenant.id, day))
+                    found[day] = entry[1]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        missing = [day for day in wanted if day not in found]
+        if missing:
+            appointments = _load_appointments(db, tenant.id, missing)
+            computed = {day: build_day(tenant, day, appointments[day]) for day in missing}
+            found.update(computed)
+            self._store(tenant.id, generation, computed)
+        return [found[day] for day in wanted]
+
+    def invalidate(self, tenant_id: str, day: Optional[date] = None):
+        """Sin `day` se descarta todo el negocio (ej: cambió el horario o el intervalo)."""
+        with self._lock:
+            self._generations[tenant_id] = self._generations.get(tenant_id, 0) + 1
+            days = self._days_by_tenant.get(tenant_id, set())
+            for cached_day in ([day] if day is not None else list(days)):
+                self._entries.pop((tenant_id, cached_day), None)
+                days.discard(cached_day)
+
+    def apply_event(self, tenant_id: str, payload: str):
+        """Handler del backplane: descarta el día de una cita creada o que cambió de estado."""
+        try:
+            message = json.loads(payload)
+            if message.get("event") not in ("NEW_ORDER", "ORDER_STATUS") or not message.get("appointment"):
+                return
+            day = datetime.fromisoformat(message["appointment"]).date()
+        except (ValueError, TypeError, AttributeError):
+            return
+        self.invalidate(tenant_id, day)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _store(self, tenant_id: str, generation: int, computed: Dict[date, DaySlots]):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if self._generations.get(tenant_id, 0) != generation:
+                return
+            days = self._days_by_tenant.setdefault(tenant_id, set())
+            for day, slots in computed.items():
+                self._entries[(tenant_id, day)] = (expires_at, slots)
+                self._entries.move_to_end((tenant_id, day))
+                days.add(day)
+            while len(self._entries) > self.max_entries:
+                (old_tenant, old_day), _ = self._entries.popitem(last=False)
+                old_days = self._days_by_tenant.get(old_tenant)
+                if old_days is not None:
+                    old_days.discard(old_day)
+                    if not old_days:
+                        del self._days_by_tenant[old_tenant]
+
+
+slot_cache = SlotCache()
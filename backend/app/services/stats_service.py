@@ -0,0 +1,120 @@
+import threading
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import bindparam, event, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models import base
+
+# --- ESTADÍSTICAS DE LA PLATAFORMA ---
+# El dashboard del super admin lee 4 filas de platform_counters en lugar de recorrer
+# tablas completas. Los caminos de escritura registran deltas con record(db, ...):
+# solo cuentan si la transacción hace commit, se acumulan en memoria y una tarea
+# periódica los vuelca en lote. reconcile() recalcula los valores exactos cada cierto
+# tiempo para corregir cualquier desvío (reinicios, otros procesos, errores).
+
+# Clave del contador -> consulta exacta usada al reconciliar
+EXACT_QUERIES = {
+    "total_tenants": select(func.count(base.Tenant.id)),
+    "total_revenue": select(func.coalesce(func.sum(base.Wallet.balance), 0)),
+    "active_posts": select(func.count(base.Post.id)),
+    "active_users": select(func.count(base.User.id)),
+}
+
+_SESSION_KEY = "platform_stat_deltas"
+
+
+def record(db: Session, key: str, delta: float):
+    """Anota un delta ligado a la transacción actual de `db`."""
+    pending = db.info.setdefault(_SESSION_KEY, {})
+    pending[key] = pending.get(key, 0) + delta
+
+
+class PlatformStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, float] = {}
+
+    def add(self, key: str, delta: float):
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + delta
+
+    def read(self, db: Session) -> dict:
+        rows = dict(db.query(base.PlatformCounter.key, base.PlatformCounter.value).all())
+        if any(key not in rows for key in EXACT_QUERIES):
+            # Primera lectura en una base nueva: calculamos los valores exactos una vez
+            self.reconcile(db)
+            rows = dict(db.query(base.PlatformCounter.key, base.PlatformCounter.value).all())
+        with self._lock:
+            pending = dict(self._pending)
+        return {key: rows.get(key, 0) + pending.get(key, 0) for key in EXACT_QUERIES}
+
+    def flush(self, session_factory) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        batch = {k: v for k, v in batch.items() if v}
+        if not batch:
+            return 0
+
+        db = session_factory()
+        try:
+            table = base.PlatformCounter.__table__
+            db.connection().execute(
+                update(table)
+                .where(table.c.key == bindparam("counter_key"))
+                .values(value=table.c.value + bindparam("delta")),
+                [{"counter_key": k, "delta": v} for k, v in batch.items()]
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            for key, delta in batch.items():
+                self.add(key, delta)
+            raise
+        finally:
+            db.close()
+        return len(batch)
+
+    def reconcile(self, db: Session):
+        """Reemplaza cada contador por su valor exacto, calculado dentro del mismo UPDATE."""
+        existing = {key for (key,) in db.query(base.PlatformCounter.key).all()}
+        for key in EXACT_QUERIES:
+            if key not in existing:
+                db.add(base.PlatformCounter(key=key, value=0.0))
+        db.flush()
+
+        table = base.PlatformCounter.__table__
+        now = datetime.utcnow()
+        for key, exact in EXACT_QUERIES.items():
+            db.execute(
+                update(table)
+                .where(table.c.key == key)
+                .values(value=exact.scalar_subquery(), reconciled_at=now)
+            )
+        db.commit()
+
+    def reconcile_with(self, session_factory):
+        # Vaciamos antes lo pendiente de este proceso para no sumarlo dos veces después
+        self.flush(session_factory)
+        db = session_factory()
+        try:
+            self.reconcile(db)
+        finally:
+            db.close()
+
+
+platform_stats = PlatformStats()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_deltas(session: Session):
+    deltas = session.info.pop(_SESSION_KEY, None)
+    if deltas:
+        for key, delta in deltas.items():
+            platform_stats.add(key, delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_deltas(session: Session):
+    session.info.pop(_SESSION_KEY, None)
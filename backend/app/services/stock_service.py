@@ -0,0 +1,106 @@
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from sqlalchemy import Float, String, column, update, values
+from sqlalchemy.orm import Session
+
+from app.models import base
+
+# --- RESERVA DE STOCK SIN BLOQUEOS ---
+# En lugar de leer el stock a Python y escribirlo de vuelta (sobreventa bajo concurrencia)
+# o bloquear filas con FOR UPDATE (serializa todo el checkout), cada descuento es un
+# UPDATE condicional: solo se aplica si todavía hay stock suficiente.
+# Todas las filas de una misma tabla se descuentan en un único UPDATE ... FROM (VALUES ...).
+
+STOCK_MODELS = (base.Item, base.ItemVariant, base.ItemExtra)
+
+
+class StockLine(NamedTuple):
+    line: int       # posición de la línea en el carrito (0..n-1)
+    label: str      # texto para el cliente, ej: "Pizza (Grande)"
+
+
+class StockFailure(NamedTuple):
+    line: int
+    label: str
+    model: str
+    row_id: str
+
+
+class StockUnavailable(Exception):
+    def __init__(self, failures: List[StockFailure]):
+        self.failures = failures
+        labels = list(dict.fromkeys(f.label for f in failures))
+        super().__init__("Stock insuficiente: " + ", ".join(labels))
+
+
+class StockReservation:
+    """Acumula los descuentos de un pedido y los aplica todos juntos con apply()."""
+
+    def __init__(self):
+        # (modelo, id) -> [cantidad total, líneas que la pidieron]
+        self._needs: Dict[Tuple[type, str], list] = {}
+        # Filas que este pedido dejó en cero (tras apply): el catálogo público debe dejar de ofrecerlas
+        self.sold_out: Set[Tuple[str, str]] = set()
+
+    def add(self, model: type, row_id: str, quantity: float, line: int, label: str):
+        entry = self._needs.setdefault((model, row_id), [0, []])
+        entry[0] += quantity
+        entry[1].append(StockLine(line, label))
+
+    def __len__(self):
+        return len(self._needs)
+
+    def apply(self, db: Session):
+        """
+        Ejecuta los descuentos dentro de la transacción actual. Si alguna fila no tiene
+        stock suficiente hace rollback de todo y lanza StockUnavailable con cada línea afectada.
+        """
+        failures: List[StockFailure] = []
+        for model in STOCK_MODELS:
+            # Orden estable por id para que pedidos concurrentes tomen las filas en el mismo orden
+            rows = sorted((row_id, qty) for (m, row_id), (qty, _) in self._needs.items() if m is model)
+            if not rows:
+                continue
+            applied = self._apply_model(db, model, rows)
+            self.sold_out |= {(model.__tablename__, row_id) for row_id, stock in applied.items() if stock <= 0}
+            for row_id, _ in rows:
+                if row_id not in applied:
+                    for stock_line in self._needs[(model, row_id)][1]:
+                        failures.append(StockFailure(stock_line.line, stock_line.label, model.__tablename__, row_id))
+
+        if failures:
+            self.sold_out.clear()
+            db.rollback()
+            failures.sort(key=lambda f: f.line)
+            raise StockUnavailable(failures)
+
+    @staticmethod
+    def _apply_model(db: Session, model: type, rows: List[Tuple[str, float]]) -> Dict[str, float]:
+        """Devuelve id -> stock restante de las filas cuyo descuento sí se aplicó."""
+        if db.get_bind().dialect.name != "postgresql":
+            # Otros motores (SQLite en pruebas) no aceptan VALUES con alias de columnas:
+            # mismo UPDATE condicional, una fila a la vez
+            applied = {}
+            for row_id, qty in rows:
+                remaining = db.execute(
+                    update(model)
+                    .where(model.id == row_id, model.stock >= qty)
+                    .values(stock=model.stock - qty)
+                    .returning(model.stock)
+                    .execution_options(synchronize_session=False)
+                ).scalar_one_or_none()
+                if remaining is not None:
+                    applied[row_id] = remaining
+            return applied
+
+        requested = values(
+            column("id", String), column("qty", Float), name="requested"
+        ).data(rows)
+        stmt = (
+            update(model)
+            .where(model.id == requested.c.id, model.stock >= requested.c.qty)
+            .values(stock=model.stock - requested.c.qty)
+            .returning(model.id, model.stock)
+            .execution_options(synchronize_session=False)
+        )
+        return {row_id: stock for row_id, stock in db.execute(stmt)}
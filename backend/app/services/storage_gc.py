@@ -0,0 +1,206 @@
+import posixpath
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import STORAGE_DELETE_BATCH_SIZE, STORAGE_GC_GRACE_SECONDS
+from app.models import base
+from app.services.storage_service import storage
+
+# --- LIMPIEZA DE ARCHIVOS HUÉRFANOS ---
+# Dos mecanismos:
+#   1. DeferredDeletes: las rutas (producto/post eliminado, imagen reemplazada) solo encolan
+#      las URLs que dejaron de usar; una tarea periódica las borra en lote, después de
+#      confirmar que ningún otro registro las sigue usando.
+#   2. StorageGarbageCollector: recorre el bucket por prefijo de cada negocio, lo compara
+#      con las URLs referenciadas en Item, Post y Tenant.logo_url y borra lo que sobra
+#      (con más antigüedad que el período de gracia). Con dry_run solo reporta.
+#
+# Las imágenes optimizadas viven en <prefijo>/<hash>/<ancho>.<formato>: si cualquier archivo
+# del grupo está referenciado, el grupo completo se conserva (y se borra completo).
+
+_DIGEST_DIR = re.compile(r"^[0-9a-f]{20}$")
+
+
+def tenant_prefixes(tenant_id: str) -> List[str]:
+    # Productos, posts y logos (ver app/api/business.py y app/api/social.py)
+    return [tenant_id, f"posts/{tenant_id}", f"logos/{tenant_id}"]
+
+
+def _group_dir(path: str) -> Optional[str]:
+    parent = posixpath.dirname(path)
+    return parent if _DIGEST_DIR.match(posixpath.basename(parent)) else None
+
+
+def _variant_urls(variants: Optional[dict]) -> Iterable[str]:
+    for variant_set in (variants or {}).values():
+        if isinstance(variant_set, dict):
+            for urls in (variant_set.get("formats") or {}).values():
+                yield from urls.values()
+
+
+def referenced_urls(db: Session, tenant_id: str) -> Set[str]:
+    urls: Set[str] = set()
+    items = db.query(base.Item.image_url, base.Item.additional_images, base.Item.image_variants)\
+        .filter(base.Item.tenant_id == tenant_id).all()
+    for image_url, additional, variants in items:
+        urls.add(image_url)
+        urls.update(additional or [])
+        urls.update(_variant_urls(variants))
+
+    posts = db.query(base.Post.image_url, base.Post.image_variants).filter(base.Post.tenant_id == tenant_id).all()
+    for image_url, variants in posts:
+        urls.add(image_url)
+        urls.update(_variant_urls({"post": variants} if variants else None))
+
+    logo = db.query(base.Tenant.logo_url).filter(base.Tenant.id == tenant_id).scalar()
+    urls.add(logo)
+    urls.discard(None)
+    return urls
+
+
+def _delete_in_batches(paths: List[str]) -> int:
+    for start in range(0, len(paths), STORAGE_DELETE_BATCH_SIZE):
+        storage.backend.remove(paths[start:start + STORAGE_DELETE_BATCH_SIZE])
+    return len(paths)
+
+
+class StorageGarbageCollector:
+    def __init__(self, grace_seconds: float = STORAGE_GC_GRACE_SECONDS):
+        self.grace_seconds = grace_seconds
+        self._lock = threading.Lock()
+        self.last_report: Optional[dict] = None
+
+    def run(self, session_factory, dry_run: bool = True, tenant_ids: Optional[List[str]] = None) -> dict:
+        # Una sola pasada a la vez por proceso (la tarea periódica y el endpoint comparten esto)
+        if not self._lock.acquire(blocking=False):
+            return {"status": "already_running"}
+        try:
+            report = self._run(session_factory, dry_run, tenant_ids)
+            self.last_report = report
+            return report
+        finally:
+            self._lock.release()
+
+    def _run(self, session_factory, dry_run: bool, tenant_ids: Optional[List[str]]) -> dict:
+        started = time.monotonic()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.grace_seconds)
+        report = {
+            "dry_run": dry_run, "started_at": datetime.utcnow().isoformat(),
+            "tenants": 0, "scanned": 0, "orphans": 0, "orphan_bytes": 0, "too_recent": 0,
+            "deleted": 0, "errors": [], "sample": [],
+        }
+
+        db = session_factory()
+        try:
+            if tenant_ids is None:
+                tenant_ids = [tid for (tid,) in db.query(base.Tenant.id).order_by(base.Tenant.id).all()]
+            for tenant_id in tenant_ids:
+                report["tenants"] += 1
+                try:
+                    self._collect_tenant(db, tenant_id, cutoff, dry_run, report)
+                except Exception as e:
+                    report["errors"].append(f"{tenant_id}: {e}")
+                # Cada negocio en su propia lectura: no dejamos una transacción abierta todo el recorrido
+                db.rollback()
+        finally:
+            db.close()
+
+        report["duration_seconds"] = round(time.monotonic() - started, 2)
+        return report
+
+    def _collect_tenant(self, db: Session, tenant_id: str, cutoff: datetime, dry_run: bool, report: dict):
+        referenced = {storage.path_from_url(url) for url in referenced_urls(db, tenant_id)}
+        referenced.discard(None)
+        kept_groups = {group for group in map(_group_dir, referenced) if group}
+
+        orphans = []
+        for prefix in tenant_prefixes(tenant_id):
+            for obj in storage.backend.list_objects(prefix):
+                report["scanned"] += 1
+                if obj.path in referenced or _group_dir(obj.path) in kept_groups:
+                    continue
+                if obj.updated_at is None or obj.updated_at > cutoff:
+                    report["too_recent"] += 1
+                    continue
+                orphans.append(obj.path)
+                report["orphan_bytes"] += obj.size
+
+        report["orphans"] += len(orphans)
+        room = 20 - len(report["sample"])
+        report["sample"].extend(orphans[:max(room, 0)])
+        if orphans and not dry_run:
+            report["deleted"] += _delete_in_batches(orphans)
+
+
+class DeferredDeletes:
+    """Cola en memoria de URLs que una ruta dejó de usar; se vacía en lote desde una tarea periódica."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # URL -> momento en que se dejó de usar
+        self._pending: Dict[str, datetime] = {}
+
+    def add(self, urls: Iterable[Optional[str]], dropped_at: Optional[datetime] = None):
+        dropped_at = dropped_at or datetime.now(timezone.utc)
+        with self._lock:
+            for url in urls:
+                if url:
+                    self._pending.setdefault(url, dropped_at)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, session_factory) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        db = session_factory()
+        try:
+            used = self._still_referenced(db, list(batch))
+            paths = set()
+            for url, dropped_at in batch.items():
+                path = storage.path_from_url(url)
+                if url in used or not path:
+                    continue
+                group = _group_dir(path)
+                if group is None:
+                    paths.add(path)
+                    continue
+                # Se borra el grupo completo (todas las variantes de esa imagen), salvo lo que se
+                # volvió a subir después de encolar: la misma foto pudo usarse de nuevo entretanto
+                paths.update(
+                    obj.path for obj in storage.backend.list_objects(group)
+                    if obj.updated_at is not None and obj.updated_at <= dropped_at
+                )
+            return _delete_in_batches(sorted(paths))
+        except Exception:
+            # No perdemos la cola: se reintenta en la siguiente pasada (y si no, el GC lo recoge)
+            for url, dropped_at in batch.items():
+                self.add([url], dropped_at)
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _still_referenced(db: Session, urls: List[str]) -> Set[str]:
+        used: Set[str] = set()
+        used.update(u for (u,) in db.query(base.Item.image_url).filter(base.Item.image_url.in_(urls)))
+        used.update(u for (u,) in db.query(base.Post.image_url).filter(base.Post.image_url.in_(urls)))
+        used.update(u for (u,) in db.query(base.Tenant.logo_url).filter(base.Tenant.logo_url.in_(urls)))
+        if db.get_bind().dialect.name == "postgresql":
+            rows = db.query(base.Item.additional_images).filter(base.Item.additional_images.overlap(urls))
+            for (additional,) in rows:
+                used.update(set(additional or []) & set(urls))
+        return used
+
+
+storage_gc = StorageGarbageCollector()
+deferred_deletes = DeferredDeletes()
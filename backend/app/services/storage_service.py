@@ -0,0 +1,232 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterator, List, NamedTuple, Optional
+
+from app.core.config import (
+    STORAGE_BACKEND, STORAGE_BUCKET, STORAGE_LIST_PAGE_SIZE, STORAGE_LOCAL_BASE_URL, STORAGE_LOCAL_ROOT,
+    STORAGE_MAX_WORKERS, STORAGE_UPLOAD_CONCURRENCY, STORAGE_UPLOAD_TIMEOUT_SECONDS,
+)
+
+# --- SUBIDA DE ARCHIVOS ---
+# Los clientes de almacenamiento son síncronos: cada subida corre en un pool de hilos
+# compartido para no bloquear el event loop. Los archivos de una misma petición se suben
+# en paralelo (con un límite por petición) y cada uno tiene su propio timeout. Si alguno
+# falla, se borran los que sí subieron y se lanza StorageError.
+
+
+class StorageError(Exception):
+    def __init__(self, path: str, reason: str, timed_out: bool = False):
+        super().__init__(f"No se pudo subir '{path}': {reason}")
+        self.path = path
+        self.reason = reason
+        self.timed_out = timed_out
+
+
+class UploadRequest(NamedTuple):
+    path: str
+    content: bytes
+    content_type: Optional[str] = None
+    upsert: bool = False
+
+
+class StoredObject(NamedTuple):
+    path: str
+    size: int
+    updated_at: Optional[datetime]  # UTC; None si el backend no lo informa
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+# --- BACKENDS ---
+
+class SupabaseStorage:
+    def __init__(self, bucket: str = STORAGE_BUCKET):
+        # Import diferido: el backend local no necesita credenciales de Supabase
+        from app.services.supabase import supabase
+        self.bucket = supabase.storage.from_(bucket)
+        self.public_marker = f"/public/{bucket}/"
+
+    def upload(self, request: UploadRequest) -> str:
+        options = {"content-type": request.content_type or "application/octet-stream"}
+        if request.upsert:
+            options["upsert"] = "true"
+        self.bucket.upload(path=request.path, file=request.content, file_options=options)
+        return self.public_url(request.path)
+
+    def public_url(self, path: str) -> str:
+        res = self.bucket.get_public_url(path)
+        return res if isinstance(res, str) else res.public_url
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        if not url or self.public_marker not in url:
+            return None
+        return url.split(self.public_marker, 1)[1].split("?", 1)[0]
+
+    def remove(self, paths: List[str]):
+        if paths:
+            self.bucket.remove(paths)
+
+    def list_objects(self, prefix: str, page_size: int = STORAGE_LIST_PAGE_SIZE) -> Iterator[StoredObject]:
+        """Recorre `prefix` recursivamente, pidiendo el listado en páginas."""
+        offset = 0
+        while True:
+            entries = self.bucket.list(prefix, {
+                "limit": page_size, "offset": offset, "sortBy": {"column": "name", "order": "asc"}
+            }) or []
+            for entry in entries:
+                path = f"{prefix}/{entry['name']}" if prefix else entry["name"]
+                if entry.get("id") is None:
+                    # Las carpetas vienen sin id: bajamos un nivel
+                    yield from self.list_objects(path, page_size)
+                else:
+                    yield StoredObject(
+                        path,
+                        int((entry.get("metadata") or {}).get("size") or 0),
+                        _parse_timestamp(entry.get("updated_at") or entry.get("created_at")),
+                    )
+            if len(entries) < page_size:
+                return
+            offset += page_size
+
+
+class LocalStorage:
+    """Guarda los archivos en disco; main.py los sirve bajo `base_url`."""
+
+    def __init__(self, root: str = STORAGE_LOCAL_ROOT, base_url: str = STORAGE_LOCAL_BASE_URL):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _full_path(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, path))
+        if not full.startswith(self.root + os.sep):
+            raise ValueError(f"Ruta fuera del almacenamiento: {path}")
+        return full
+
+    def upload(self, request: UploadRequest) -> str:
+        full = self._full_path(request.path)
+        if os.path.exists(full) and not request.upsert:
+            raise FileExistsError(request.path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        # Escribimos a un temporal y renombramos: nunca se sirve un archivo a medias
+        tmp = f"{full}.part"
+        with open(tmp, "wb") as f:
+            f.write(request.content)
+        os.replace(tmp, full)
+        return self.public_url(request.path)
+
+    def public_url(self, path: str) -> str:
+        return f"{self.base_url}/{path}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        prefix = self.base_url + "/"
+        if not url or prefix not in url:
+            return None
+        return url.split(prefix, 1)[1].split("?", 1)[0]
+
+    def remove(self, paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(self._full_path(path))
+            except FileNotFoundError:
+                pass
+
+    def list_objects(self, prefix: str, page_size: int = STORAGE_LIST_PAGE_SIZE) -> Iterator[StoredObject]:
+        top = os.path.join(self.root, prefix)
+        for dirpath, _, filenames in os.walk(top):
+            for filename in sorted(filenames):
+                if filename.endswith(".part"):
+                    continue
+                full = os.path.join(dirpath, filename)
+                stat = os.stat(full)
+                yield StoredObject(
+                    os.path.relpath(full, self.root).replace(os.sep, "/"),
+                    stat.st_size,
+                    datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                )
+
+
+# --- SERVICIO ---
+
+class StorageService:
+    def __init__(self, backend, max_workers: int = STORAGE_MAX_WORKERS,
+                 concurrency: int = STORAGE_UPLOAD_CONCURRENCY,
+                 timeout: float = STORAGE_UPLOAD_TIMEOUT_SECONDS):
+        self.backend = backend
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def upload(self, request: UploadRequest) -> str:
+        return (await self.upload_many([request]))[0]
+
+    async def upload_many(self, requests: List[UploadRequest]) -> List[str]:
+        """Sube todo en paralelo y devuelve las URLs públicas en el mismo orden."""
+        if not requests:
+            return []
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def upload_one(request: UploadRequest) -> str:
+            async with semaphore:
+                try:
+                    # El hilo no se puede interrumpir: al vencer el timeout dejamos de
+                    # esperarlo y la subida tardía se limpia con el resto
+                    return await asyncio.wait_for(self._run(self.backend.upload, request), self.timeout)
+                except asyncio.TimeoutError:
+                    raise StorageError(request.path, f"tiempo de espera agotado ({self.timeout:g}s)", timed_out=True)
+                except StorageError:
+                    raise
+                except Exception as e:
+                    raise StorageError(request.path, str(e))
+
+        results = await asyncio.gather(*(upload_one(r) for r in requests), return_exceptions=True)
+        failures = [r for r in results if isinstance(r, BaseException)]
+        if failures:
+            # Todo o nada: quitamos lo que sí se subió (o pudo subirse tarde) para no dejar
+            # archivos huérfanos. Los upsert no se tocan: podrían pisar un archivo que ya existía
+            uploaded = [
+                request.path for request, result in zip(requests, results)
+                if not request.upsert and (
+                    not isinstance(result, BaseException)
+                    or (isinstance(result, StorageError) and result.timed_out)
+                )
+            ]
+            if uploaded:
+                await self.remove(uploaded)
+            raise failures[0]
+        return results
+
+    async def remove(self, paths: List[str]):
+        try:
+            await self._run(self.backend.remove, list(paths))
+        except Exception as e:
+            print(f"⚠️ Error borrando archivos {paths}: {e}")
+
+    def path_from_url(self, url: Optional[str]) -> Optional[str]:
+        return self.backend.path_from_url(url)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def _build_backend():
+    if STORAGE_BACKEND == "local":
+        return LocalStorage()
+    if STORAGE_BACKEND == "supabase":
+        return SupabaseStorage()
+    raise RuntimeError(f"STORAGE_BACKEND desconocido: {STORAGE_BACKEND}")
+
+
+storage = StorageService(_build_backend())
@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import TENANT_CACHE_MAX_ENTRIES, TENANT_CACHE_TTL_SECONDS
+from app.models import base
+
+
+# --- FOTOS INMUTABLES DEL NEGOCIO ---
+
+class BusinessHourSnapshot(NamedTuple):
+    day_of_week: int
+    open_time: str
+    close_time: str
+    is_closed: bool
+
+
+class TenantSnapshot(NamedTuple):
+    """Copia de solo lectura de un Tenant, segura para compartir entre peticiones."""
+    id: str
+    name: str
+    slug: str
+    phone: Optional[str]
+    logo_url: Optional[str]
+    primary_color: Optional[str]
+    secundary_color: Optional[str]
+    is_active: bool
+    appointment_interval: Optional[int]
+    has_delivery: bool
+    delivery_price: float
+    business_hours: Tuple[BusinessHourSnapshot, ...]
+
+
+def _snapshot(tenant: base.Tenant) -> TenantSnapshot:
+    return TenantSnapshot(
+        id=tenant.id,
+        name=tenant.name,
+        slug=tenant.slug,
+        phone=tenant.phone,
+        logo_url=tenant.logo_url,
+        primary_color=tenant.primary_color,
+        secundary_color=tenant.secundary_color,
+        # Mismo criterio que antes: si no hay valor, el negocio se considera activo
+        is_active=tenant.is_active if tenant.is_active is not None else True,
+        appointment_interval=tenant.appointment_interval,
+        has_delivery=bool(tenant.has_delivery),
+        delivery_price=tenant.delivery_price or 0.0,
+        business_hours=tuple(
+            BusinessHourSnapshot(bh.day_of_week, bh.open_time, bh.close_time, bool(bh.is_closed))
+            for bh in tenant.business_hours
+        ),
+    )
+
+
+# --- CACHÉ LRU + TTL ---
+
+class TenantCache:
+    """
+    Caché en memoria (por proceso) de negocios, indexada por slug y por id.
+    Las escrituras deben llamar a invalidate() después del commit.
+    """
+
+    def __init__(self, max_entries: int = TENANT_CACHE_MAX_ENTRIES, ttl_seconds: float = TENANT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, TenantSnapshot]]" = OrderedDict()
+        self._id_by_slug: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Cada invalidación sube la generación; una carga que empezó antes no se guarda
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_by_slug(self, db: Session, slug: str) -> Optional[TenantSnapshot]:
+        with self._lock:
+            snapshot = self._lookup(self._id_by_slug.get(slug))
+            generation = self._generation
+        if snapshot is not None:
+            return snapshot
+        tenant = db.query(base.Tenant).options(selectinload(base.Tenant.business_hours))\
+            .filter(base.Tenant.slug == slug).first()
+        return self._store(tenant, generation)
+
+    def get_by_id(self, db: Session, tenant_id: str) -> Optional[TenantSnapshot]:
+        with self._lock:
+            snapshot = self._lookup(tenant_id)
+            generation = self._generation
+        if snapshot is not None:
+            return snapshot
+        tenant = db.query(base.Tenant).options(selectinload(base.Tenant.business_hours))\
+            .filter(base.Tenant.id == tenant_id).first()
+        return self._store(tenant, generation)
+
+    def invalidate(self, tenant_id: Optional[str] = None, slug: Optional[str] = None):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if slug is not None and tenant_id is None:
+                tenant_id = self._id_by_slug.get(slug)
+            if tenant_id is not None:
+                self._evict(tenant_id)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._id_by_slug.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    # --- Internos (siempre con el lock tomado, salvo _store) ---
+
+    def _lookup(self, tenant_id: Optional[str]) -> Optional[TenantSnapshot]:
+        entry = self._entries.get(tenant_id) if tenant_id is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            self._evict(tenant_id)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(tenant_id)
+        self.hits += 1
+        return snapshot
+
+    def _store(self, tenant: Optional[base.Tenant], generation: int) -> Optional[TenantSnapshot]:
+        if tenant is None:
+            return None
+        snapshot = _snapshot(tenant)
+        with self._lock:
+            if generation != self._generation:
+                # Hubo una escritura mientras leíamos: devolvemos el dato sin cachearlo
+                return snapshot
+            self._evict(snapshot.id)
+            self._entries[snapshot.id] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._id_by_slug[snapshot.slug] = snapshot.id
+            while len(self._entries) > self.max_entries:
+                _, (_, oldest) = self._entries.popitem(last=False)
+                self._id_by_slug.pop(oldest.slug, None)
+        return snapshot
+
+    def _evict(self, tenant_id: str):
+        entry = self._entries.pop(tenant_id, None)
+        if entry is not None:
+            self._id_by_slug.pop(entry[1].slug, None)
+
+
+tenant_cache = TenantCache()
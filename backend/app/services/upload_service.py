@@ -0,0 +1,78 @@
+import asyncio
+from typing import List, NamedTuple, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_FILE_BYTES, UPLOAD_MAX_REQUEST_BYTES
+
+# --- VALIDACIÓN DE SUBIDAS ---
+# Starlette ya deja cada archivo en un SpooledTemporaryFile (en disco a partir de 1 MB), así
+# que no lo copiamos a otro temporal: lo recorremos por bloques de UPLOAD_CHUNK_SIZE desde
+# `upload.file`, cortando en cuanto supera el límite, y lo dejamos rebobinado para quien lo
+# procese. El tipo real se detecta con los primeros bytes (no nos fiamos del content-type
+# del navegador), así que un archivo que no es imagen se rechaza sin leer el resto.
+
+# Firmas de los formatos que aceptamos: (desplazamiento, bytes) -> content-type
+_SIGNATURES = [
+    ((0, b"\xff\xd8\xff"), "image/jpeg"),
+    ((0, b"\x89PNG\r\n\x1a\n"), "image/png"),
+    ((0, b"GIF87a"), "image/gif"),
+    ((0, b"GIF89a"), "image/gif"),
+]
+# Contenedores ISO-BMFF: "ftyp" en el byte 4 y la marca a continuación. HEIC/HEIF no van:
+# Pillow no los decodifica sin pillow-heif y terminarían en un 400 después de subirlos
+_FTYP_BRANDS = {b"avif": "image/avif", b"avis": "image/avif"}
+
+
+def _avif_supported() -> bool:
+    from PIL import features
+
+    return bool(features.check("avif"))
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    for (offset, magic), content_type in _SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in _FTYP_BRANDS and _avif_supported():
+        return _FTYP_BRANDS[head[8:12]]
+    return None
+
+
+class CheckedUpload(NamedTuple):
+    upload: UploadFile
+    size: int
+    content_type: str
+
+
+def _check_sync(upload: UploadFile, max_bytes: int) -> CheckedUpload:
+    """Recorre el archivo por bloques validando tipo y tamaño (corre en un hilo)."""
+    upload.file.seek(0)
+    head = upload.file.read(UPLOAD_CHUNK_SIZE)
+    content_type = sniff_image_type(head)
+    if content_type is None:
+        raise HTTPException(status_code=415, detail=f"'{upload.filename}' no es una imagen soportada")
+
+    size = 0
+    chunk = head
+    while chunk:
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail="Las imágenes superan el tamaño máximo permitido")
+        chunk = upload.file.read(UPLOAD_CHUNK_SIZE)
+    upload.file.seek(0)
+    return CheckedUpload(upload, size, content_type)
+
+
+async def check_uploads(files: List[UploadFile], max_file_bytes: int = UPLOAD_MAX_FILE_BYTES,
+                        max_request_bytes: int = UPLOAD_MAX_REQUEST_BYTES) -> List[CheckedUpload]:
+    """Valida tipo y tamaño de cada archivo (413/415) y los deja listos para leer desde el inicio."""
+    checked: List[CheckedUpload] = []
+    remaining = max_request_bytes
+    for upload in files:
+        item = await asyncio.to_thread(_check_sync, upload, min(max_file_bytes, remaining))
+        checked.append(item)
+        remaining -= item.size
+    return checked
@@ -1,20 +1,70 @@
+from typing import Optional
+
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.models import base
+from app.services import stats_service
 from fastapi import HTTPException, status
 
-def consume_token(db: Session, tenant_id: str):
-    # with_for_update() bloquea la fila para evitar gastos dobles concurrentes
-    wallet = db.query(base.Wallet).filter(base.Wallet.tenant_id == tenant_id).with_for_update().first()
-    
-    if not wallet:
+# --- LIBRO DE MOVIMIENTOS DE LA BILLETERA ---
+# Cada cargo/abono es un único UPDATE ... RETURNING: la base de datos hace la resta de
+# forma atómica (sin lecturas previas ni FOR UPDATE) y nos devuelve el saldo resultante.
+# El WalletTransaction se agrega en la misma transacción; el commit lo hace quien llama.
+
+
+def _record(db: Session, tenant_id: str, amount: float, new_balance: float, reason: str):
+    stats_service.record(db, "total_revenue", amount)
+    db.add(base.WalletTransaction(
+        tenant_id=tenant_id,
+        amount=int(amount),
+        previous_balance=int(new_balance - amount),
+        new_balance=int(new_balance),
+        reason=reason
+    ))
+
+
+def debit(db: Session, tenant_id: str, amount: float, reason: str) -> Optional[float]:
+    """
+    Descuenta `amount` solo si alcanza el saldo. Devuelve el nuevo saldo,
+    o None si no hay billetera o el saldo es insuficiente (nada se modifica).
+    """
+    new_balance = db.execute(
+        update(base.Wallet)
+        .where(base.Wallet.tenant_id == tenant_id, base.Wallet.balance >= amount)
+        .values(balance=base.Wallet.balance - amount)
+        .returning(base.Wallet.balance)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    if new_balance is None:
+        return None
+    _record(db, tenant_id, -amount, new_balance, reason)
+    return new_balance
+
+
+def credit(db: Session, tenant_id: str, amount: float, reason: str) -> Optional[float]:
+    """Suma `amount` (puede ser negativo para correcciones). Devuelve el nuevo saldo o None si no hay billetera."""
+    new_balance = db.execute(
+        update(base.Wallet)
+        .where(base.Wallet.tenant_id == tenant_id)
+        .values(balance=base.Wallet.balance + amount)
+        .returning(base.Wallet.balance)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    if new_balance is None:
+        return None
+    _record(db, tenant_id, amount, new_balance, reason)
+    return new_balance
+
+
+def consume_token(db: Session, tenant_id: str, reason: str = "Consumo de token") -> float:
+    exists = db.query(base.Wallet.id).filter(base.Wallet.tenant_id == tenant_id).first()
+    if not exists:
         raise HTTPException(status_code=404, detail="Billetera no encontrada")
-        
-    if wallet.balance < 1:
+
+    new_balance = debit(db, tenant_id, 1, reason)
+    if new_balance is None:
         raise HTTPException(
-            status_code=status.HTTP_402_PAYMENT_REQUIRED, 
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
             detail="Saldo de tokens insuficiente"
         )
-    
-    wallet.balance -= 1
-    db.flush() # Mantiene los cambios en la transacción sin cerrar el commit
-    return wallet
\ No newline at end of file
+    return new_balance
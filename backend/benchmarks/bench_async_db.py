@@ -0,0 +1,118 @@
+"""
+Latencia con tráfico mixto: rutas `async def` que consultan con la sesión síncrona (antes)
+vs con la sesión async (después).
+
+Mientras unos clientes piden una ruta lenta (una consulta de SLOW_QUERY_MS), llegan
+PING_RATE peticiones por segundo a una ruta liviana que no toca la base. La latencia de
+cada una se mide desde el momento en que debía salir, así que incluye la espera por el
+event loop. Con la sesión síncrona la consulta bloquea el loop y la ruta liviana hereda
+su latencia; con la async no.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_async_db
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.database.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+
+SLOW_QUERY_MS = int(os.getenv("BENCH_SLOW_QUERY_MS", "50"))
+SLOW_CLIENTS = int(os.getenv("BENCH_SLOW_CLIENTS", "4"))
+PING_RATE = int(os.getenv("BENCH_PING_RATE", "200"))
+DURATION_SECONDS = float(os.getenv("BENCH_DURATION_SECONDS", "5"))
+
+SLOW_SQL = text("SELECT pg_sleep(:seconds)")
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync-session")
+    async def slow_sync():
+        # Lo que hacían las rutas antes: Session síncrona dentro de `async def`
+        db = SessionLocal()
+        try:
+            db.execute(SLOW_SQL, {"seconds": SLOW_QUERY_MS / 1000})
+        finally:
+            db.close()
+        return {}
+
+    @app.get("/async-session")
+    async def slow_async():
+        async with AsyncSessionLocal() as db:
+            await db.execute(SLOW_SQL, {"seconds": SLOW_QUERY_MS / 1000})
+        return {}
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    return app
+
+
+async def _timed_get(client: httpx.AsyncClient, path: str, scheduled: float, latencies: list):
+    response = await client.get(path)
+    response.raise_for_status()
+    latencies.append((time.perf_counter() - scheduled) * 1000)
+
+
+async def _slow_client(client: httpx.AsyncClient, path: str, deadline: float, latencies: list):
+    while time.perf_counter() < deadline:
+        # En memoria no hay red: sin esto una ruta que nunca cede el loop acapara todo
+        await asyncio.sleep(0)
+        await _timed_get(client, path, time.perf_counter(), latencies)
+
+
+async def _ping_arrivals(client: httpx.AsyncClient, deadline: float, latencies: list):
+    interval, pending = 1 / PING_RATE, []
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        pending.append(asyncio.create_task(_timed_get(client, "/ping", scheduled, latencies)))
+        scheduled += interval
+    await asyncio.gather(*pending)
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(slow_path: str) -> dict:
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Calentamos los pools para no medir la apertura de conexiones
+        await asyncio.gather(*(client.get(slow_path) for _ in range(SLOW_CLIENTS)))
+        deadline = time.perf_counter() + DURATION_SECONDS
+        slow, fast = [], []
+        await asyncio.gather(
+            *(_slow_client(client, slow_path, deadline, slow) for _ in range(SLOW_CLIENTS)),
+            _ping_arrivals(client, deadline, fast),
+        )
+    return {
+        "slow_requests": len(slow),
+        "ping_requests": len(fast),
+        "ping_p50_ms": round(statistics.median(fast), 2),
+        "ping_p99_ms": round(_percentile(fast, 0.99), 2),
+        "slow_p99_ms": round(_percentile(slow, 0.99), 2),
+    }
+
+
+async def main():
+    if engine.dialect.name != "postgresql":
+        sys.exit("Este benchmark necesita DATABASE_URL de PostgreSQL (usa pg_sleep)")
+    print(f"consulta lenta {SLOW_QUERY_MS}ms | {SLOW_CLIENTS} clientes lentos | "
+          f"{PING_RATE} pings/s | {DURATION_SECONDS}s por escenario")
+    for label, path in (("antes  (Session síncrona)", "/sync-session"), ("después (AsyncSession)", "/async-session")):
+        print(f"{label}: {await run(path)}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
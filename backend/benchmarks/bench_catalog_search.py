@@ -0,0 +1,136 @@
+"""
+Búsqueda del catálogo en un negocio de BENCH_ITEMS productos (50k por defecto):
+  - ilike (antes): `name ILIKE '%q%' OR description ILIKE '%q%'`, ordenado por fecha.
+  - trigramas (después, Postgres): la consulta de CatalogSearch con índices GIN de pg_trgm.
+  - índice invertido (después, otros motores): InvertedIndex en memoria.
+
+Cada término se busca BENCH_ROUNDS veces; se informa p50/p99 por escenario y cuántos
+resultados trae cada término (los que tienen errores de dedo no encuentran nada con ilike).
+Todo se crea en un esquema propio que se borra al terminar.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_catalog_search
+"""
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+
+from app.database.session import engine
+from app.models import base
+from app.services.search_service import MAX_SEARCH_RESULTS, CatalogSearch, InvertedIndex
+from benchmarks.common import bench_schema, latency_summary
+
+ITEMS = int(os.getenv("BENCH_ITEMS", "50000"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "30"))
+SCHEMA = "bench_catalog_search"
+TENANT = str(uuid.uuid4())
+
+PRODUCTS = ["pizza", "hamburguesa", "empanada", "ensalada", "lasaña", "milanesa", "tarta", "sandwich",
+            "helado", "café", "limonada", "brownie", "burrito", "taco", "sushi", "ramen"]
+STYLES = ["napolitana", "clásica", "doble", "vegana", "especial", "casera", "completa", "mediterránea",
+          "ahumada", "criolla", "picante", "rellena"]
+SIZES = ["chica", "mediana", "grande", "familiar"]
+DESCRIPTIONS = ["con queso fundido", "salsa de la casa", "masa madre", "receta de la abuela",
+                "ideal para compartir", "sin tacc", "con papas fritas", "aceite de oliva", "toque de trufa"]
+
+# (término, qué mide)
+TERMS = [
+    ("pizza", "palabra exacta"),
+    ("napol", "prefijo"),
+    ("hamburgesa", "error de dedo"),
+    ("piza", "error de dedo"),
+    ("trufa", "solo en la descripción"),
+    ("ramen picante", "dos palabras"),
+]
+
+
+def _seed(conn):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    conn.execute(base.Tenant.__table__.insert(), [{"id": TENANT, "name": "Bench", "slug": "bench-search"}])
+    batch = []
+    for i in range(ITEMS):
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "tenant_id": TENANT,
+            "name": f"{rng.choice(PRODUCTS).capitalize()} {rng.choice(STYLES)} {rng.choice(SIZES)} {i}",
+            "description": " ".join(rng.sample(DESCRIPTIONS, 2)),
+            "price": 1000,
+            "updated_at": start + timedelta(seconds=i),
+        })
+        if len(batch) == 5000:
+            conn.execute(base.Item.__table__.insert(), batch)
+            batch = []
+    if batch:
+        conn.execute(base.Item.__table__.insert(), batch)
+
+
+def _create_trigram_indexes(conn) -> bool:
+    if conn.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first() is None:
+        return False
+    # Los mismos índices que la migración 2 (app/database/migrations.py)
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public"))
+    conn.execute(text("CREATE INDEX ix_items_name_trgm ON items USING gin (name gin_trgm_ops)"))
+    conn.execute(text("CREATE INDEX ix_items_description_trgm ON items USING gin (description gin_trgm_ops)"))
+    return True
+
+
+def _ilike(db: Session, term: str):
+    pattern = f"%{term}%"
+    return db.query(base.Item.id)\
+        .filter(base.Item.tenant_id == TENANT,
+                or_(base.Item.name.ilike(pattern), base.Item.description.ilike(pattern)))\
+        .order_by(base.Item.updated_at.desc())\
+        .limit(MAX_SEARCH_RESULTS).all()
+
+
+def run(db: Session, search) -> dict:
+    latencies, hits = [], {}
+    for term, _ in TERMS:
+        search(db, term)  # calentamiento (caché de la base / primera carga)
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            found = search(db, term)
+            latencies.append((time.perf_counter() - started) * 1000)
+        hits[term] = len(found)
+    return {**latency_summary(latencies), "resultados": hits}
+
+
+def main():
+    if engine.dialect.name != "postgresql":
+        sys.exit("Este benchmark necesita DATABASE_URL de PostgreSQL")
+    print(f"{ITEMS} productos en un negocio | {len(TERMS)} términos x {ROUNDS} búsquedas")
+    print("términos: " + ", ".join(f"'{term}' ({what})" for term, what in TERMS))
+
+    with bench_schema(engine, SCHEMA) as bench_engine:
+        with bench_engine.begin() as conn:
+            _seed(conn)
+            has_trgm = _create_trigram_indexes(conn)
+        with bench_engine.connect() as conn:
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+
+        with Session(bench_engine) as db:
+            print(f"ilike (antes): {run(db, _ilike)}")
+
+            if has_trgm:
+                searcher = CatalogSearch()
+                print(f"trigramas (después, Postgres): {run(db, searcher.search_item_ids)}")
+            else:
+                print("trigramas: omitido, pg_trgm no está instalado en este servidor")
+
+            index = InvertedIndex()
+            started = time.perf_counter()
+            index.ensure_tenant(db, TENANT)
+            build_ms = round((time.perf_counter() - started) * 1000, 1)
+            result = run(db, lambda _db, term: index.search(TENANT, term, MAX_SEARCH_RESULTS))
+            print(f"índice invertido (después, memoria; carga inicial {build_ms}ms): {result}")
+
+
+if __name__ == "__main__":
+    main()
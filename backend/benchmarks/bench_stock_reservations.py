@@ -0,0 +1,85 @@
+"""
+Un SKU caliente: BENCH_WORKERS hilos reservan 1 unidad de la MISMA variante durante
+BENCH_DURATION_SECONDS, cada uno con su sesión y su transacción.
+  - antes: leer el stock a Python y escribirlo de vuelta (como hacía el checkout).
+  - después: StockReservation (UPDATE condicional, sin bloqueos explícitos).
+
+Se informa reservas/s, p50/p99 por reserva y cuánto stock se descontó de verdad frente a
+las reservas confirmadas (con "antes" se pierden descuentos: sobreventa).
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_stock_reservations
+"""
+import os
+import sys
+import uuid
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database.session import engine
+from app.models import base
+from app.services.stock_service import StockReservation, StockUnavailable
+from benchmarks.common import bench_schema, hammer, latency_summary
+
+WORKERS = int(os.getenv("BENCH_WORKERS", "32"))
+DURATION_SECONDS = float(os.getenv("BENCH_DURATION_SECONDS", "5"))
+SCHEMA = "bench_stock"
+# De sobra para que no se agote durante la corrida
+INITIAL_STOCK = 10_000_000
+
+
+def _seed(session_factory) -> str:
+    db = session_factory()
+    tenant_id, item_id = str(uuid.uuid4()), str(uuid.uuid4())
+    db.add(base.Tenant(id=tenant_id, name="Bench", slug=f"bench-{tenant_id[:8]}"))
+    db.add(base.Item(id=item_id, tenant_id=tenant_id, name="Pizza", price=10))
+    db.flush()
+    variant = base.ItemVariant(item_id=item_id, name="Grande", price=10, stock=INITIAL_STOCK)
+    db.add(variant)
+    db.commit()
+    variant_id = variant.id
+    db.close()
+    return variant_id
+
+
+def _read_modify_write(db: Session, variant_id: str):
+    variant = db.get(base.ItemVariant, variant_id)
+    if variant.stock < 1:
+        raise StockUnavailable([])
+    variant.stock -= 1
+
+
+def _conditional_update(db: Session, variant_id: str):
+    reservation = StockReservation()
+    reservation.add(base.ItemVariant, variant_id, 1, 0, "Pizza (Grande)")
+    reservation.apply(db)
+
+
+def run(session_factory, reserve) -> dict:
+    variant_id = _seed(session_factory)
+    result = hammer(session_factory, WORKERS, DURATION_SECONDS, lambda db: reserve(db, variant_id))
+
+    db = session_factory()
+    remaining = db.get(base.ItemVariant, variant_id).stock
+    db.close()
+    return {
+        "reservas": len(result.latencies_ms),
+        "reservas_por_s": round(len(result.latencies_ms) / result.elapsed, 1),
+        **latency_summary(result.latencies_ms),
+        "fallidas": result.failures,
+        "descontado": int(INITIAL_STOCK - remaining),
+        "sobreventa": len(result.latencies_ms) - int(INITIAL_STOCK - remaining),
+    }
+
+
+def main():
+    if engine.dialect.name != "postgresql":
+        sys.exit("Este benchmark necesita DATABASE_URL de PostgreSQL")
+    print(f"{WORKERS} hilos sobre una sola variante | {DURATION_SECONDS}s por escenario")
+    with bench_schema(engine, SCHEMA, pool_size=WORKERS) as bench_engine:
+        session_factory = sessionmaker(bind=bench_engine)
+        print(f"antes   (leer y escribir): {run(session_factory, _read_modify_write)}")
+        print(f"después (UPDATE condicional): {run(session_factory, _conditional_update)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Cargos sostenidos a UNA billetera: BENCH_WORKERS hilos descuentan 1 crédito del mismo
+negocio durante BENCH_DURATION_SECONDS (cada cargo es su propia transacción, con su
+movimiento en wallet_transactions, como un pedido).
+  - antes: leer el saldo a Python y escribirlo de vuelta (como hacía el checkout).
+  - después: wallet_service.debit (UPDATE ... RETURNING atómico).
+
+Se informa cargos/s, p50/p99 por cargo y si el saldo final cuadra con los cargos
+confirmados y con el libro de movimientos.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_wallet_debits
+"""
+import os
+import sys
+import uuid
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database.session import engine
+from app.models import base
+from app.services import wallet_service
+from benchmarks.common import bench_schema, hammer, latency_summary
+
+WORKERS = int(os.getenv("BENCH_WORKERS", "32"))
+DURATION_SECONDS = float(os.getenv("BENCH_DURATION_SECONDS", "5"))
+SCHEMA = "bench_wallet"
+# De sobra para que el saldo no se agote durante la corrida
+INITIAL_BALANCE = 10_000_000
+
+
+def _seed(session_factory) -> str:
+    db = session_factory()
+    tenant_id = str(uuid.uuid4())
+    db.add(base.Tenant(id=tenant_id, name="Bench", slug=f"bench-{tenant_id[:8]}"))
+    db.add(base.Wallet(tenant_id=tenant_id, balance=INITIAL_BALANCE))
+    db.commit()
+    db.close()
+    return tenant_id
+
+
+def _read_modify_write(db: Session, tenant_id: str):
+    wallet = db.query(base.Wallet).filter(base.Wallet.tenant_id == tenant_id).first()
+    previous = wallet.balance
+    wallet.balance -= 1
+    db.add(base.WalletTransaction(tenant_id=tenant_id, amount=-1, previous_balance=int(previous),
+                                  new_balance=int(previous - 1), reason="Pedido"))
+
+
+def _atomic_debit(db: Session, tenant_id: str):
+    if wallet_service.debit(db, tenant_id, 1, "Pedido") is None:
+        raise RuntimeError("saldo insuficiente")
+
+
+def run(session_factory, debit) -> dict:
+    tenant_id = _seed(session_factory)
+    result = hammer(session_factory, WORKERS, DURATION_SECONDS, lambda db: debit(db, tenant_id))
+
+    db = session_factory()
+    balance = db.query(base.Wallet.balance).filter(base.Wallet.tenant_id == tenant_id).scalar()
+    ledger = db.query(func.count(base.WalletTransaction.id))\
+        .filter(base.WalletTransaction.tenant_id == tenant_id).scalar()
+    db.close()
+    confirmed = len(result.latencies_ms)
+    return {
+        "cargos": confirmed,
+        "cargos_por_s": round(confirmed / result.elapsed, 1),
+        **latency_summary(result.latencies_ms),
+        "fallidos": result.failures,
+        "descontado": int(INITIAL_BALANCE - balance),
+        "movimientos": ledger,
+        "cuadra": INITIAL_BALANCE - balance == confirmed == ledger,
+    }
+
+
+def main():
+    if engine.dialect.name != "postgresql":
+        sys.exit("Este benchmark necesita DATABASE_URL de PostgreSQL")
+    print(f"{WORKERS} hilos sobre una sola billetera | {DURATION_SECONDS}s por escenario")
+    with bench_schema(engine, SCHEMA, pool_size=WORKERS) as bench_engine:
+        session_factory = sessionmaker(bind=bench_engine)
+        print(f"antes   (leer y escribir): {run(session_factory, _read_modify_write)}")
+        print(f"después (UPDATE ... RETURNING): {run(session_factory, _atomic_debit)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Reparto de eventos con cientos de sockets por negocio, algunos lentos a propósito.
+
+BENCH_TENANTS negocios con BENCH_SOCKETS_PER_TENANT conexiones cada uno; de ellas una
+fracción BENCH_SLOW_SHARE tarda BENCH_SLOW_SEND_MS en cada envío y BENCH_STALLED_SHARE no
+termina nunca de enviar (tablet medio caída). Llegan BENCH_EVENT_RATE eventos por segundo
+por negocio durante BENCH_EVENTS eventos.
+
+Se informa:
+  - reparto: cuánto tarda deliver_local en dejar el evento en todas las colas (lo que
+    espera el worker que lo publica),
+  - entrega: desde que se publica hasta que un socket sano lo recibe,
+  - mensajes descartados y conexiones cerradas por lentas, y qué fracción de los eventos
+    recibió cada grupo.
+
+No usa red ni base: FakeWebSocket (tests/fake_websocket.py) hace de cliente.
+
+    python -m benchmarks.bench_websocket_fanout
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from app.core import websocket_manager
+from app.core.websocket_manager import ConnectionManager
+from benchmarks.common import latency_summary
+from tests.fake_websocket import FakeWebSocket
+
+TENANTS = int(os.getenv("BENCH_TENANTS", "4"))
+SOCKETS_PER_TENANT = int(os.getenv("BENCH_SOCKETS_PER_TENANT", "300"))
+SLOW_SHARE = float(os.getenv("BENCH_SLOW_SHARE", "0.1"))
+STALLED_SHARE = float(os.getenv("BENCH_STALLED_SHARE", "0.02"))
+SLOW_SEND_MS = float(os.getenv("BENCH_SLOW_SEND_MS", "50"))
+EVENTS = int(os.getenv("BENCH_EVENTS", "300"))
+EVENT_RATE = float(os.getenv("BENCH_EVENT_RATE", "20"))
+
+
+class TimedWebSocket(FakeWebSocket):
+    """Anota cuándo recibe cada evento; con `delay` cada envío tarda ese tiempo."""
+
+    def __init__(self, stalled: bool = False, delay: float = 0.0):
+        super().__init__(stalled=stalled)
+        self.delay = delay
+        self.received_at = []
+
+    async def send_text(self, payload: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        await super().send_text(payload)
+        # Solo se anota: decodificar aquí costaría más que el propio reparto
+        self.received_at.append((payload, time.perf_counter()))
+
+
+def _kind(index: int) -> str:
+    stalled = round(SOCKETS_PER_TENANT * STALLED_SHARE)
+    slow = round(SOCKETS_PER_TENANT * SLOW_SHARE)
+    if index < stalled:
+        return "colgado"
+    if index < stalled + slow:
+        return "lento"
+    return "sano"
+
+
+async def run() -> dict:
+    manager = ConnectionManager()
+    sockets = {"sano": [], "lento": [], "colgado": []}
+    for t in range(TENANTS):
+        for i in range(SOCKETS_PER_TENANT):
+            kind = _kind(i)
+            websocket = TimedWebSocket(stalled=kind == "colgado",
+                                       delay=SLOW_SEND_MS / 1000 if kind == "lento" else 0.0)
+            await manager.connect(websocket, f"tenant-{t}", owner=True)
+            sockets[kind].append(websocket)
+
+    fanout_ms, sent_at = [], {}
+    interval = 1 / EVENT_RATE
+    scheduled = time.perf_counter()
+    for seq in range(1, EVENTS + 1):
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        for t in range(TENANTS):
+            payload = json.dumps({"seq": seq, "event": "NEW_ORDER", "tenant": t})
+            started = time.perf_counter()
+            manager.deliver_local(f"tenant-{t}", payload)
+            sent_at[payload] = started
+            fanout_ms.append((time.perf_counter() - started) * 1000)
+        scheduled += interval
+    # Tiempo para que los escritores vacíen lo que quedó en cola
+    await asyncio.sleep(max(1.0, SLOW_SEND_MS / 1000 * websocket_manager.WS_SEND_QUEUE_SIZE))
+
+    delivery_ms = [(received - sent_at[payload]) * 1000
+                   for ws in sockets["sano"] for payload, received in ws.received_at if payload in sent_at]
+    stats = manager.stats()
+    result = {
+        "sockets": {kind: len(group) for kind, group in sockets.items()},
+        "reparto_por_evento": {**latency_summary(fanout_ms), "avg_ms": round(statistics.mean(fanout_ms), 3)},
+        "entrega_a_sanos": latency_summary(delivery_ms),
+        "eventos_recibidos": {
+            kind: round(sum(len(ws.received_at) for ws in group) / (len(group) * EVENTS), 3) if group else None
+            for kind, group in sockets.items()
+        },
+        "descartados": stats["dropped_messages"],
+        "cerrados_por_lentos": sum(1 for group in sockets.values() for ws in group
+                                   if ws.close_code == websocket_manager.CLOSE_SLOW_CONSUMER),
+        "conexiones_abiertas": stats["connections"],
+    }
+    for tenant_connections in list(manager.active_connections.values()):
+        for connection in list(tenant_connections.values()):
+            connection.close()
+    return result
+
+
+def main():
+    # Cientos de sockets por negocio: el límite por defecto (50) los rechazaría
+    websocket_manager.WS_MAX_CONNECTIONS_PER_TENANT = SOCKETS_PER_TENANT
+    websocket_manager.WS_MAX_CONNECTIONS = max(websocket_manager.WS_MAX_CONNECTIONS, TENANTS * SOCKETS_PER_TENANT)
+    print(f"{TENANTS} negocios x {SOCKETS_PER_TENANT} sockets | lentos {SLOW_SHARE:.0%} "
+          f"({SLOW_SEND_MS}ms por envío), colgados {STALLED_SHARE:.0%} | {EVENTS} eventos a {EVENT_RATE}/s | "
+          f"cola {websocket_manager.WS_SEND_QUEUE_SIZE}, política {websocket_manager.WS_SLOW_CLIENT_POLICY}")
+    for key, value in asyncio.run(run()).items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Utilidades compartidas por los benchmarks (percentiles y un esquema descartable)."""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, NamedTuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from app.models import base
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def latency_summary(latencies_ms: List[float]) -> dict:
+    return {
+        "p50_ms": round(statistics.median(latencies_ms), 3),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 3),
+        "max_ms": round(max(latencies_ms), 3),
+    }
+
+
+class HammerResult(NamedTuple):
+    latencies_ms: List[float]   # una por transacción confirmada
+    failures: int               # transacciones que terminaron en excepción (rollback)
+    elapsed: float
+
+
+def hammer(session_factory, workers: int, duration: float, operation: Callable) -> HammerResult:
+    """
+    `workers` hilos arrancan juntos y repiten `operation(db)` + commit, cada vez con su
+    propia sesión, hasta que pasan `duration` segundos.
+    """
+    start = threading.Barrier(workers + 1)
+    latencies: List[float] = []
+    failures = [0]
+    lock = threading.Lock()
+    deadline = [0.0]
+
+    def worker():
+        start.wait()
+        mine, errors = [], 0
+        while time.perf_counter() < deadline[0]:
+            db = session_factory()
+            started = time.perf_counter()
+            try:
+                operation(db)
+                db.commit()
+                mine.append((time.perf_counter() - started) * 1000)
+            except Exception:
+                db.rollback()
+                errors += 1
+            finally:
+                db.close()
+        with lock:
+            latencies.extend(mine)
+            failures[0] += errors
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(worker) for _ in range(workers)]
+        deadline[0] = time.perf_counter() + duration
+        began = time.perf_counter()
+        start.wait()
+        for future in futures:
+            future.result()
+    return HammerResult(latencies, failures[0], time.perf_counter() - began)
+
+
+@contextmanager
+def bench_schema(engine: Engine, schema: str, pool_size: int = 5) -> Iterator[Engine]:
+    """
+    Crea las tablas de la app en un esquema propio y devuelve un motor cuyas conexiones lo
+    usan (search_path, así también lo ven las consultas en SQL crudo). Al salir lo borra:
+    el benchmark nunca toca los datos reales de DATABASE_URL.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+        conn.execute(text(f"SET LOCAL search_path TO {schema}, public"))
+        base.Base.metadata.create_all(conn)
+
+    bench_engine = create_engine(
+        engine.url.render_as_string(hide_password=False), pool_size=pool_size, max_overflow=0
+    )
+
+    @event.listens_for(bench_engine, "connect")
+    def _search_path(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET search_path TO {schema}, public")
+        cursor.close()
+        dbapi_connection.commit()
+
+    try:
+        yield bench_engine
+    finally:
+        bench_engine.dispose()
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
 
 # Cargar variables de entorno desde .env
@@ -7,17 +8,33 @@ load_dotenv()
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 from starlette.websockets import WebSocket, WebSocketDisconnect
 # Importaciones de tu aplicación
-from app.database.session import engine, Base, get_db
+from app.database.session import get_db, SessionLocal, async_engine
 from app.api import orders, auth, business, social, super_admin
 from app.models.base import Tenant, Item
 
 from app.core.websocket_manager import manager
+from app.core.security import tenant_id_from_token
+from app.core.backplane import backplane
+from app.core.request_limits import RequestSizeLimitMiddleware
+from app.core.background import register_periodic, start_background_tasks, stop_background_tasks
+from app.core.config import (
+    LIKES_FLUSH_INTERVAL_SECONDS, STATS_FLUSH_INTERVAL_SECONDS, STATS_RECONCILE_INTERVAL_SECONDS,
+    STORAGE_BACKEND, STORAGE_LOCAL_BASE_URL,
+    STORAGE_DELETE_FLUSH_INTERVAL_SECONDS, STORAGE_GC_INTERVAL_SECONDS, STORAGE_GC_DELETE,
+    EVENT_PRUNE_INTERVAL_SECONDS,
+)
+from app.services.like_service import like_counter
+from app.services.stats_service import platform_stats
+from app.services.storage_service import storage
+from app.services import event_log, image_service
+from app.services.storage_gc import deferred_deletes, storage_gc
+from app.services.slot_service import slot_cache
 
-# 1. Inicializar base de datos
-Base.metadata.create_all(bind=engine)
+# 1. El esquema lo aplica el deploy antes de arrancar: python -m app.database.migrations
 
 # 2. Configuración de Variables de Entorno
 # Importante: Configura ENV="production" y SECRET_INTERNAL_KEY en Render
@@ -44,6 +61,10 @@ async def verify_origin_key(request: Request, call_next):
     if path == "/":
         return await call_next(request)
         
+    # A2. Archivos del almacenamiento local (las etiquetas <img> no envían la key)
+    if STORAGE_BACKEND == "local" and path.startswith(STORAGE_LOCAL_BASE_URL + "/"):
+        return await call_next(request)
+
     # B. Bloqueo manual de docs en producción por seguridad extra
     if path in ["/docs", "/openapi.json", "/redoc"] and ENV == "production":
         return JSONResponse(
@@ -65,6 +86,9 @@ async def verify_origin_key(request: Request, call_next):
     # Si pasa las validaciones, continúa a la ruta solicitada
     return await call_next(request)
 
+# Corta con 413 los formularios multipart demasiado grandes antes de leerlos
+app.add_middleware(RequestSizeLimitMiddleware)
+
 # 5. Configuración de CORS
 # Se ejecuta DESPUÉS del middleware de seguridad en el flujo de respuesta
 app.add_middleware(
@@ -74,6 +98,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"], # Esto permite que el header 'X-Internal-Client' pase sin problemas
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"], # Revalidación del catálogo y paginación
 )
 
 # 6. Registro de Rutas
@@ -83,7 +108,58 @@ app.include_router(orders.router, prefix="/api/v1/orders", tags=["Pedidos Públi
 app.include_router(social.router, prefix="/api/v1/social", tags=["Capa Social"])
 app.include_router(super_admin.router, prefix="/api/v1/admin", tags=["Super Admin"])
 
-# 7. Rutas Base / Salud
+# Con el backend local, los archivos subidos se sirven desde aquí
+if STORAGE_BACKEND == "local":
+    os.makedirs(storage.backend.root, exist_ok=True)
+    app.mount(STORAGE_LOCAL_BASE_URL, StaticFiles(directory=storage.backend.root), name="media")
+
+# 7. Tareas en segundo plano
+register_periodic(
+    "likes-flush", LIKES_FLUSH_INTERVAL_SECONDS,
+    lambda: like_counter.flush(SessionLocal), run_on_shutdown=True
+)
+register_periodic(
+    "stats-flush", STATS_FLUSH_INTERVAL_SECONDS,
+    lambda: platform_stats.flush(SessionLocal), run_on_shutdown=True
+)
+register_periodic(
+    "stats-reconcile", STATS_RECONCILE_INTERVAL_SECONDS,
+    lambda: platform_stats.reconcile_with(SessionLocal)
+)
+register_periodic(
+    "storage-deletes", STORAGE_DELETE_FLUSH_INTERVAL_SECONDS,
+    lambda: deferred_deletes.flush(SessionLocal), run_on_shutdown=True
+)
+register_periodic(
+    "events-prune", EVENT_PRUNE_INTERVAL_SECONDS,
+    lambda: event_log.prune(SessionLocal)
+)
+register_periodic(
+    "storage-gc", STORAGE_GC_INTERVAL_SECONDS,
+    lambda: print(f"🧹 Limpieza de almacenamiento: {storage_gc.run(SessionLocal, dry_run=not STORAGE_GC_DELETE)}")
+)
+
+def on_backplane_message(tenant_id: str, payload: str):
+    # Cada evento llega a todos los workers: cada uno mantiene su caché de slots y sus sockets
+    slot_cache.apply_event(tenant_id, payload)
+    manager.deliver_local(tenant_id, payload)
+
+@app.on_event("startup")
+async def on_startup():
+    await start_background_tasks()
+    await backplane.start(on_backplane_message)
+    manager.start_heartbeat()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stop_background_tasks()
+    await manager.stop_heartbeat()
+    await backplane.stop()
+    await async_engine.dispose()
+    storage.shutdown()
+    image_service.shutdown()
+
+# 8. Rutas Base / Salud
 @app.get("/", tags=["Salud"])
 def health_check():
     return {
@@ -92,15 +168,23 @@ def health_check():
         "timestamp": "2026-01-03T12:52:41Z"
     }
 @app.websocket("/ws/{tenant_id}")
-async def websocket_endpoint(websocket: WebSocket, tenant_id: str):
-    await manager.connect(websocket, tenant_id)
+async def websocket_endpoint(websocket: WebSocket, tenant_id: str, last_seq: Optional[int] = None,
+                             token: Optional[str] = None):
+    # last_seq: último evento que vio el cliente; se le reenvía solo lo que se perdió
+    # token: el panel del dueño manda su JWT (las tiendas públicas no): cuenta en su propio límite
+    # y es el único que recibe pedidos y reposición (ver app/core/websocket_manager.py)
+    owner = tenant_id_from_token(token) == tenant_id
+    connection = await manager.connect(websocket, tenant_id, last_seq, owner=owner)
+    if connection is None:
+        return
     try:
         while True:
-            # Esto mantiene la conexión abierta esperando mensajes (pings)
-            data = await websocket.receive_text() 
+            # Esto mantiene la conexión abierta esperando mensajes (pongs / pings del cliente)
+            data = await websocket.receive_text()
+            manager.handle_message(connection, data)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, tenant_id)
+        manager.disconnect(connection)
         print(f"🔌 Cliente desconectado de {tenant_id}")
     except Exception as e:
         print(f"⚠️ Error inesperado en socket: {e}")
-        manager.disconnect(websocket, tenant_id)  
\ No newline at end of file
+        manager.disconnect(connection)  
\ No newline at end of file
@@ -0,0 +1,15 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+
+def race(workers: int, task: Callable[[], object]) -> List[object]:
+    """Ejecuta `task` en `workers` hilos que arrancan a la vez y devuelve sus resultados."""
+    barrier = threading.Barrier(workers)
+
+    def run():
+        barrier.wait()
+        return task()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [f.result() for f in [pool.submit(run) for _ in range(workers)]]
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# app.database.session crea los motores al importarse: sin DATABASE_URL las pruebas usan SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.models import base  # noqa: E402
+from tests.postgres import TEST_DATABASE_URL, postgres_engine  # noqa: E402
+
+# items usa ARRAY (solo Postgres): en SQLite las pruebas se arreglan sin esa tabla
+SQLITE_TABLES = ["tenants", "wallets", "wallet_transactions", "item_variants", "item_extras"]
+CONCURRENCY_SCHEMA = "concurrency_tests"
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def session_factory(request, tmp_path):
+    """
+    Fábrica de sesiones sobre una base compartida entre hilos: un archivo SQLite (escrituras
+    serializadas por el lock de la base) y, si hay TEST_DATABASE_URL, PostgreSQL de verdad.
+    """
+    if request.param == "sqlite":
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'test.db'}",
+            connect_args={"timeout": 30, "check_same_thread": False},
+        )
+        tables = [base.Base.metadata.tables[name] for name in SQLITE_TABLES]
+        base.Base.metadata.create_all(engine, tables=tables)
+        yield sessionmaker(bind=engine)
+        engine.dispose()
+        return
+
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL no definida")
+    engine = postgres_engine(pool_size=30).execution_options(schema_translate_map={None: CONCURRENCY_SCHEMA})
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {CONCURRENCY_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {CONCURRENCY_SCHEMA}"))
+        base.Base.metadata.create_all(conn)
+    yield sessionmaker(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {CONCURRENCY_SCHEMA} CASCADE"))
+    engine.dispose()
@@ -0,0 +1,24 @@
+import asyncio
+from typing import List, Optional
+
+
+class FakeWebSocket:
+    """Lo mínimo de starlette.WebSocket que usa el manager. `stalled`: send_text nunca termina."""
+
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+        self.accepted = False
+        self.sent: List[str] = []
+        self.close_code: Optional[int] = None
+        self._never = asyncio.Event()
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, payload: str):
+        if self.stalled:
+            await self._never.wait()
+        self.sent.append(payload)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
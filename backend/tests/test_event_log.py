@@ -0,0 +1,40 @@
+import json
+
+from app.services.event_log import EventBuffer
+
+TENANT = "tenant-1"
+
+
+def _payload(seq):
+    return json.dumps({"seq": seq, "event": "NEW_ORDER"})
+
+
+def _seqs(events):
+    return [event.seq for event in events]
+
+
+def test_out_of_order_events_are_kept_in_seq_order():
+    buffer = EventBuffer(size=10)
+    # Dos workers publicaron en distinto orden del que confirmaron
+    for seq in (1, 2, 4, 3, 3, 5):
+        buffer.remember(TENANT, _payload(seq))
+    assert _seqs(buffer.since(TENANT, 1)) == [2, 3, 4, 5]
+
+
+def test_a_gap_sends_the_replay_to_the_table():
+    buffer = EventBuffer(size=10)
+    for seq in (1, 2, 4):
+        buffer.remember(TENANT, _payload(seq))
+    assert buffer.since(TENANT, 1) is None
+    # Lo que ya está en memoria sirve para completar lo que devolvió la tabla
+    assert _seqs(buffer.since(TENANT, 3, require_complete=False)) == [4]
+    buffer.remember(TENANT, _payload(3))
+    assert _seqs(buffer.since(TENANT, 1)) == [2, 3, 4]
+
+
+def test_oldest_events_are_evicted_first():
+    buffer = EventBuffer(size=3)
+    for seq in (5, 6, 7, 4, 8):
+        buffer.remember(TENANT, _payload(seq))
+    assert _seqs(buffer.since(TENANT, 5)) == [6, 7, 8]
+    assert buffer.since(TENANT, 3) is None
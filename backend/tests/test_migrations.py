@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import text
+
+from app.database.migrations import MIGRATIONS, run_migrations
+from tests.postgres import postgres_engine, requires_postgres
+
+pytestmark = requires_postgres
+
+
+def _reset(conn):
+    conn.execute(text("DROP SCHEMA public CASCADE"))
+    conn.execute(text("CREATE SCHEMA public"))
+
+
+def test_migrations_apply_once_and_leave_valid_indexes():
+    engine = postgres_engine(isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        trgm = conn.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+        if trgm is None:
+            engine.dispose()
+            pytest.skip("pg_trgm no está instalado en este servidor")
+        _reset(conn)
+    try:
+        applied = run_migrations(engine)
+        assert applied == sorted(m.version for m in MIGRATIONS)
+        assert run_migrations(engine) == []
+        with engine.connect() as conn:
+            invalid = conn.execute(text("SELECT count(*) FROM pg_index WHERE NOT indisvalid")).scalar()
+            indexes = {row[0] for row in conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = 'orders'"))}
+            locks = conn.execute(text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory'")).scalar()
+        assert invalid == 0
+        assert "ix_orders_tenant_status_created_id" in indexes
+        assert "ix_orders_tenant_status_created" not in indexes
+        assert locks == 0
+    finally:
+        with engine.connect() as conn:
+            _reset(conn)
+        engine.dispose()
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, select
+from sqlalchemy.dialects import postgresql
+
+from app.services.pagination import decode_cursor, encode_cursor, keyset_filter, order_by_keys
+
+metadata = MetaData()
+posts = Table(
+    "posts", metadata,
+    Column("id", String, primary_key=True),
+    Column("created_at", DateTime),
+    Column("price", Integer),
+)
+
+
+def _sql(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+
+def test_uniform_desc_keys_compile_to_row_comparison():
+    keys = [(posts.c.created_at, "desc"), (posts.c.id, "desc")]
+    sql = _sql(keyset_filter(keys, [datetime(2024, 1, 1), "abc"]))
+    assert sql.startswith("(posts.created_at, posts.id) < (%(param_1)s")
+    assert " OR " not in sql
+
+
+def test_uniform_asc_keys_compile_to_row_comparison():
+    keys = [(posts.c.price, "asc"), (posts.c.id, "asc")]
+    sql = _sql(keyset_filter(keys, [10, "abc"]))
+    assert sql.startswith("(posts.price, posts.id) > (%(param_1)s")
+    assert " OR " not in sql
+
+
+def test_mixed_directions_keep_expanded_condition():
+    keys = [(posts.c.price, "asc"), (posts.c.id, "desc")]
+    sql = _sql(keyset_filter(keys, [10, "abc"]))
+    assert " OR " in sql and "posts.id < " in sql and "(posts.price, posts.id)" not in sql
+
+
+def test_row_comparison_pages_through_every_row():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    rows = [{"id": f"p{i:02d}", "created_at": start + timedelta(minutes=i // 3), "price": i} for i in range(20)]
+    keys = [(posts.c.created_at, "desc"), (posts.c.id, "desc")]
+    with engine.connect() as conn:
+        conn.execute(posts.insert(), rows)
+        seen, cursor = [], None
+        while True:
+            query = select(posts.c.id, posts.c.created_at).order_by(*order_by_keys(keys)).limit(3)
+            if cursor:
+                query = query.where(keyset_filter(keys, decode_cursor(cursor, 2)))
+            page = conn.execute(query).all()
+            if not page:
+                break
+            seen.extend(row.id for row in page)
+            cursor = encode_cursor(page[-1].created_at, page[-1].id)
+    expected = [r["id"] for r in sorted(rows, key=lambda r: (r["created_at"], r["id"]), reverse=True)]
+    assert seen == expected
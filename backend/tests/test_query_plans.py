@@ -0,0 +1,121 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.models import base
+from app.services.pagination import keyset_filter, order_by_keys
+from tests.postgres import postgres_engine, requires_postgres
+
+pytestmark = requires_postgres
+
+SCHEMA = "plan_tests"
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+@pytest.fixture(scope="module")
+def conn():
+    engine = postgres_engine().execution_options(schema_translate_map={None: SCHEMA})
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        base.Base.metadata.create_all(conn)
+        _seed(conn)
+        conn.commit()
+        conn.execute(text("ANALYZE"))
+        # Con pocas filas el planificador prefiere recorrer la tabla (o armar un bitmap y
+        # ordenar): lo que se prueba es que exista un índice que sirva, filtro y orden, a
+        # cada consulta caliente
+        conn.execute(text("SET enable_seqscan = off"))
+        conn.execute(text("SET enable_bitmapscan = off"))
+        yield conn
+        conn.rollback()
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        conn.commit()
+    engine.dispose()
+
+
+TENANT = str(uuid.uuid4())
+
+
+def _seed(conn):
+    start = datetime(2024, 1, 1)
+    conn.execute(base.Tenant.__table__.insert(), [{"id": TENANT, "name": "Demo", "slug": "demo"}])
+    conn.execute(base.Order.__table__.insert(), [
+        {
+            "id": str(uuid.uuid4()), "tenant_id": TENANT, "status": ("pending", "completed", "cancelled")[i % 3],
+            "customer_name": "Cliente", "total_amount": 10, "created_at": start + timedelta(minutes=i),
+            "appointment_datetime": start + timedelta(hours=i),
+        }
+        for i in range(300)
+    ])
+
+
+def _plan(conn, statement) -> str:
+    return "\n".join(row[0] for row in conn.execute(Explain(statement)))
+
+
+def test_order_board_bucket_uses_index_without_sort(conn):
+    keys = [(base.Order.created_at, "desc"), (base.Order.id, "desc")]
+    statement = select(base.Order)\
+        .where(base.Order.tenant_id == TENANT, base.Order.status == "pending")\
+        .where(keyset_filter(keys, [datetime(2024, 1, 1, 3), "z"]))\
+        .order_by(*order_by_keys(keys)).limit(51)
+    plan = _plan(conn, statement)
+    assert "ix_orders_tenant_status_created_id" in plan
+    assert "Sort" not in plan
+
+
+def test_calendar_range_uses_appointment_index(conn):
+    statement = select(base.Order).where(
+        base.Order.tenant_id == TENANT,
+        base.Order.appointment_datetime >= datetime(2024, 1, 1),
+        base.Order.appointment_datetime < datetime(2024, 2, 1),
+    )
+    assert "ix_orders_tenant_appointment" in _plan(conn, statement)
+
+
+def test_feed_page_uses_posts_index_without_sort(conn):
+    keys = [(base.Post.created_at, "desc"), (base.Post.id, "desc")]
+    statement = select(base.Post)\
+        .where(base.Post.tenant_id == TENANT)\
+        .where(keyset_filter(keys, [datetime(2024, 1, 1), "z"]))\
+        .order_by(*order_by_keys(keys)).limit(21)
+    plan = _plan(conn, statement)
+    assert "ix_posts_tenant_created" in plan
+    assert "Sort" not in plan
+
+
+def test_catalog_sync_uses_items_index(conn):
+    keys = [(base.Item.updated_at, "asc"), (base.Item.id, "asc")]
+    statement = select(base.Item)\
+        .where(base.Item.tenant_id == TENANT)\
+        .where(keyset_filter(keys, [datetime(2024, 1, 1), ""]))\
+        .order_by(*order_by_keys(keys)).limit(101)
+    plan = _plan(conn, statement)
+    assert "ix_items_tenant_updated" in plan
+    assert "Sort" not in plan
+
+
+def test_transaction_history_uses_created_index(conn):
+    keys = [(base.WalletTransaction.created_at, "desc"), (base.WalletTransaction.id, "desc")]
+    statement = select(base.WalletTransaction)\
+        .where(keyset_filter(keys, [datetime(2024, 1, 1), 10 ** 9]))\
+        .order_by(*order_by_keys(keys)).limit(51)
+    plan = _plan(conn, statement)
+    assert "ix_wallet_transactions_created" in plan
+    assert "Sort" not in plan
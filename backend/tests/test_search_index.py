@@ -0,0 +1,85 @@
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.services.search_service import InvertedIndex
+from tests.concurrency import race
+
+TENANT = "tenant-1"
+NOW = datetime(2024, 1, 1)
+
+
+class _FakeQuery:
+    """Imita db.query(...).filter(...).all(); `on_load` corre en medio de la lectura."""
+
+    def __init__(self, rows, on_load=None):
+        self.rows, self.on_load = rows, on_load
+
+    def filter(self, *_):
+        return self
+
+    def all(self):
+        if self.on_load:
+            self.on_load()
+        return self.rows
+
+
+class _FakeDB:
+    def __init__(self, rows, on_load=None):
+        self._query = _FakeQuery(rows, on_load)
+
+    def query(self, *_):
+        return self._query
+
+
+def _row(item_id, name, description=""):
+    return SimpleNamespace(id=item_id, name=name, description=description, updated_at=NOW)
+
+
+def test_ranks_name_matches_and_tolerates_typos():
+    index = InvertedIndex()
+    index.ensure_tenant(_FakeDB([
+        _row("a", "Pizza Napolitana"),
+        _row("b", "Empanada", "con salsa de pizza"),
+        _row("c", "Hamburguesa"),
+    ]), TENANT)
+    assert index.search(TENANT, "piza", 10) == ["a", "b"]
+    assert index.search(TENANT, "hamburgesa", 10) == ["c"]
+
+
+def test_changes_during_initial_load_are_not_lost():
+    index = InvertedIndex()
+
+    def concurrent_writes():
+        # Otro request guarda y borra productos mientras el índice lee la tabla
+        index.upsert(TENANT, "new", "Tarta de Manzana", "", NOW)
+        index.upsert(TENANT, "old", "Pizza Especial", "", NOW)
+        index.remove(TENANT, "gone")
+
+    index.ensure_tenant(_FakeDB([_row("old", "Pizza"), _row("gone", "Flan")], concurrent_writes), TENANT)
+    assert index.search(TENANT, "manzana", 10) == ["new"]
+    assert index.search(TENANT, "especial", 10) == ["old"]
+    assert index.search(TENANT, "flan", 10) == []
+
+
+def test_concurrent_writers_and_readers_stay_consistent():
+    index = InvertedIndex()
+    index.ensure_tenant(_FakeDB([]), TENANT)
+    counter = iter(range(10_000))
+    counter_lock = threading.Lock()
+
+    def work():
+        with counter_lock:
+            worker = next(counter)
+        for i in range(60):
+            item_id = f"{worker}-{i}"
+            index.upsert(TENANT, item_id, f"Producto {worker} sabor {i}", "rico", NOW)
+            index.search(TENANT, "sabor", 20)
+            if i % 2:
+                index.remove(TENANT, item_id)
+        return worker
+
+    workers = race(6, work)
+    remaining = index.search(TENANT, "producto", 10_000)
+    assert len(remaining) == len(workers) * 30
+    assert all(int(item_id.split("-")[1]) % 2 == 0 for item_id in remaining)
@@ -0,0 +1,49 @@
+import json
+from datetime import date, datetime
+
+from app.services.slot_service import SlotCache, slot_window
+from app.services.tenant_cache import BusinessHourSnapshot, TenantSnapshot
+
+TENANT = "tenant-1"
+DAY = date(2024, 1, 1)  # lunes
+
+
+def _tenant(interval=30):
+    # Lunes de 09:00 a 12:00
+    hours = (BusinessHourSnapshot(day_of_week=1, open_time="09:00", close_time="12:00", is_closed=False),)
+    return TenantSnapshot(
+        id=TENANT, name="Negocio", slug="negocio", phone=None, logo_url=None, primary_color=None,
+        secundary_color=None, is_active=True, appointment_interval=interval, has_delivery=False,
+        delivery_price=0.0, business_hours=hours,
+    )
+
+
+def test_slot_window_covers_the_whole_slot():
+    # Una cita a las 09:40 ocupa el slot 09:30-10:00, igual que en build_day
+    assert slot_window(_tenant(), datetime(2024, 1, 1, 9, 40)) == (
+        datetime(2024, 1, 1, 9, 30), datetime(2024, 1, 1, 10, 0)
+    )
+
+
+def test_slot_window_outside_business_hours_is_the_exact_minute():
+    begin, end = slot_window(_tenant(), datetime(2024, 1, 1, 18, 0))
+    assert (begin, end) == (datetime(2024, 1, 1, 18, 0), datetime(2024, 1, 1, 18, 1))
+
+
+def _cached(cache):
+    cache._store(TENANT, 0, {DAY: "data"})
+    return cache
+
+
+def test_apply_event_invalidates_the_appointment_day():
+    cache = _cached(SlotCache())
+    payload = json.dumps({"event": "ORDER_STATUS", "seq": 3, "appointment": "2024-01-01T09:30:00"})
+    cache.apply_event(TENANT, payload)
+    assert cache.stats()["entries"] == 0
+
+
+def test_apply_event_ignores_orders_without_appointment():
+    cache = _cached(SlotCache())
+    cache.apply_event(TENANT, json.dumps({"event": "NEW_ORDER", "seq": 4, "appointment": None}))
+    cache.apply_event(TENANT, "no es json")
+    assert cache.stats()["entries"] == 1
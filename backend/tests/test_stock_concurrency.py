@@ -0,0 +1,98 @@
+import uuid
+
+from app.models import base
+from app.services.stock_service import StockReservation, StockUnavailable
+from tests.concurrency import race
+
+WORKERS = 20
+STOCK = 7
+# Sobra extra: el único que se agota es la variante, y lo que tomaron los pedidos
+# rechazados tiene que volver
+EXTRA_STOCK = STOCK * 2 + 5
+
+
+def _seed(session_factory):
+    db = session_factory()
+    tenant_id, item_id = str(uuid.uuid4()), str(uuid.uuid4())
+    db.add(base.Tenant(id=tenant_id, name="Demo", slug=f"demo-{tenant_id[:8]}"))
+    if db.get_bind().dialect.name == "postgresql":
+        # En SQLite no existe la tabla items (ARRAY) ni se validan las claves foráneas
+        db.add(base.Item(id=item_id, tenant_id=tenant_id, name="Pizza", price=10))
+        db.flush()
+    variant = base.ItemVariant(item_id=item_id, name="Grande", price=10, stock=STOCK)
+    extra = base.ItemExtra(item_id=item_id, name="Queso", price=1, stock=EXTRA_STOCK)
+    db.add_all([variant, extra])
+    db.commit()
+    ids = variant.id, extra.id
+    db.close()
+    return ids
+
+
+def test_hot_sku_is_never_oversold(session_factory):
+    variant_id, extra_id = _seed(session_factory)
+
+    def checkout():
+        db = session_factory()
+        try:
+            reservation = StockReservation()
+            reservation.add(base.ItemVariant, variant_id, 1, 0, "Pizza (Grande)")
+            reservation.add(base.ItemExtra, extra_id, 2, 0, "Queso")
+            reservation.apply(db)
+            db.commit()
+            return True
+        except StockUnavailable as e:
+            assert [f.label for f in e.failures] == ["Pizza (Grande)"]
+            return False
+        finally:
+            db.close()
+
+    results = race(WORKERS, checkout)
+
+    db = session_factory()
+    variant_stock = db.get(base.ItemVariant, variant_id).stock
+    extra_stock = db.get(base.ItemExtra, extra_id).stock
+    db.close()
+    assert results.count(True) == STOCK
+    assert variant_stock == 0
+    # Los pedidos rechazados no se llevaron el extra: rollback de todo el pedido
+    assert extra_stock == EXTRA_STOCK - STOCK * 2
+
+
+def test_failed_line_rolls_back_the_whole_order(session_factory):
+    variant_id, extra_id = _seed(session_factory)
+    db = session_factory()
+    reservation = StockReservation()
+    reservation.add(base.ItemExtra, extra_id, 1, 0, "Queso")
+    reservation.add(base.ItemVariant, variant_id, STOCK + 1, 1, "Pizza (Grande)")
+    try:
+        reservation.apply(db)
+    except StockUnavailable as e:
+        assert [(f.line, f.model) for f in e.failures] == [(1, "item_variants")]
+    else:
+        raise AssertionError("se esperaba StockUnavailable")
+    finally:
+        db.close()
+
+    db = session_factory()
+    assert db.get(base.ItemExtra, extra_id).stock == EXTRA_STOCK
+    assert db.get(base.ItemVariant, variant_id).stock == STOCK
+    db.close()
+
+
+def test_reservation_reports_rows_it_sold_out(session_factory):
+    variant_id, extra_id = _seed(session_factory)
+    db = session_factory()
+    partial = StockReservation()
+    partial.add(base.ItemVariant, variant_id, STOCK - 1, 0, "Pizza (Grande)")
+    partial.apply(db)
+    db.commit()
+    assert partial.sold_out == set()
+
+    last = StockReservation()
+    last.add(base.ItemVariant, variant_id, 1, 0, "Pizza (Grande)")
+    last.add(base.ItemExtra, extra_id, 1, 0, "Queso")
+    last.apply(db)
+    db.commit()
+    db.close()
+    # Solo lo que se agotó obliga a regenerar el catálogo cacheado
+    assert last.sold_out == {("item_variants", variant_id)}
@@ -0,0 +1,46 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.services import upload_service
+from app.services.upload_service import check_uploads, sniff_image_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+def _upload(data: bytes, name: str = "foto.png") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=name)
+
+
+def test_heic_is_rejected():
+    # Pillow no lo decodifica sin pillow-heif: se rechaza antes de procesar
+    assert sniff_image_type(b"\x00\x00\x00\x18ftypheic" + b"\x00" * 16) is None
+    assert sniff_image_type(b"\x00\x00\x00\x18ftypmif1" + b"\x00" * 16) is None
+
+
+def test_avif_only_when_pillow_decodes_it(monkeypatch):
+    head = b"\x00\x00\x00\x1cftypavif" + b"\x00" * 16
+    monkeypatch.setattr(upload_service, "_avif_supported", lambda: False)
+    assert sniff_image_type(head) is None
+    monkeypatch.setattr(upload_service, "_avif_supported", lambda: True)
+    assert sniff_image_type(head) == "image/avif"
+
+
+def test_check_reads_in_place_and_rewinds():
+    upload = _upload(PNG)
+    checked = asyncio.run(check_uploads([upload]))
+    assert checked[0].size == len(PNG) and checked[0].content_type == "image/png"
+    # Queda al inicio para que el pipeline de imágenes lo lea completo
+    assert checked[0].upload.file.read() == PNG
+
+
+def test_check_enforces_limits(monkeypatch):
+    monkeypatch.setattr(upload_service, "UPLOAD_CHUNK_SIZE", 16)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(check_uploads([_upload(PNG), _upload(PNG)], max_request_bytes=len(PNG) + 10))
+    assert exc.value.status_code == 413
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(check_uploads([_upload(b"hola", "x.txt")]))
+    assert exc.value.status_code == 415
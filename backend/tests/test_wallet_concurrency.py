@@ -0,0 +1,48 @@
+import uuid
+
+from sqlalchemy import func
+
+from app.models import base
+from app.services import wallet_service
+from tests.concurrency import race
+
+WORKERS = 25
+BALANCE = 10
+
+
+def _seed(session_factory) -> str:
+    db = session_factory()
+    tenant_id = str(uuid.uuid4())
+    db.add(base.Tenant(id=tenant_id, name="Demo", slug=f"demo-{tenant_id[:8]}"))
+    db.add(base.Wallet(tenant_id=tenant_id, balance=BALANCE))
+    db.commit()
+    db.close()
+    return tenant_id
+
+
+def test_concurrent_debits_never_go_negative(session_factory):
+    tenant_id = _seed(session_factory)
+
+    def debit():
+        db = session_factory()
+        try:
+            new_balance = wallet_service.debit(db, tenant_id, 1, "Pedido")
+            db.commit()
+            return new_balance
+        finally:
+            db.close()
+
+    results = race(WORKERS, debit)
+
+    db = session_factory()
+    balance = db.query(base.Wallet.balance).filter(base.Wallet.tenant_id == tenant_id).scalar()
+    ledger = db.query(func.count(base.WalletTransaction.id), func.min(base.WalletTransaction.new_balance))\
+        .filter(base.WalletTransaction.tenant_id == tenant_id).one()
+    db.close()
+
+    accepted = [r for r in results if r is not None]
+    assert len(accepted) == BALANCE
+    # Cada débito vio un saldo distinto: ninguno se perdió ni se pisó con otro
+    assert sorted(accepted) == list(range(BALANCE))
+    assert balance == 0
+    assert ledger == (BALANCE, 0)
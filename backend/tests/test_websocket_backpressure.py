@@ -0,0 +1,140 @@
+import asyncio
+import json
+import time
+
+from app.core import websocket_manager
+from app.core.websocket_manager import CLOSE_SLOW_CONSUMER, CLOSE_TOO_MANY_CONNECTIONS, ConnectionManager
+from tests.fake_websocket import FakeWebSocket
+
+TENANT = "tenant-1"
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_stalled_consumer_never_delays_the_others(monkeypatch):
+    monkeypatch.setattr(websocket_manager, "WS_SEND_QUEUE_SIZE", 10)
+    monkeypatch.setattr(websocket_manager, "WS_SLOW_CLIENT_POLICY", "drop_oldest")
+    monkeypatch.setattr(websocket_manager, "WS_MAX_DROPPED_MESSAGES", 5)
+
+    async def scenario():
+        manager = ConnectionManager()
+        stalled = FakeWebSocket(stalled=True)
+        fast = [FakeWebSocket() for _ in range(40)]
+        stalled_connection = await manager.connect(stalled, TENANT, owner=True)
+        for websocket in fast:
+            await manager.connect(websocket, TENANT, owner=True)
+
+        started = time.perf_counter()
+        for i in range(40):
+            # Entregar es solo encolar: nunca espera a un socket
+            manager.deliver_local(TENANT, json.dumps({"event": "NEW_ORDER", "n": i}))
+            await _settle()
+        elapsed = time.perf_counter() - started
+        await _settle()
+        return manager, stalled, stalled_connection, fast, elapsed
+
+    manager, stalled, stalled_connection, fast, elapsed = asyncio.run(scenario())
+
+    assert elapsed < 1
+    assert all(len(ws.sent) == 40 for ws in fast)
+    # Cola acotada: se descartaron mensajes hasta el límite y luego se la desconectó
+    assert stalled_connection.closed
+    assert stalled.close_code == CLOSE_SLOW_CONSUMER
+    assert manager.dropped_messages == 5 + 1
+    assert manager.stats()["connections"] == 40
+
+
+def test_disconnect_policy_drops_slow_client_on_first_overflow(monkeypatch):
+    monkeypatch.setattr(websocket_manager, "WS_SEND_QUEUE_SIZE", 3)
+    monkeypatch.setattr(websocket_manager, "WS_SLOW_CLIENT_POLICY", "disconnect")
+
+    async def scenario():
+        manager = ConnectionManager()
+        stalled = FakeWebSocket(stalled=True)
+        connection = await manager.connect(stalled, TENANT, owner=True)
+        await _settle()
+        # Sin ceder el loop el escritor no saca nada: 3 llenan la cola y el 4º la desborda
+        results = [connection.enqueue(f'{{"n": {i}}}') for i in range(5)]
+        await _settle()
+        return manager, stalled, results
+
+    manager, stalled, results = asyncio.run(scenario())
+    assert results == [True, True, True, False, False]
+    assert stalled.close_code == CLOSE_SLOW_CONSUMER
+    assert manager.stats()["connections"] == 0
+
+
+def test_send_timeout_closes_a_half_dead_socket(monkeypatch):
+    monkeypatch.setattr(websocket_manager, "WS_SEND_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        manager = ConnectionManager()
+        stalled = FakeWebSocket(stalled=True)
+        await manager.connect(stalled, TENANT, owner=True)
+        manager.deliver_local(TENANT, '{"event": "NEW_ORDER"}')
+        await asyncio.sleep(0.2)
+        return manager, stalled
+
+    manager, stalled = asyncio.run(scenario())
+    assert stalled.close_code == CLOSE_SLOW_CONSUMER
+    assert manager.stats()["connections"] == 0
+
+
+def test_public_sockets_never_take_the_owner_capacity(monkeypatch):
+    monkeypatch.setattr(websocket_manager, "WS_MAX_CONNECTIONS_PER_TENANT", 2)
+    monkeypatch.setattr(websocket_manager, "WS_MAX_PUBLIC_CONNECTIONS_PER_TENANT", 3)
+    monkeypatch.setattr(websocket_manager, "WS_MAX_CONNECTIONS", 10)
+    monkeypatch.setattr(websocket_manager, "WS_OWNER_RESERVED_CONNECTIONS", 6)
+
+    async def scenario():
+        manager = ConnectionManager()
+        public = [FakeWebSocket() for _ in range(5)]
+        owners = [FakeWebSocket() for _ in range(3)]
+        public_results = [await manager.connect(ws, TENANT) for ws in public]
+        # Otro negocio: solo quedan 10 - 6 = 4 lugares públicos en el proceso
+        other = FakeWebSocket()
+        other_result = await manager.connect(other, "tenant-2")
+        full_result = await manager.connect(FakeWebSocket(), "tenant-3")
+        assert full_result is None
+        owner_results = [await manager.connect(ws, TENANT, owner=True) for ws in owners]
+        return manager, public, public_results, other, other_result, owners, owner_results
+
+    manager, public, public_results, other, other_result, owners, owner_results = asyncio.run(scenario())
+    assert [r is not None for r in public_results] == [True, True, True, False, False]
+    assert other_result is not None
+    assert [r is not None for r in owner_results] == [True, True, False]
+    # Los rechazados se cierran sin aceptar el handshake
+    rejected = public[3:] + owners[2:]
+    assert all(not ws.accepted and ws.close_code == CLOSE_TOO_MANY_CONNECTIONS for ws in rejected)
+    assert manager.stats()["connections"] == 6
+    assert manager.stats()["owner_connections"] == 2
+    assert manager.rejected_connections == 4
+
+
+def test_storefront_sockets_only_see_slot_changes():
+    async def scenario():
+        manager = ConnectionManager()
+        owner, storefront = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(owner, TENANT, owner=True)
+        # Sin token no hay reposición: los eventos viejos llevan pedidos
+        await manager.connect(storefront, TENANT, last_seq=0)
+        events = [
+            {"seq": 1, "event": "NEW_ORDER", "customer": "Ana", "appointment": "2024-01-01T10:00:00"},
+            {"seq": 2, "event": "NEW_ORDER", "customer": "Luis", "appointment": None},
+            {"seq": 3, "event": "ORDER_STATUS", "status": "cancelled", "appointment": "2024-01-01T10:00:00"},
+        ]
+        for event in events:
+            manager.deliver_local(TENANT, json.dumps(event))
+        # Que los dos escritores vacíen sus colas antes de terminar
+        await asyncio.sleep(0.05)
+        return owner, storefront
+
+    owner, storefront = asyncio.run(scenario())
+    assert [json.loads(p)["seq"] for p in owner.sent] == [1, 2, 3]
+    assert [json.loads(p) for p in storefront.sent] == [
+        {"event": "SLOT_TAKEN", "appointment": "2024-01-01T10:00:00"},
+        {"event": "SLOT_RELEASED", "appointment": "2024-01-01T10:00:00"},
+    ]
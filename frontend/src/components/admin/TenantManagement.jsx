@@ -1,10 +1,65 @@
-import React, { useState } from 'react';
-import { Search, CheckCircle, XCircle, Plus, Minus, ExternalLink, X, Save } from 'lucide-react';
+import React, { useState, useEffect, useCallback } from 'react';
+import { Search, CheckCircle, XCircle, Plus, Minus, ExternalLink, X, Save, ChevronLeft, ChevronRight } from 'lucide-react';
 import api from '../../services/api';
 import { toast } from 'react-hot-toast';
 
-const TenantManagement = ({ tenants, onRefresh }) => {
+const PAGE_SIZE = 50;
+// Mismos campos que acepta /admin/tenants (AdminService.TENANT_SORT_FIELDS)
+const SORT_OPTIONS = [
+  { value: 'created_at', label: 'Fecha de alta' },
+  { value: 'name', label: 'Nombre' },
+  { value: 'balance', label: 'Créditos' },
+  { value: 'orders', label: 'Pedidos' },
+];
+
+const TenantManagement = ({ onRefresh }) => {
+  // Búsqueda, orden y paginación los resuelve el servidor; aquí solo se guarda la página actual
+  const [tenants, setTenants] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [page, setPage] = useState(1);
+  const [sortBy, setSortBy] = useState('created_at');
+  const [order, setOrder] = useState('desc');
   const [searchTerm, setSearchTerm] = useState("");
+  const [query, setQuery] = useState("");
+  const [loading, setLoading] = useState(false);
+  const totalPages = Math.max(1, Math.ceil(total / PAGE_SIZE));
+
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      setQuery(searchTerm.trim());
+      setPage(1);
+    }, 400);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const fetchTenants = useCallback(async () => {
+    setLoading(true);
+    try {
+      const res = await api.get('/admin/tenants', {
+        params: { page, page_size: PAGE_SIZE, sort_by: sortBy, order, q: query || undefined }
+      });
+      setTenants(res.data);
+      setTotal(parseInt(res.headers['x-total-count'] ?? res.data.length, 10));
+    } catch (err) {
+      toast.error("Error al cargar negocios");
+    } finally {
+      setLoading(false);
+    }
+  }, [page, sortBy, order, query]);
+
+  useEffect(() => {
+    fetchTenants();
+  }, [fetchTenants]);
+
+  const refreshAll = () => {
+    fetchTenants();
+    onRefresh?.();
+  };
+
+  const changeSort = (value) => {
+    setSortBy(value);
+    setPage(1);
+  };
   
   // Estados para el Modal
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -34,7 +89,7 @@ const TenantManagement = ({ tenants, onRefresh }) => {
       
       toast.success("Billetera actualizada correctamente");
       setIsModalOpen(false);
-      onRefresh();
+      refreshAll();
     } catch (err) {
       toast.error("Error al actualizar créditos");
     }
@@ -44,31 +99,44 @@ const TenantManagement = ({ tenants, onRefresh }) => {
     try {
       await api.post(`/admin/tenants/${id}/toggle-status`);
       toast.success("Estado actualizado");
-      onRefresh();
+      refreshAll();
     } catch (err) {
       toast.error("Error al cambiar estado");
     }
   };
 
-  const filteredTenants = tenants.filter(t => 
-    t.name.toLowerCase().includes(searchTerm.toLowerCase()) || 
-    t.slug.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   return (
     <div className="relative">
       <div className="bg-white rounded-3xl border border-slate-100 shadow-sm overflow-hidden">
         {/* HEADER */}
         <div className="p-6 border-b border-slate-50 flex flex-col md:flex-row md:items-center justify-between gap-4">
-          <h3 className="font-black uppercase text-slate-900 italic tracking-tighter">Lista de Negocios</h3>
-          <div className="relative">
-            <Search className="absolute left-3 top-1/2 -translate-y-1/2 text-slate-400" size={16} />
-            <input 
-              type="text" 
-              placeholder="Buscar por nombre o slug..." 
-              className="bg-slate-50 border-none rounded-xl pl-10 pr-4 py-2 text-sm focus:ring-2 focus:ring-slate-900 w-full md:w-64 transition-all"
-              onChange={(e) => setSearchTerm(e.target.value)}
-            />
+          <h3 className="font-black uppercase text-slate-900 italic tracking-tighter">
+            Lista de Negocios <span className="text-slate-300 not-italic">({total})</span>
+          </h3>
+          <div className="flex flex-col md:flex-row gap-2">
+            <select
+              value={sortBy}
+              onChange={(e) => changeSort(e.target.value)}
+              className="bg-slate-50 border-none rounded-xl px-3 py-2 text-xs font-bold text-slate-600 focus:ring-2 focus:ring-slate-900"
+            >
+              {SORT_OPTIONS.map(opt => <option key={opt.value} value={opt.value}>{opt.label}</option>)}
+            </select>
+            <button
+              onClick={() => { setOrder(order === 'desc' ? 'asc' : 'desc'); setPage(1); }}
+              className="bg-slate-50 rounded-xl px-3 py-2 text-[10px] font-black uppercase text-slate-600 hover:bg-slate-100 transition-all"
+            >
+              {order === 'desc' ? 'Desc' : 'Asc'}
+            </button>
+            <div className="relative">
+              <Search className="absolute left-3 top-1/2 -translate-y-1/2 text-slate-400" size={16} />
+              <input 
+                type="text" 
+                value={searchTerm}
+                placeholder="Buscar por nombre o slug..." 
+                className="bg-slate-50 border-none rounded-xl pl-10 pr-4 py-2 text-sm focus:ring-2 focus:ring-slate-900 w-full md:w-64 transition-all"
+                onChange={(e) => setSearchTerm(e.target.value)}
+              />
+            </div>
           </div>
         </div>
 
@@ -84,7 +152,7 @@ const TenantManagement = ({ tenants, onRefresh }) => {
               </tr>
             </thead>
             <tbody className="divide-y divide-slate-50">
-              {filteredTenants.map((tenant) => (
+              {tenants.map((tenant) => (
                 <tr key={tenant.id} className="hover:bg-slate-50/30 transition-colors group">
                   <td className="px-6 py-4">
                     <div className="flex items-center gap-3">
@@ -149,6 +217,29 @@ const TenantManagement = ({ tenants, onRefresh }) => {
             </tbody>
           </table>
         </div>
+
+        {/* PAGINACIÓN */}
+        <div className="p-4 border-t border-slate-50 flex items-center justify-between">
+          <span className="text-[10px] font-black uppercase text-slate-400 tracking-widest">
+            {loading ? 'Cargando...' : `Página ${page} de ${totalPages}`}
+          </span>
+          <div className="flex gap-2">
+            <button
+              onClick={() => setPage(page - 1)}
+              disabled={page <= 1 || loading}
+              className="p-2 rounded-xl bg-slate-50 text-slate-500 hover:bg-slate-100 disabled:opacity-30 transition-all"
+            >
+              <ChevronLeft size={16} />
+            </button>
+            <button
+              onClick={() => setPage(page + 1)}
+              disabled={page >= totalPages || loading}
+              className="p-2 rounded-xl bg-slate-50 text-slate-500 hover:bg-slate-100 disabled:opacity-30 transition-all"
+            >
+              <ChevronRight size={16} />
+            </button>
+          </div>
+        </div>
       </div>
 
       {/* MODAL DE CRÉDITOS */}
@@ -1,23 +1,60 @@
 import React, { useState, useEffect } from 'react';
-import { Clock, ArrowUpCircle, ArrowDownCircle } from 'lucide-react';
+import { Clock, ArrowUpCircle, ArrowDownCircle, Download } from 'lucide-react';
+import { toast } from 'react-hot-toast';
 import api from '../../services/api';
 
 const TransactionHistory = () => {
   const [logs, setLogs] = useState([]);
+  // El historial llega por páginas: el cursor de la siguiente viene en X-Next-Cursor
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchLogs();
   }, []);
 
-  const fetchLogs = async () => {
-    const res = await api.get('/admin/transactions');
-    setLogs(res.data);
+  const fetchLogs = async (cursor = null) => {
+    const res = await api.get('/admin/transactions', { params: cursor ? { cursor } : {} });
+    setLogs(prev => cursor ? [...prev, ...res.data] : res.data);
+    setNextCursor(res.headers['x-next-cursor'] || null);
+  };
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      await fetchLogs(nextCursor);
+    } catch (err) {
+      toast.error("Error al cargar más movimientos");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Historial completo (sin paginar) desde el endpoint de exportación
+  const exportCsv = async () => {
+    try {
+      const res = await api.get('/admin/transactions/export', { params: { format: 'csv' }, responseType: 'blob' });
+      const url = URL.createObjectURL(res.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'movimientos.csv';
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      toast.error("No se pudo exportar el historial");
+    }
   };
 
   return (
     <div className="bg-white rounded-3xl border border-slate-100 shadow-sm overflow-hidden mt-8">
-      <div className="p-6 border-b border-slate-50">
+      <div className="p-6 border-b border-slate-50 flex items-center justify-between">
         <h3 className="font-black uppercase text-slate-900 italic tracking-tighter">Historial de Movimientos</h3>
+        <button
+          onClick={exportCsv}
+          className="flex items-center gap-2 bg-slate-50 rounded-xl px-4 py-2 text-[10px] font-black uppercase text-slate-600 hover:bg-slate-100 transition-all"
+        >
+          <Download size={14} /> Exportar CSV
+        </button>
       </div>
       <div className="overflow-x-auto">
         <table className="w-full text-left">
@@ -52,6 +89,17 @@ const TransactionHistory = () => {
           </tbody>
         </table>
       </div>
+      {nextCursor && (
+        <div className="p-4 border-t border-slate-50 flex justify-center">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-6 py-2 rounded-xl bg-slate-50 text-[10px] font-black uppercase text-slate-500 hover:bg-slate-100 disabled:opacity-50 transition-all"
+          >
+            {loadingMore ? 'Cargando...' : 'Ver más movimientos'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
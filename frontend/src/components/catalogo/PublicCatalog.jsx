@@ -13,6 +13,9 @@ const PublicCatalog = ({
   totalItems,
   handleLike,
   likedPosts,
+  hasMorePosts,
+  loadMorePosts,
+  loadingMorePosts,
   setIsDetailModalOpen,
   setSelectedItem
 }) => {
@@ -188,7 +191,12 @@ const renderItemCard = (item) => {
   }
 
   // Vista de Muro (Social Feed) - Manteniendo la lógica Instagram
-  return <PublicPosts data={data} handleLike={handleLike} likedPosts={likedPosts} />;
+  return (
+    <PublicPosts
+      data={data} handleLike={handleLike} likedPosts={likedPosts}
+      hasMore={hasMorePosts} onLoadMore={loadMorePosts} loadingMore={loadingMorePosts}
+    />
+  );
 };
 
 export default PublicCatalog;
\ No newline at end of file
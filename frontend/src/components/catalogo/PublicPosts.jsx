@@ -1,6 +1,6 @@
 import React from "react";
 import { Heart, ImageIcon } from "lucide-react";
-export const PublicPosts = ({ data, handleLike, likedPosts }) => {
+export const PublicPosts = ({ data, handleLike, likedPosts, hasMore, onLoadMore, loadingMore }) => {
  
  return (
     <div className="p-4 space-y-10 pb-32 animate-in fade-in duration-700">
@@ -32,6 +32,15 @@ export const PublicPosts = ({ data, handleLike, likedPosts }) => {
           </div>
         </div>
       ))}
+      {hasMore && (
+        <button
+          onClick={onLoadMore}
+          disabled={loadingMore}
+          className="w-full py-4 rounded-[1.5rem] bg-slate-50 text-[10px] font-black uppercase tracking-[0.3em] text-slate-500 hover:bg-slate-100 disabled:opacity-50 transition-all"
+        >
+          {loadingMore ? 'Cargando...' : 'Ver más publicaciones'}
+        </button>
+      )}
       {(!data.posts || data.posts.length === 0) && (
          <div className="py-32 flex flex-col items-center opacity-20">
             <ImageIcon size={48} strokeWidth={1} />
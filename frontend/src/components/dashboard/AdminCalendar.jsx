@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { 
   ChevronLeft, ChevronRight, Clock, User, 
   MessageCircle, Calendar as CalendarIcon, X, 
@@ -10,13 +10,40 @@ import {
   addMonths, subMonths 
 } from 'date-fns';
 import { es } from 'date-fns/locale';
+import api from '../../services/api';
 
-const AdminCalendar = ({ orders = [] }) => {
+const AdminCalendar = () => {
   const [currentMonth, setCurrentMonth] = useState(new Date());
   const [selectedDate, setSelectedDate] = useState(new Date());
   const [selectedAppointment, setSelectedAppointment] = useState(null);
+  const [appointments, setAppointments] = useState([]);
 
-  const appointments = orders.filter(order => order.appointment_datetime);
+  // Solo las citas de las semanas visibles; se siguen las páginas (X-Next-Cursor) hasta el final
+  useEffect(() => {
+    let cancelled = false;
+    const fetchAppointments = async () => {
+      // Las citas se guardan con la hora local del negocio (sin zona): mandamos igual los límites
+      const params = {
+        appointment_from: format(startOfWeek(startOfMonth(currentMonth)), "yyyy-MM-dd'T'HH:mm:ss"),
+        appointment_to: format(addDays(endOfWeek(endOfMonth(currentMonth)), 1), "yyyy-MM-dd'T'00:00:00"),
+        limit: 100
+      };
+      const result = [];
+      let cursor = null;
+      try {
+        do {
+          const res = await api.get('/orders/my-orders', { params: cursor ? { ...params, cursor } : params });
+          result.push(...res.data);
+          cursor = res.headers['x-next-cursor'] || null;
+        } while (cursor && !cancelled);
+        if (!cancelled) setAppointments(result);
+      } catch (err) {
+        console.error(err);
+      }
+    };
+    fetchAppointments();
+    return () => { cancelled = true; };
+  }, [currentMonth]);
 
  
   const renderHeader = () => (
@@ -43,7 +43,16 @@ const ServiceModal = ({ isOpen, onClose, item, onConfirm, businessHours, interva
     socket.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data);
-        if (data.event === "NEW_ORDER" && data.appointment) {
+        if (data.event === "PING") {
+          socket.send("pong");
+          return;
+        }
+        // La tienda solo recibe qué horarios se ocupan o se liberan (nunca los pedidos)
+        if (data.event === "SLOT_RELEASED" && data.appointment?.startsWith(selectedDate)) {
+          fetchBusyTimes(selectedDate);
+          return;
+        }
+        if (data.event === "SLOT_TAKEN" && data.appointment) {
           const [bookedDate, bookedFullTime] = data.appointment.split('T');
           const bookedHour = bookedFullTime.substring(0, 5);
 
@@ -69,7 +78,7 @@ const ServiceModal = ({ isOpen, onClose, item, onConfirm, businessHours, interva
     return () => {
       if (socket.readyState === 1) socket.close();
     };
-  }, [isOpen, tenantId, selectedDate]);
+  }, [isOpen, tenantId, selectedDate, fetchBusyTimes]);
 
   const generateSlots = (openStr, closeStr, intervalMins) => {
     const slots = [];
@@ -9,22 +9,19 @@ const useBusinessData = () => {
   const [currentPage, setCurrentPage] = useState(0);
   const [totalItems, setTotalItems] = useState(0);
   const [inputValue, setInputValue] = useState('');
-  const [orders, setOrders] = useState([]);
   const limit = 10;
 
   const fetchData = async () => {
     try {
       setLoading(true);
       const skip = currentPage * limit;
-      const [itemsRes, meRes, ordersRes] = await Promise.all([
+      const [itemsRes, meRes] = await Promise.all([
         api.get(`/business/items?skip=${skip}&limit=${limit}&q=${inputValue}`),
-        api.get('/business/me'),
-        api.get('/orders/my-orders')
+        api.get('/business/me')
       ]);
       setItems(itemsRes.data.items || []);
       setTotalItems(itemsRes.data.total || 0);
       setBusiness(meRes.data);
-      setOrders(ordersRes.data || []);
       const postsRes = await api.get('/social/my-posts');
       setPosts(Array.isArray(postsRes.data) ? postsRes.data : (postsRes.data.items || []));
     } catch (err) {
@@ -45,7 +42,6 @@ const useBusinessData = () => {
     currentPage, setCurrentPage,
     totalItems,
     inputValue, setInputValue,
-    orders, setOrders,
     fetchData
   };
 };
@@ -5,43 +5,67 @@ import { toast } from 'react-hot-toast';
 const useOrders = (filter) => {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  // El servidor manda los pedidos por páginas (pendientes primero, luego por fecha);
+  // el cursor de la siguiente viene en X-Next-Cursor
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  const fetchOrders = useCallback(async () => {
-    setLoading(true);
-    try {
-      const endpoint = filter === 'all'
-        ? '/orders/my-orders'
-        : `/orders/my-orders?status=${filter}`;
+  const fetchPage = useCallback(async (cursor = null) => {
+    const params = {};
+    if (filter !== 'all') params.status = filter;
+    if (cursor) params.cursor = cursor;
 
-      const res = await api.get(endpoint);
-      const data = Array.isArray(res.data) ? res.data : (res.data.items || []);
+    const res = await api.get('/orders/my-orders', { params });
+    const data = Array.isArray(res.data) ? res.data : (res.data.items || []);
 
-      const statusPriority = { 'pending': 0, 'completed': 1, 'cancelled': 2 };
-
-      const sortedOrders = [...data].sort((a, b) => {
-        if (statusPriority[a.status] !== statusPriority[b.status]) {
-          return statusPriority[a.status] - statusPriority[b.status];
-        }
-        return new Date(b.created_at) - new Date(a.created_at);
-      });
+    setOrders(prev => cursor ? [...prev, ...data] : data);
+    setNextCursor(res.headers['x-next-cursor'] || null);
+  }, [filter]);
 
-      setOrders(sortedOrders);
+  const fetchOrders = useCallback(async () => {
+    setLoading(true);
+    try {
+      await fetchPage();
     } catch (err) {
       toast.error("Error al cargar pedidos");
     } finally {
       setLoading(false);
     }
-  }, [filter]);
+  }, [fetchPage]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      await fetchPage(nextCursor);
+    } catch (err) {
+      toast.error("Error al cargar más pedidos");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
     fetchOrders();
   }, [fetchOrders]);
 
+  // Eventos del socket: se aplican sobre la lista cargada sin volver a pedirla
+  const applyEvent = useCallback((data) => {
+    if (data.event === 'NEW_ORDER' && data.order) {
+      if (filter !== 'all' && filter !== data.order.status) return;
+      setOrders(prev => prev.some(o => o.id === data.order.id) ? prev : [data.order, ...prev]);
+    } else if (data.event === 'ORDER_STATUS') {
+      setOrders(prev => filter !== 'all' && filter !== data.status
+        ? prev.filter(o => o.id !== data.id)
+        : prev.map(o => o.id === data.id ? { ...o, status: data.status } : o));
+    }
+  }, [filter]);
+
   const updateStatus = async (id, newStatus) => {
     try {
       await api.patch(`/orders/${id}/status`, { status: newStatus });
       toast.success(`Estado actualizado: ${newStatus}`);
-      fetchOrders();
+      applyEvent({ event: 'ORDER_STATUS', id, status: newStatus });
     } catch (err) {
       toast.error("Error al actualizar");
     }
@@ -51,8 +75,12 @@ const useOrders = (filter) => {
     orders,
     loading,
     updateStatus,
-    fetchOrders
+    fetchOrders,
+    applyEvent,
+    hasMore: !!nextCursor,
+    loadingMore,
+    loadMore
   };
 };
 
-export default useOrders;
\ No newline at end of file
+export default useOrders;
@@ -26,7 +26,7 @@ const usePostManagement = (fetchData, setPosts, posts) => {
       toast.success("¡Publicado!");
       setPostContent(''); setFile(null); setIsPostModalOpen(false);
       fetchData();
-    } catch (err) { toast.error("Error"); }
+    } catch (err) { toast.error(err.response?.data?.detail || "Error"); }
   };
 
   return {
@@ -2,52 +2,105 @@ import { useEffect, useRef } from 'react';
 import { toast } from 'react-hot-toast';
 import alertSound from '../assets/sound.mp3';
 
-const useWebSocket = (tenantId, onNewOrder) => {
+// onEvent(data): cada NEW_ORDER / ORDER_STATUS, para aplicarlo sobre el estado local.
+// onResync(): nos perdimos demasiados eventos y hay que recargar la lista completa.
+const useWebSocket = (tenantId, { onEvent, onResync } = {}) => {
   const socketRef = useRef(null);
   const hasShownToastRef = useRef(false);
+  // Último evento recibido: al reconectar el servidor reenvía solo lo que nos perdimos
+  const lastSeqRef = useRef(null);
+  // Eventos ya aplicados: pueden llegar fuera de orden (varios workers) o repetidos al reconectar
+  const seenRef = useRef(new Set());
+  // Los handlers cambian en cada render: se leen del ref para no reconectar por eso
+  const handlersRef = useRef({ onEvent, onResync });
+  handlersRef.current = { onEvent, onResync };
 
   useEffect(() => {
     if (!tenantId || socketRef.current) return;
 
+    let stopped = false;
+    let retryTimer = null;
+    let retryDelay = 1000;
+
     const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
     const baseUrl = import.meta.env.VITE_API_BASE_URL || 'localhost:8000';
     const host = baseUrl.replace(/^https?:\/\//, '').split('/')[0];
-    const wsUrl = `${protocol}://${host}/ws/${tenantId}`;
-    const socket = new WebSocket(wsUrl);
-    socketRef.current = socket;
-    
-    socket.onerror = () => {
-      // Suppress WebSocket connection errors in production
-    };
-    
-    socket.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      if (data.event === "NEW_ORDER" && !hasShownToastRef.current) {
-        hasShownToastRef.current = true;
-        new Audio(alertSound).play().catch(() => { });
-        toast.success("¡NUEVO PEDIDO!", {
-          duration: 6000,
-          icon: '🔥',
-          style: { background: '#0f172a', color: '#fff', fontWeight: 'bold' }
-        });
-        onNewOrder();
-        // Reset after a delay to allow new orders
-        setTimeout(() => hasShownToastRef.current = false, 1000);
-      }
-    };
-    
-    socket.onclose = () => {
-      socketRef.current = null;
-      hasShownToastRef.current = false;
+
+    const connect = () => {
+      // El token identifica al panel del dueño: tiene su propio cupo de conexiones
+      const params = new URLSearchParams();
+      const token = localStorage.getItem('token');
+      if (token) params.set('token', token);
+      if (lastSeqRef.current !== null) params.set('last_seq', lastSeqRef.current);
+      const query = params.toString() ? `?${params}` : '';
+      const socket = new WebSocket(`${protocol}://${host}/ws/${tenantId}${query}`);
+      socketRef.current = socket;
+
+      socket.onopen = () => {
+        retryDelay = 1000;
+      };
+
+      socket.onerror = () => {
+        // Suppress WebSocket connection errors in production
+      };
+
+      socket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        // Latido del servidor: si no respondemos, cierra la conexión por inactiva
+        if (data.event === "PING") {
+          socket.send("pong");
+          return;
+        }
+        // Nos perdimos demasiados eventos: recargamos la lista completa
+        if (data.event === "RESYNC") {
+          lastSeqRef.current = null;
+          seenRef.current.clear();
+          handlersRef.current.onResync?.();
+          return;
+        }
+        if (typeof data.seq === 'number') {
+          if (seenRef.current.has(data.seq)) return;
+          seenRef.current.add(data.seq);
+          if (seenRef.current.size > 500) {
+            seenRef.current.delete(seenRef.current.values().next().value);
+          }
+          lastSeqRef.current = Math.max(lastSeqRef.current ?? data.seq, data.seq);
+        }
+        handlersRef.current.onEvent?.(data);
+        if (data.event === "NEW_ORDER" && !hasShownToastRef.current) {
+          hasShownToastRef.current = true;
+          new Audio(alertSound).play().catch(() => { });
+          toast.success("¡NUEVO PEDIDO!", {
+            duration: 6000,
+            icon: '🔥',
+            style: { background: '#0f172a', color: '#fff', fontWeight: 'bold' }
+          });
+          // Reset after a delay to allow new orders
+          setTimeout(() => hasShownToastRef.current = false, 1000);
+        }
+      };
+
+      socket.onclose = () => {
+        socketRef.current = null;
+        hasShownToastRef.current = false;
+        if (stopped) return;
+        // Reconexión con espera creciente (máx. 30s)
+        retryTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+      };
     };
-    
+
+    connect();
+
     return () => {
-      if (socketRef.current && socketRef.current.readyState === WebSocket.OPEN) {
+      stopped = true;
+      clearTimeout(retryTimer);
+      if (socketRef.current) {
         socketRef.current.close();
         socketRef.current = null;
       }
     };
-  }, [tenantId, onNewOrder]);
+  }, [tenantId]);
 };
 
-export default useWebSocket;
\ No newline at end of file
+export default useWebSocket;
@@ -20,16 +20,23 @@ const Dashboard = () => {
   const {
     items, setItems,
     posts, setPosts,
-    business,
+    business, setBusiness,
     loading,
     currentPage, setCurrentPage,
     totalItems,
     inputValue, setInputValue,
-    orders,
     fetchData
   } = useBusinessData();
 
-  useWebSocket(business.tenant_id, fetchData);
+  // Cada pedido descuenta un crédito: el saldo viene en el evento, sin recargar todo el panel
+  useWebSocket(business.tenant_id, {
+    onEvent: (data) => {
+      if (data.event === 'NEW_ORDER' && typeof data.wallet_balance === 'number') {
+        setBusiness(prev => ({ ...prev, wallet: { ...prev.wallet, balance: data.wallet_balance } }));
+      }
+    },
+    onResync: fetchData
+  });
 
   const {
     isModalOpen, setIsModalOpen,
@@ -80,7 +87,7 @@ const Dashboard = () => {
         {activeTab === 'orders' ? <OrdersDashboard tenantId={business.tenant_id} /> :
           activeTab === 'posts' ? <PostsView posts={posts} onDelete={handleDeletePost} /> :
             activeTab === 'profile' ? <ConfigBusiness /> :
-              activeTab === 'calendar' ? <AdminCalendar orders={orders} /> : activeTab === 'config' ? <AdminConfig /> : (
+              activeTab === 'calendar' ? <AdminCalendar /> : activeTab === 'config' ? <AdminConfig /> : (
                 <div className="animate-in fade-in slide-in-from-bottom-4 duration-700">
                   <div className="grid grid-cols-1 md:grid-cols-2 gap-6 mb-8">
                     <div className="bg-white p-7 rounded-[2.5rem] border border-slate-100 shadow-sm">
@@ -7,9 +7,10 @@ import { useOrders, useWebSocket } from '../hooks';
 const OrdersDashboard = ({ tenantId }) => {
   const [filter, setFilter] = useState('pending');
 
-  const { orders, loading, updateStatus, fetchOrders } = useOrders(filter);
+  const { orders, loading, updateStatus, fetchOrders, applyEvent, hasMore, loadingMore, loadMore } = useOrders(filter);
 
-  useWebSocket(tenantId, fetchOrders);
+  // Los pedidos nuevos y cambios de estado llegan completos: solo se recarga si hubo RESYNC
+  useWebSocket(tenantId, { onEvent: applyEvent, onResync: fetchOrders });
 
   return (
     <div className="p-6 max-w-6xl mx-auto animate-in fade-in duration-500">
@@ -19,7 +20,7 @@ const OrdersDashboard = ({ tenantId }) => {
             Gestión de Pedidos
           </h2>
           <p className="text-slate-400 text-[10px] font-black uppercase tracking-widest mt-1">
-            {orders.length} Pedidos encontrados
+            {orders.length}{hasMore ? '+' : ''} Pedidos encontrados
           </p>
         </div>
 
@@ -168,6 +169,18 @@ const OrdersDashboard = ({ tenantId }) => {
         </div>
       )}
 
+      {!loading && hasMore && (
+        <div className="flex justify-center mt-10">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-8 py-3 rounded-2xl bg-slate-900 text-white text-[10px] font-black uppercase tracking-widest shadow-lg disabled:opacity-50"
+          >
+            {loadingMore ? 'Cargando...' : 'Cargar más'}
+          </button>
+        </div>
+      )}
+
       {!loading && orders.length === 0 && (
         <div className="text-center py-20 border-4 border-dashed border-slate-50 rounded-[48px]">
           <Package size={64} className="mx-auto text-slate-200 mb-4" />
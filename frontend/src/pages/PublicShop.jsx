@@ -35,6 +35,9 @@ const PublicShop = () => {
     customer_name: '', address: '', appointment_datetime: '', notes: ''
   });
   const [likedPosts, setLikedPosts] = useState(new Set());
+  // El muro llega por páginas: el cursor de la siguiente viene en X-Next-Cursor
+  const [postsCursor, setPostsCursor] = useState(null);
+  const [loadingMorePosts, setLoadingMorePosts] = useState(false);
   const [isDetailModalOpen, setIsDetailModalOpen] = useState(false);
 
   // --- PERSISTENCIA ---
@@ -86,6 +89,7 @@ const PublicShop = () => {
         setData({ ...bizRes.data, items: newItems, posts: socialRes.data });
         setTotalItems(bizRes.data.total_items || 0);
         setLikedPosts(new Set(socialRes.data.filter(p => p.is_liked).map(p => p.id)));
+        setPostsCursor(socialRes.headers?.['x-next-cursor'] || null);
       } catch (err) {
         toast.error("Error al cargar");
         if (err.response?.status === 404) window.location.href = '/not-found';
@@ -215,6 +219,23 @@ const PublicShop = () => {
     toast.success("Horario reservado");
   };
 
+  const loadMorePosts = async () => {
+    if (!postsCursor || loadingMorePosts) return;
+    setLoadingMorePosts(true);
+    try {
+      const res = await api.get(`/social/feed/${slug}`, { params: { cursor: postsCursor } });
+      setData(prev => ({ ...prev, posts: [...prev.posts, ...res.data] }));
+      setLikedPosts(prev => {
+        const newSet = new Set(prev);
+        res.data.filter(p => p.is_liked).forEach(p => newSet.add(p.id));
+        return newSet;
+      });
+      setPostsCursor(res.headers['x-next-cursor'] || null);
+    } catch (err) {
+      toast.error("Error al cargar más publicaciones");
+    } finally { setLoadingMorePosts(false); }
+  };
+
   const handleLike = async (postId) => {
     const isLiked = likedPosts.has(postId);
     setLikedPosts(prev => {
@@ -279,6 +300,7 @@ const PublicShop = () => {
           {step === 1 ? (
             <PublicCatalog {...{
               activeTab, data, cart, updateQuantity, handleLike, likedPosts,
+              hasMorePosts: !!postsCursor, loadMorePosts, loadingMorePosts,
               currentPage, setCurrentPage, totalItems, searchQuery, isloading: loading, inputValue, setIsDetailModalOpen, setSelectedItem
             }} />
           ) : (
@@ -45,7 +45,9 @@ const SuperAdmin = () => {
         api.get('/admin/global-stats', {
           headers: { Authorization: `Bearer ${token}` }
         }),
+        // Solo para los gráficos: la tabla de negocios pagina por su cuenta
         api.get('/admin/tenants', {
+          params: { page_size: 7 },
           headers: { Authorization: `Bearer ${token}` }
         })
       ]);
@@ -153,7 +155,7 @@ const SuperAdmin = () => {
         )}
         <UserManagement />
         {/* TENANTS TABLE */}
-        <TenantManagement tenants={tenants} onRefresh={onRefresh} />
+        <TenantManagement onRefresh={fetchAdminData} />
         <div className="mt-12">
           <TransactionHistory />
         </div>